@@ -8,6 +8,8 @@ import uuid
 from pathlib import Path
 from typing import Dict, Any
 
+from embedding_models import get_model
+
 # AWS clients
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
 s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
@@ -19,6 +21,9 @@ IMAGE_PATH = 'test-image/01/b-00.jpg'
 VECTOR_BUCKET = 'my-nova-mme-demo-01'
 INDEX_NAME = 'my-image-index-03-tme3'
 
+# Payload schema and response path shared with the other scripts and the embed CLI
+model = get_model(MODEL_ID)
+
 
 def generate_embedding(image_path: str) -> Dict[str, Any]:
     """Generate embedding for a single local image file using TME3"""
@@ -36,14 +41,9 @@ def generate_embedding(image_path: str) -> Dict[str, Any]:
     image_base64 = base64.b64encode(image_bytes).decode('utf-8')
     
     # Prepare model input for TME3 using base64String
-    model_input = {
-        "inputType": "image",
-        "image": {
-            "mediaSource": {
-                "base64String": image_base64
-            }
-        }
-    }
+    model_input = model.build_payload('image', {
+        'media_source': {'base64String': image_base64}
+    })
     
     # Invoke Bedrock model synchronously
     response = bedrock_client.invoke_model(
@@ -53,42 +53,7 @@ def generate_embedding(image_path: str) -> Dict[str, Any]:
     
     # Parse response
     result = json.loads(response['body'].read())
-    
-    # TME3 response format: dict with 'data' key containing a list with embedding
-    if isinstance(result, dict) and 'data' in result:
-        data_list = result['data']
-        if isinstance(data_list, list) and len(data_list) > 0:
-            first_item = data_list[0]
-            if isinstance(first_item, dict) and 'embedding' in first_item:
-                embedding = first_item['embedding']
-            else:
-                raise ValueError(f"Unexpected data item format: {first_item}")
-        else:
-            raise ValueError(f"Empty data list in response")
-    elif isinstance(result, dict) and 'embedding' in result:
-        # Alternative format: dict with 'embedding' key
-        embedding_list = result['embedding']
-        if isinstance(embedding_list, list) and len(embedding_list) > 0:
-            first_item = embedding_list[0]
-            if isinstance(first_item, dict) and 'embedding' in first_item:
-                embedding = first_item['embedding']
-            elif isinstance(first_item, (int, float)):
-                embedding = embedding_list
-            else:
-                raise ValueError(f"Unexpected embedding item format: {first_item}")
-        else:
-            embedding = embedding_list
-    elif isinstance(result, list) and len(result) > 0:
-        # Alternative format: list with embedding data
-        first_item = result[0]
-        if isinstance(first_item, dict) and 'embedding' in first_item:
-            embedding = first_item['embedding']
-        elif isinstance(first_item, (int, float)):
-            embedding = result
-        else:
-            raise ValueError(f"Unexpected list item format: {first_item}")
-    else:
-        raise ValueError(f"Unexpected response format: {result}")
+    embedding = model.extract_embedding(result)
     
     return {
         'image_path': image_path,
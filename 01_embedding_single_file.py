@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
-"""Embed a single local image file using Nova MME"""
+"""Embed a single local image file, or every image under a local directory, using Nova MME"""
 
 import boto3
 import json
 import base64
 import uuid
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from adaptive_concurrency import format_metrics
+from directory_ingestion import ingest_directory, ingest_text_directory, IMAGE_EXTENSIONS
 
 # AWS clients
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
@@ -19,24 +22,38 @@ IMAGE_PATH = 'test-image/01/b-00.jpg'
 VECTOR_BUCKET = 'my-nova-mme-demo-01'
 INDEX_NAME = 'my-image-index-01'
 
+# Directory mode: set IMAGE_DIR to embed every new or changed image under it
+# instead of IMAGE_PATH. Re-run to pick up new files; the manifest records what
+# has been written.
+IMAGE_DIR = None  # e.g. 'test-image'
+MANIFEST_FILE = 'ingest_manifest.jsonl'
+MAX_FILE_SIZE = 20 * 1024 * 1024  # Skip larger files (bytes)
+FETCH_WORKERS = 4  # Concurrent file reads
+WORKERS = 8  # Concurrent Bedrock calls
+WRITE_BATCH_SIZE = 100  # Vectors per put_vectors call (max 500)
+SPOOL_DIR = 'vector_spool'  # Vectors that could not be written are kept here for replay
+
+# Text directory mode: set TEXT_DIR to embed every new or changed .txt/.md file
+# under it. Nova MME embeds one file per request; a Cohere model
+# (e.g. 'cohere.embed-multilingual-v3', 1024-dimension index) embeds up to 96
+# files per request
+TEXT_DIR = None  # e.g. 'test-text'
+TEXT_MODEL_ID = MODEL_ID
+TEXT_INDEX_NAME = INDEX_NAME
+TEXT_MANIFEST_FILE = 'ingest_manifest_text.jsonl'
+
 def get_image_format(file_path: str) -> str:
     """Determine image format from file extension"""
     if file_path.lower().endswith('.png'):
         return 'png'
+    elif file_path.lower().endswith('.gif'):
+        return 'gif'
+    elif file_path.lower().endswith('.webp'):
+        return 'webp'
     return 'jpeg'
 
-def generate_embedding(image_path: str) -> Dict[str, Any]:
-    """Generate embedding for a single local image file"""
-    print(f"\nProcessing: {image_path}")
-    
-    # Read local image file
-    path = Path(image_path)
-    if not path.exists():
-        raise FileNotFoundError(f"Image file not found: {image_path}")
-    
-    with open(path, 'rb') as f:
-        image_bytes = f.read()
-    
+def build_model_input(image_path: str, image_bytes: bytes) -> Dict[str, Any]:
+    """Build Nova MME model input for an image"""
     image_base64 = base64.b64encode(image_bytes).decode('utf-8')
     
     # Prepare model input
@@ -53,8 +70,10 @@ def generate_embedding(image_path: str) -> Dict[str, Any]:
             }
         }
     }
-    
-    # Invoke Bedrock model synchronously
+    return model_input
+
+def invoke_embedding(model_input: Dict[str, Any]) -> List[float]:
+    """Invoke Bedrock synchronously and return the embedding"""
     response = bedrock_client.invoke_model(
         modelId=MODEL_ID,
         body=json.dumps(model_input)
@@ -62,7 +81,21 @@ def generate_embedding(image_path: str) -> Dict[str, Any]:
     
     # Parse response
     result = json.loads(response['body'].read())
-    embedding = result.get('embeddings', [{}])[0].get('embedding', [])
+    return result.get('embeddings', [{}])[0].get('embedding', [])
+
+def generate_embedding(image_path: str) -> Dict[str, Any]:
+    """Generate embedding for a single local image file"""
+    print(f"\nProcessing: {image_path}")
+    
+    # Read local image file
+    path = Path(image_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Image file not found: {image_path}")
+    
+    with open(path, 'rb') as f:
+        image_bytes = f.read()
+    
+    embedding = invoke_embedding(build_model_input(image_path, image_bytes))
     
     return {
         'image_path': image_path,
@@ -126,8 +159,104 @@ def store_embedding_to_s3_vectors(
         'response': response
     }
 
+def ingest_image_dir():
+    """Embed every new or changed image under IMAGE_DIR"""
+    print("=" * 60)
+    print("Nova MME Directory Embedding")
+    print("=" * 60)
+    print(f"\n  Directory: {IMAGE_DIR}")
+    print(f"  Vector Bucket: {VECTOR_BUCKET}")
+    print(f"  Index Name: {INDEX_NAME}")
+    print(f"  Manifest: {MANIFEST_FILE}")
+    print(f"  Workers: {WORKERS}, Write Batch: {WRITE_BATCH_SIZE}\n")
+    
+    try:
+        counts = ingest_directory(
+            IMAGE_DIR,
+            build_model_input,
+            invoke_embedding,
+            s3vectors_client,
+            VECTOR_BUCKET,
+            INDEX_NAME,
+            MANIFEST_FILE,
+            extensions=IMAGE_EXTENSIONS,
+            max_file_size=MAX_FILE_SIZE,
+            fetch_workers=FETCH_WORKERS,
+            workers=WORKERS,
+            batch_size=WRITE_BATCH_SIZE,
+            spool=SPOOL_DIR
+        )
+        
+        print(f"\n✓ Scanned {counts['scanned']} files: {counts['unchanged']} unchanged, "
+              f"{counts['embedded']} embedded, {counts['failed']} failed")
+        print(f"✓ Vectors written: {counts['written']} in {counts['elapsed_seconds']:.1f}s")
+        if counts['spilled']:
+            print(f"⚠ {counts['spilled']} vectors spilled to {SPOOL_DIR}; "
+                  f"write them with vector_writer.replay_spool")
+        print(f"✓ Concurrency: {format_metrics(counts['concurrency'])}")
+        
+        print("\n" + "=" * 60)
+        print("✓ Embedding Process Completed Successfully!")
+        print("=" * 60)
+    
+    except KeyboardInterrupt:
+        print("\n\n✗ Interrupted by user")
+        print(f"Written files are recorded in: {MANIFEST_FILE}")
+        print("You can safely re-run this script to continue")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
+def ingest_text_dir():
+    """Embed every new or changed text file under TEXT_DIR"""
+    print("=" * 60)
+    print("Text Directory Embedding")
+    print("=" * 60)
+    print(f"\n  Directory: {TEXT_DIR}")
+    print(f"  Model: {TEXT_MODEL_ID}")
+    print(f"  Vector Bucket: {VECTOR_BUCKET}")
+    print(f"  Index Name: {TEXT_INDEX_NAME}")
+    print(f"  Manifest: {TEXT_MANIFEST_FILE}\n")
+    
+    try:
+        counts = ingest_text_directory(
+            TEXT_DIR,
+            bedrock_client,
+            TEXT_MODEL_ID,
+            EMBEDDING_DIMENSION,
+            s3vectors_client,
+            VECTOR_BUCKET,
+            TEXT_INDEX_NAME,
+            TEXT_MANIFEST_FILE,
+            fetch_workers=FETCH_WORKERS,
+            workers=WORKERS,
+            batch_size=WRITE_BATCH_SIZE,
+            spool=SPOOL_DIR
+        )
+        
+        print(f"\n✓ Scanned {counts['scanned']} files: {counts['unchanged']} unchanged, "
+              f"{counts['embedded']} embedded, {counts['failed']} failed")
+        print(f"✓ Vectors written: {counts['written']} in {counts['elapsed_seconds']:.1f}s")
+        if counts['spilled']:
+            print(f"⚠ {counts['spilled']} vectors spilled to {SPOOL_DIR}; "
+                  f"write them with vector_writer.replay_spool")
+        print(f"✓ Concurrency: {format_metrics(counts['concurrency'])}")
+    
+    except KeyboardInterrupt:
+        print("\n\n✗ Interrupted by user")
+        print(f"Written files are recorded in: {TEXT_MANIFEST_FILE}")
+        print("You can safely re-run this script to continue")
+    except Exception as e:
+        print(f"✗ Error: {e}")
+
 def main():
     """Main function to generate embedding for single image"""
+    if IMAGE_DIR:
+        ingest_image_dir()
+        return
+    if TEXT_DIR:
+        ingest_text_dir()
+        return
+    
     print("=" * 60)
     print("Nova MME Single Image Embedding")
     print("=" * 60)
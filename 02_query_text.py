@@ -5,6 +5,11 @@ import boto3
 import json
 from typing import Dict, Any, List
 
+from index_config import resolve_index
+from query_service import search_via_service
+from rerank import query_with_rerank
+from two_stage_search import two_stage_query
+
 # AWS clients
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
 s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
@@ -14,11 +19,14 @@ MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
 EMBEDDING_DIMENSION = 3072
 VECTOR_BUCKET = 'my-nova-mme-demo-01'
 #INDEX_NAME = 'my-image-index-01'
-INDEX_NAME = 'my-image-index-02-lambda'
+INDEX_NAME = 'nova-mme-images'  # Alias in index_aliases.json or a physical index name
 QUERY_TEXT = 'Wind turbine'
 TOP_K = 5  # Number of results to return
+TWO_STAGE = True  # Use coarse_index from index_aliases.json when configured for the alias
+RERANK_OVERFETCH = 0  # Fetch TOP_K x N candidates and rerank locally with MMR (0 = off)
+QUERY_SERVICE_URL = None  # e.g. 'http://127.0.0.1:8765' to search through 13_query_service.py
 
-def generate_text_embedding(text: str) -> List[float]:
+def generate_text_embedding(text: str, dimension: int = EMBEDDING_DIMENSION) -> List[float]:
     """Generate embedding for text using Nova MME"""
     print(f"\nGenerating embedding for text: '{text}'")
     
@@ -28,7 +36,7 @@ def generate_text_embedding(text: str) -> List[float]:
         "taskType": "SINGLE_EMBEDDING",
         "singleEmbeddingParams": {
             "embeddingPurpose": "IMAGE_RETRIEVAL",
-            "embeddingDimension": EMBEDDING_DIMENSION,
+            "embeddingDimension": dimension,
             "text": {
                 "truncationMode": "END",
                 "value": text
@@ -78,6 +86,78 @@ def query_vectors(
     
     return results
 
+def query_two_stage(query_embedding: List[float], index: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Coarse search on the low-dimension index, then rerank the shortlist with full vectors"""
+    print(f"\nQuerying S3 Vectors (two-stage)...")
+    print(f"  Coarse Index: {index['coarse_index']} ({index['coarse_dimension']}-d)")
+    print(f"  Full Index: {index['index']} ({index['dimension']}-d)")
+    print(f"  Top K: {TOP_K}")
+    
+    response = two_stage_query(
+        s3vectors_client,
+        vector_bucket=VECTOR_BUCKET,
+        coarse_index=index['coarse_index'],
+        full_index=index['index'],
+        query_embedding=query_embedding,
+        coarse_dimension=index['coarse_dimension'],
+        top_k=TOP_K
+    )
+    
+    timings = response['timings']
+    print(f"✓ Reranked {response['candidates']} coarse candidates to {len(response['results'])} results")
+    print(f"  Coarse: {timings['coarse_seconds'] * 1000:.0f} ms, "
+          f"get_vectors: {timings['fetch_seconds'] * 1000:.0f} ms, "
+          f"rerank: {timings['rerank_seconds'] * 1000:.1f} ms")
+    
+    return response['results']
+
+def query_and_rerank(query_embedding: List[float], index_name: str) -> List[Dict[str, Any]]:
+    """Over-fetch candidates and rerank locally with diversity and near-duplicate suppression"""
+    print(f"\nQuerying S3 Vectors with re-rank...")
+    print(f"  Index Name: {index_name}")
+    print(f"  Top K: {TOP_K} (over-fetch x{RERANK_OVERFETCH})")
+    
+    response = query_with_rerank(
+        s3vectors_client,
+        vector_bucket=VECTOR_BUCKET,
+        index_name=index_name,
+        query_embedding=query_embedding,
+        top_k=TOP_K,
+        overfetch=RERANK_OVERFETCH
+    )
+    
+    timings = response['timings']
+    print(f"✓ Reranked {response['candidates']} candidates to {len(response['results'])} results")
+    print(f"  Query: {timings['query_seconds'] * 1000:.0f} ms")
+    print(f"  Re-rank overhead: {timings['extra_seconds'] * 1000:.0f} ms "
+          f"(get_vectors {timings['fetch_seconds'] * 1000:.0f} ms, "
+          f"MMR {timings['rerank_seconds'] * 1000:.1f} ms)")
+    
+    return response['results']
+
+def query_service(index_name: str) -> List[Dict[str, Any]]:
+    """Embed and query through the long-running query service"""
+    print(f"\nQuerying through service {QUERY_SERVICE_URL}...")
+    print(f"  Index Name: {index_name}")
+    print(f"  Top K: {TOP_K}")
+    
+    response = search_via_service(
+        QUERY_SERVICE_URL,
+        index=index_name,
+        query=QUERY_TEXT,
+        top_k=TOP_K,
+        model_id=MODEL_ID,
+        dimension=EMBEDDING_DIMENSION
+    )
+    
+    timings = response['timings']
+    print(f"✓ Found {len(response['results'])} results in {response['index']}"
+          f"{' (cached)' if response['cached'] else ''}")
+    print(f"  Embedding: {timings['embed_seconds'] * 1000:.0f} ms, "
+          f"query: {timings['query_seconds'] * 1000:.0f} ms")
+    
+    return response['results']
+
 def display_results(results: List[Dict[str, Any]]):
     """Display query results in a formatted way"""
     print("\n" + "=" * 60)
@@ -104,6 +184,11 @@ def display_results(results: List[Dict[str, Any]]):
         if score is not None:
             print(f"  Score: {score}")
         
+        # Near-duplicates collapsed into this result by the re-rank stage
+        duplicates = result.get('duplicates')
+        if duplicates:
+            print(f"  Near-duplicates collapsed: {len(duplicates)}")
+        
         # Extract metadata
         metadata = result.get('metadata', {})
         if metadata:
@@ -137,16 +222,28 @@ def main():
     print("=" * 60)
     
     try:
-        # Generate embedding for query text
-        query_embedding = generate_text_embedding(QUERY_TEXT)
-        
-        # Query S3 Vectors
-        results = query_vectors(
-            query_embedding=query_embedding,
-            vector_bucket=VECTOR_BUCKET,
-            index_name=INDEX_NAME,
-            top_k=TOP_K
-        )
+        if QUERY_SERVICE_URL:
+            # The service resolves the alias and embeds the query itself
+            results = query_service(INDEX_NAME)
+        else:
+            # Resolve index alias to the current physical index
+            index = resolve_index(INDEX_NAME, EMBEDDING_DIMENSION)
+            
+            # Generate embedding for query text
+            query_embedding = generate_text_embedding(QUERY_TEXT, index['dimension'])
+            
+            # Query S3 Vectors
+            if TWO_STAGE and index.get('coarse_index'):
+                results = query_two_stage(query_embedding, index)
+            elif RERANK_OVERFETCH > 0:
+                results = query_and_rerank(query_embedding, index['index'])
+            else:
+                results = query_vectors(
+                    query_embedding=query_embedding,
+                    vector_bucket=VECTOR_BUCKET,
+                    index_name=index['index'],
+                    top_k=TOP_K
+                )
         
         # Display results
         display_results(results)
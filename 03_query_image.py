@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
-"""Query S3 Vector Bucket using image with Nova MME"""
+"""Query S3 Vector Bucket using image with Nova MME, or by the stored vector of an existing key"""
 
 import boto3
 import json
 import base64
+import sys
 from pathlib import Path
 from typing import Dict, Any, List
 
+from index_config import resolve_index
+from knn_graph import KnnGraph
+from rerank import query_with_rerank
+from stored_vectors import query_by_key
+
 # AWS clients
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
 s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
@@ -15,9 +21,11 @@ s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
 MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
 EMBEDDING_DIMENSION = 3072
 VECTOR_BUCKET = 'my-nova-mme-demo-01'
-INDEX_NAME = 'my-image-index-02-lambda'
+INDEX_NAME = 'nova-mme-images'  # Alias in index_aliases.json or a physical index name
 QUERY_IMAGE = 'search-01.jpg'  # Local image file
 TOP_K = 5  # Number of results to return
+KNN_GRAPH_DIR = 'knn-graph/my-image-index-02-lambda'  # Precomputed neighbours (09_build_knn_graph.py), used when present
+RERANK_OVERFETCH = 0  # Fetch TOP_K x N candidates and rerank locally with MMR (0 = off)
 
 def get_image_format(file_path: str) -> str:
     """Determine image format from file extension"""
@@ -29,7 +37,7 @@ def get_image_format(file_path: str) -> str:
         return 'webp'
     return 'jpeg'
 
-def generate_image_embedding(image_path: str) -> List[float]:
+def generate_image_embedding(image_path: str, dimension: int = EMBEDDING_DIMENSION) -> List[float]:
     """Generate embedding for image using Nova MME"""
     print(f"\nGenerating embedding for image: '{image_path}'")
     
@@ -49,7 +57,7 @@ def generate_image_embedding(image_path: str) -> List[float]:
         "taskType": "SINGLE_EMBEDDING",
         "singleEmbeddingParams": {
             "embeddingPurpose": "IMAGE_RETRIEVAL",
-            "embeddingDimension": EMBEDDING_DIMENSION,
+            "embeddingDimension": dimension,
             "image": {
                 "format": get_image_format(image_path),
                 "source": {
@@ -101,6 +109,55 @@ def query_vectors(
     
     return results
 
+def query_and_rerank(query_embedding: List[float], index_name: str) -> List[Dict[str, Any]]:
+    """Over-fetch candidates and rerank locally with diversity and near-duplicate suppression"""
+    print(f"\nQuerying S3 Vectors with re-rank...")
+    print(f"  Index Name: {index_name}")
+    print(f"  Top K: {TOP_K} (over-fetch x{RERANK_OVERFETCH})")
+    
+    response = query_with_rerank(
+        s3vectors_client,
+        vector_bucket=VECTOR_BUCKET,
+        index_name=index_name,
+        query_embedding=query_embedding,
+        top_k=TOP_K,
+        overfetch=RERANK_OVERFETCH
+    )
+    
+    timings = response['timings']
+    print(f"✓ Reranked {response['candidates']} candidates to {len(response['results'])} results")
+    print(f"  Query: {timings['query_seconds'] * 1000:.0f} ms")
+    print(f"  Re-rank overhead: {timings['extra_seconds'] * 1000:.0f} ms "
+          f"(get_vectors {timings['fetch_seconds'] * 1000:.0f} ms, "
+          f"MMR {timings['rerank_seconds'] * 1000:.1f} ms)")
+    
+    return response['results']
+
+def query_similar_to_key(vector_key: str, index_name: str) -> List[Dict[str, Any]]:
+    """Query using the stored embedding of an existing vector (no image download or Bedrock call)"""
+    # Serve from the precomputed kNN graph without any remote call when possible
+    graph = KnnGraph.load_if_exists(KNN_GRAPH_DIR)
+    if graph and graph.manifest['source_index'] == index_name and vector_key in graph:
+        print(f"\nServing related items from local kNN graph: {KNN_GRAPH_DIR}")
+        return graph.related(vector_key, TOP_K)
+    
+    print(f"\nQuerying S3 Vectors by stored vector key...")
+    print(f"  Vector Bucket: {VECTOR_BUCKET}")
+    print(f"  Index Name: {index_name}")
+    print(f"  Vector Key: {vector_key}")
+    print(f"  Top K: {TOP_K}")
+    
+    results = query_by_key(
+        s3vectors_client,
+        vector_bucket=VECTOR_BUCKET,
+        index_name=index_name,
+        key=vector_key,
+        top_k=TOP_K
+    )
+    print(f"✓ Found {len(results)} results")
+    
+    return results
+
 def display_results(results: List[Dict[str, Any]]):
     """Display query results in a formatted way"""
     print("\n" + "=" * 60)
@@ -127,6 +184,11 @@ def display_results(results: List[Dict[str, Any]]):
         if score is not None:
             print(f"  Score: {score}")
         
+        # Near-duplicates collapsed into this result by the re-rank stage
+        duplicates = result.get('duplicates')
+        if duplicates:
+            print(f"  Near-duplicates collapsed: {len(duplicates)}")
+        
         # Extract metadata
         metadata = result.get('metadata', {})
         if metadata:
@@ -169,16 +231,31 @@ def main():
     print("=" * 60)
     
     try:
+        # Resolve index alias to the current physical index
+        index = resolve_index(INDEX_NAME, EMBEDDING_DIMENSION)
+        
+        if len(sys.argv) > 1:
+            # "More like this": reuse the embedding already stored for this key
+            results = query_similar_to_key(sys.argv[1], index['index'])
+            display_results(results)
+            print("\n" + "=" * 60)
+            print("✓ Query Completed Successfully!")
+            print("=" * 60)
+            return
+        
         # Generate embedding for query image
-        query_embedding = generate_image_embedding(QUERY_IMAGE)
+        query_embedding = generate_image_embedding(QUERY_IMAGE, index['dimension'])
         
         # Query S3 Vectors
-        results = query_vectors(
-            query_embedding=query_embedding,
-            vector_bucket=VECTOR_BUCKET,
-            index_name=INDEX_NAME,
-            top_k=TOP_K
-        )
+        if RERANK_OVERFETCH > 0:
+            results = query_and_rerank(query_embedding, index['index'])
+        else:
+            results = query_vectors(
+                query_embedding=query_embedding,
+                vector_bucket=VECTOR_BUCKET,
+                index_name=index['index'],
+                top_k=TOP_K
+            )
         
         # Display results
         display_results(results)
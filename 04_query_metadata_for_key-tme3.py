@@ -6,6 +6,8 @@ import json
 import sys
 from typing import List, Dict, Any
 
+import embedding_models
+
 # AWS clients
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
 s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
@@ -21,49 +23,8 @@ def generate_text_embedding(text: str) -> List[float]:
     """Generate embedding for text using Twelve Labs Marengo Embed 3.0"""
     print(f"\nGenerating query embedding...")
     
-    # Prepare model input for TME3 text embedding
-    model_input = {
-        "inputType": "text",
-        "text": {
-            "inputText": text
-        }
-    }
-    
-    # Invoke Bedrock model
-    response = bedrock_client.invoke_model(
-        modelId=MODEL_ID,
-        body=json.dumps(model_input)
-    )
-    
-    # Parse response
-    result = json.loads(response['body'].read())
-    
-    # TME3 response format: dict with 'data' key containing a list with embedding
-    if isinstance(result, dict) and 'data' in result:
-        data_list = result['data']
-        if isinstance(data_list, list) and len(data_list) > 0:
-            first_item = data_list[0]
-            if isinstance(first_item, dict) and 'embedding' in first_item:
-                embedding = first_item['embedding']
-            else:
-                raise ValueError(f"Unexpected data item format: {first_item}")
-        else:
-            raise ValueError(f"Empty data list in response")
-    elif isinstance(result, dict) and 'embedding' in result:
-        # Alternative format: dict with 'embedding' key
-        embedding_list = result['embedding']
-        if isinstance(embedding_list, list) and len(embedding_list) > 0:
-            first_item = embedding_list[0]
-            if isinstance(first_item, dict) and 'embedding' in first_item:
-                embedding = first_item['embedding']
-            elif isinstance(first_item, (int, float)):
-                embedding = embedding_list
-            else:
-                raise ValueError(f"Unexpected embedding item format: {first_item}")
-        else:
-            embedding = embedding_list
-    else:
-        raise ValueError(f"Unexpected response format: {result}")
+    # Payload schema and response path come from the shared model definitions
+    embedding = embedding_models.generate_text_embedding(bedrock_client, MODEL_ID, text, EMBEDDING_DIMENSION)
     
     print(f"✓ Embedding generated (dimension: {len(embedding)})")
     
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Export an S3 Vectors index to a local snapshot, or restore a snapshot into an index"""
+
+import boto3
+import sys
+
+from vector_snapshot import export_index, restore_snapshot, load_manifest, MAX_SEGMENTS
+
+# AWS clients
+s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+
+# Configuration
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+INDEX_NAME = 'my-image-index-02-lambda'
+SNAPSHOT_DIR = 'snapshot/my-image-index-02-lambda'
+SNAPSHOT_DTYPE = 'float32'  # 'float16' halves snapshot size
+SEGMENT_COUNT = MAX_SEGMENTS  # Parallel list_vectors segments
+RESTORE_WORKERS = 8  # Parallel shard writers during restore
+
+
+def export_snapshot():
+    """Export index to snapshot directory"""
+    print(f"\n  Vector Bucket: {VECTOR_BUCKET}")
+    print(f"  Index Name: {INDEX_NAME}")
+    print(f"  Snapshot Dir: {SNAPSHOT_DIR}")
+    print(f"  Segments: {SEGMENT_COUNT}")
+    print(f"  Dtype: {SNAPSHOT_DTYPE}")
+
+    manifest = export_index(
+        s3vectors_client,
+        vector_bucket=VECTOR_BUCKET,
+        index_name=INDEX_NAME,
+        output_dir=SNAPSHOT_DIR,
+        segment_count=SEGMENT_COUNT,
+        dtype=SNAPSHOT_DTYPE
+    )
+
+    elapsed = manifest['elapsed_seconds']
+    print(f"\n✓ Exported {manifest['total_vectors']} vectors in {len(manifest['shards'])} shards")
+    print(f"  Dimension: {manifest['dimension']}")
+    print(f"  Elapsed: {elapsed:.1f}s ({manifest['total_vectors'] / max(elapsed, 1e-6):.0f} vectors/s)")
+
+
+def restore(target_index: str):
+    """Restore snapshot directory into target index"""
+    manifest = load_manifest(SNAPSHOT_DIR)
+    print(f"\n  Snapshot Dir: {SNAPSHOT_DIR}")
+    print(f"  Source Index: {manifest['index_name']} ({manifest['total_vectors']} vectors)")
+    print(f"  Vector Bucket: {VECTOR_BUCKET}")
+    print(f"  Target Index: {target_index}")
+
+    result = restore_snapshot(
+        s3vectors_client,
+        snapshot_dir=SNAPSHOT_DIR,
+        vector_bucket=VECTOR_BUCKET,
+        index_name=target_index,
+        max_workers=RESTORE_WORKERS
+    )
+
+    elapsed = result['elapsed_seconds']
+    print(f"\n✓ Restored {result['restored_vectors']} vectors from {result['shards']} shards")
+    print(f"  Elapsed: {elapsed:.1f}s ({result['restored_vectors'] / max(elapsed, 1e-6):.0f} vectors/s)")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('export', 'restore'):
+        print("Usage:")
+        print(f"  python {sys.argv[0]} export")
+        print(f"  python {sys.argv[0]} restore [target_index_name]")
+        sys.exit(1)
+
+    mode = sys.argv[1]
+
+    print("=" * 60)
+    print(f"S3 Vectors Index Snapshot ({mode})")
+    print("=" * 60)
+
+    try:
+        if mode == 'export':
+            export_snapshot()
+        else:
+            target_index = sys.argv[2] if len(sys.argv) > 2 else INDEX_NAME
+            restore(target_index)
+
+        print("\n" + "=" * 60)
+        print("✓ Snapshot Process Completed Successfully!")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Migrate vectors from one S3 Vectors index to another and switch the reader alias"""
+
+import boto3
+import json
+import base64
+from typing import Dict, Any, List
+
+from index_config import resolve_index
+from index_migration import migrate_index
+
+# AWS clients
+bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+s3_client = boto3.client('s3', region_name='us-east-1')
+s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+
+# Configuration
+MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+ALIAS = 'nova-mme-images'  # Alias switched to the target index after migration
+TARGET_INDEX = 'my-image-index-04-1024'  # Must be created beforehand with TARGET_DIMENSION
+MIGRATION_MODE = 'truncate'  # 'copy', 'truncate' or 'reembed'
+TARGET_DIMENSION = 1024
+PROGRESS_FILE = 'migration_progress.json'  # Re-run the script to resume
+SWITCH_ALIAS = True  # False = only copy (e.g. backfilling a coarse index), keep alias unchanged
+
+
+def get_image_format(key: str) -> str:
+    """Determine image format from file extension"""
+    if key.lower().endswith('.png'):
+        return 'png'
+    elif key.lower().endswith('.gif'):
+        return 'gif'
+    elif key.lower().endswith('.webp'):
+        return 'webp'
+    return 'jpeg'
+
+
+def reembed_from_source(metadata: Dict[str, Any], dimension: int) -> List[float]:
+    """Re-generate embedding at the target dimension from the source image in S3"""
+    bucket = metadata.get('source_bucket')
+    key = metadata.get('source_key')
+    if not bucket or not key:
+        print(f"  Skipping vector without source object: {metadata}")
+        return []
+
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    image_base64 = base64.b64encode(response['Body'].read()).decode('utf-8')
+
+    model_input = {
+        "taskType": "SINGLE_EMBEDDING",
+        "singleEmbeddingParams": {
+            "embeddingPurpose": "GENERIC_INDEX",
+            "embeddingDimension": dimension,
+            "image": {
+                "format": get_image_format(key),
+                "source": {
+                    "bytes": image_base64
+                }
+            }
+        }
+    }
+
+    response = bedrock_client.invoke_model(
+        modelId=MODEL_ID,
+        body=json.dumps(model_input)
+    )
+
+    result = json.loads(response['body'].read())
+    return result.get('embeddings', [{}])[0].get('embedding', [])
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("S3 Vectors Index Migration")
+    print("=" * 60)
+
+    try:
+        source = resolve_index(ALIAS)
+
+        print(f"\n  Vector Bucket: {VECTOR_BUCKET}")
+        print(f"  Alias: {ALIAS}")
+        print(f"  Source Index: {source['index']} (dimension: {source['dimension']})")
+        print(f"  Target Index: {TARGET_INDEX} (dimension: {TARGET_DIMENSION})")
+        print(f"  Mode: {MIGRATION_MODE}")
+        print(f"  Progress File: {PROGRESS_FILE}")
+
+        if source['index'] == TARGET_INDEX:
+            print(f"\n✓ Alias '{ALIAS}' already points at {TARGET_INDEX}")
+            return
+
+        result = migrate_index(
+            s3vectors_client,
+            vector_bucket=VECTOR_BUCKET,
+            source_index=source['index'],
+            target_index=TARGET_INDEX,
+            progress_file=PROGRESS_FILE,
+            mode=MIGRATION_MODE,
+            target_dimension=TARGET_DIMENSION,
+            reembed_fn=reembed_from_source,
+            alias=ALIAS if SWITCH_ALIAS else None
+        )
+
+        print(f"\n✓ Migrated {result['migrated_vectors']} vectors in {result['elapsed_seconds']:.1f}s")
+        if result['caught_up_vectors']:
+            print(f"  Including {result['caught_up_vectors']} vectors written to the source during the copy")
+
+        if not SWITCH_ALIAS:
+            print(f"  Alias '{ALIAS}' left unchanged (SWITCH_ALIAS = False)")
+        elif result['cutover']:
+            print(f"✓ Alias '{ALIAS}' switched:")
+            print(f"    From: {json.dumps(result['cutover']['previous'])}")
+            print(f"    To:   {json.dumps(result['cutover']['current'])}")
+        else:
+            print(f"✗ Migration incomplete, alias not switched. Re-run to resume.")
+
+        print("\n" + "=" * 60)
+        print("✓ Migration Process Completed!")
+        print("=" * 60)
+
+    except KeyboardInterrupt:
+        print("\n\n✗ Migration interrupted by user")
+        print(f"Progress has been saved to: {PROGRESS_FILE}")
+        print("You can safely re-run this script to continue")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
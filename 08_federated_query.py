@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Query Nova MME and Marengo Embed 3.0 indexes concurrently and fuse the results"""
+
+import boto3
+from typing import Dict, Any, List
+
+from federated_search import federated_query
+
+# AWS clients
+bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+
+# Configuration
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+FEDERATED_INDEXES = [
+    {
+        'model_id': 'amazon.nova-2-multimodal-embeddings-v1:0',
+        'index': 'nova-mme-images',
+        'dimension': 3072
+    },
+    {
+        'model_id': 'twelvelabs.marengo-embed-3-0-v1:0',
+        'index': 'marengo-3-images',
+        'dimension': 512
+    }
+]
+FUSION_METHOD = 'rrf'  # 'rrf' (reciprocal rank) or 'score' (normalised similarity)
+QUERY_TEXT = 'Wind turbine'
+TOP_K = 5  # Number of results to return
+
+
+def display_legs(legs: List[Dict[str, Any]], total_seconds: float):
+    """Display per-index latency"""
+    print("\n  Per-index latency:")
+    for leg in legs:
+        print(f"    {leg['model_id']} -> {leg['index']}: "
+              f"{leg['total_seconds'] * 1000:.0f} ms "
+              f"(embedding {leg['embed_seconds'] * 1000:.0f} ms, {len(leg['results'])} results)")
+    print(f"  Total (concurrent): {total_seconds * 1000:.0f} ms")
+
+
+def display_results(results: List[Dict[str, Any]]):
+    """Display fused results"""
+    print("\n" + "=" * 60)
+    print("Fused Results")
+    print("=" * 60)
+
+    if not results:
+        print("\nNo results found.")
+        return
+
+    for idx, result in enumerate(results, 1):
+        print(f"\n--- Result {idx} ---")
+        print(f"  Source: {result['source']}")
+        print(f"  Fused Score: {result['fused_score']:.4f}")
+        for model_id, leg in result['legs'].items():
+            print(f"    {model_id}: rank {leg['rank']}, distance {leg['distance']}")
+
+
+def main():
+    """Main function to run a federated text query"""
+    print("=" * 60)
+    print("Federated Text-to-Image Query")
+    print("=" * 60)
+    print(f"\n  Query: '{QUERY_TEXT}'")
+    print(f"  Fusion: {FUSION_METHOD}")
+
+    try:
+        response = federated_query(
+            bedrock_client,
+            s3vectors_client,
+            vector_bucket=VECTOR_BUCKET,
+            legs=FEDERATED_INDEXES,
+            text=QUERY_TEXT,
+            top_k=TOP_K,
+            fusion=FUSION_METHOD
+        )
+
+        display_legs(response['legs'], response['total_seconds'])
+        display_results(response['results'])
+
+        print("\n" + "=" * 60)
+        print("✓ Query Completed Successfully!")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Precompute a k-nearest-neighbour graph for every vector of an exported index"""
+
+import boto3
+import os
+
+from knn_graph import build_knn_graph
+from vector_snapshot import export_index
+
+# Configuration
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+INDEX_NAME = 'my-image-index-02-lambda'
+SNAPSHOT_DIR = 'snapshot/my-image-index-02-lambda'  # Created by 06_snapshot_index.py
+GRAPH_DIR = 'knn-graph/my-image-index-02-lambda'
+EXPORT_FIRST = False  # True = stream the index via list_vectors into SNAPSHOT_DIR first
+K = 10  # Neighbours stored per vector
+WORKERS = os.cpu_count()  # Worker processes
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("Build k-Nearest-Neighbour Graph")
+    print("=" * 60)
+
+    try:
+        if EXPORT_FIRST:
+            print(f"\nExporting {INDEX_NAME} to {SNAPSHOT_DIR}...")
+            s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+            manifest = export_index(s3vectors_client, VECTOR_BUCKET, INDEX_NAME, SNAPSHOT_DIR)
+            print(f"✓ Exported {manifest['total_vectors']} vectors")
+
+        print(f"\n  Snapshot Dir: {SNAPSHOT_DIR}")
+        print(f"  Graph Dir: {GRAPH_DIR}")
+        print(f"  K: {K}")
+        print(f"  Workers: {WORKERS}")
+
+        result = build_knn_graph(SNAPSHOT_DIR, GRAPH_DIR, k=K, workers=WORKERS)
+
+        print(f"\n✓ Graph built for {result['total_vectors']} vectors "
+              f"(dimension {result['dimension']}, k={result['k']})")
+        print(f"  Elapsed: {result['elapsed_seconds']:.1f}s")
+
+        print("\n" + "=" * 60)
+        print("✓ kNN Graph Completed Successfully!")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
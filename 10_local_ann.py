@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Build, evaluate and query a local approximate (IVF + int8) index from an exported S3 Vectors index"""
+
+import json
+import sys
+import time
+
+from local_ann import build_ann_index, LocalAnnIndex
+
+# Configuration
+SNAPSHOT_DIR = 'snapshot/my-image-index-02-lambda'  # Created by 06_snapshot_index.py
+ANN_DIR = 'local-ann/my-image-index-02-lambda'
+N_LISTS = None  # Inverted lists (None = 4 * sqrt(N))
+NPROBE = 8  # Lists scanned per query
+RESCORE = 100  # Shortlist size rescored with full-precision vectors
+TOP_K = 10
+EVAL_QUERIES = 200  # Stored vectors used as queries when measuring recall
+
+# Text query (needs Bedrock only to embed the query text)
+MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
+EMBEDDING_DIMENSION = 3072
+
+
+def build():
+    """Build local index from snapshot"""
+    print(f"\n  Snapshot Dir: {SNAPSHOT_DIR}")
+    print(f"  ANN Dir: {ANN_DIR}")
+
+    result = build_ann_index(SNAPSHOT_DIR, ANN_DIR, n_lists=N_LISTS)
+
+    print(f"\n✓ Built IVF-int8 index: {result['total_vectors']} vectors, "
+          f"dimension {result['dimension']}, {result['n_lists']} lists")
+    print(f"  Elapsed: {result['elapsed_seconds']:.1f}s")
+
+
+def evaluate():
+    """Report recall@k and latency against exact search"""
+    index = LocalAnnIndex(ANN_DIR)
+    print(f"\n  ANN Dir: {ANN_DIR} ({index.manifest['total_vectors']} vectors)")
+    print(f"  Queries: {EVAL_QUERIES}, Top K: {TOP_K}, nprobe: {NPROBE}, rescore: {RESCORE}")
+
+    result = index.evaluate(EVAL_QUERIES, TOP_K, NPROBE, RESCORE)
+
+    print(f"\n✓ Recall@{TOP_K}: {result['recall_at_k']:.4f}")
+    print(f"  ANN latency:   p50 {result['ann_p50_ms']:.2f} ms, p99 {result['ann_p99_ms']:.2f} ms")
+    print(f"  Exact latency: p50 {result['exact_p50_ms']:.2f} ms, p99 {result['exact_p99_ms']:.2f} ms")
+    print(f"\n  {json.dumps(result)}")
+
+
+def query(text: str):
+    """Embed query text with Bedrock and search the local index"""
+    import boto3
+    from embedding_models import generate_text_embedding
+
+    bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+    embedding = generate_text_embedding(bedrock_client, MODEL_ID, text, EMBEDDING_DIMENSION)
+
+    index = LocalAnnIndex(ANN_DIR)
+    start_time = time.perf_counter()
+    results = index.search(embedding, TOP_K, NPROBE, RESCORE)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"\n✓ Found {len(results)} results in {elapsed * 1000:.2f} ms (local)")
+    for idx, result in enumerate(results, 1):
+        metadata = result['metadata']
+        print(f"\n--- Result {idx} ---")
+        print(f"  Key: {result['key']}")
+        print(f"  Distance: {result['distance']:.4f}")
+        print(f"  Source: {metadata.get('s3_uri') or metadata.get('full_path')}")
+
+
+def main():
+    """Main function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('build', 'eval', 'query'):
+        print("Usage:")
+        print(f"  python {sys.argv[0]} build")
+        print(f"  python {sys.argv[0]} eval")
+        print(f"  python {sys.argv[0]} query <text>")
+        sys.exit(1)
+
+    mode = sys.argv[1]
+
+    print("=" * 60)
+    print(f"Local ANN Index ({mode})")
+    print("=" * 60)
+
+    try:
+        if mode == 'build':
+            build()
+        elif mode == 'eval':
+            evaluate()
+        else:
+            query(' '.join(sys.argv[2:]) or 'Wind turbine')
+
+        print("\n" + "=" * 60)
+        print("✓ Completed Successfully!")
+        print("=" * 60)
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Compare two-stage (coarse + rerank) search with single-stage full-dimension search"""
+
+import boto3
+import json
+import numpy as np
+
+from embedding_models import generate_text_embedding
+from index_config import resolve_index
+from two_stage_search import compare_with_single_stage, SHORTLIST_SIZE
+
+# AWS clients
+bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+
+# Configuration
+MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+INDEX_NAME = 'nova-mme-images'  # Alias with coarse_index / coarse_dimension in index_aliases.json
+TOP_K = 5
+SHORTLIST = SHORTLIST_SIZE
+QUERIES = [
+    'Wind turbine',
+    'City skyline at night',
+    'A dog running on the beach',
+    'Snow covered mountains',
+    'Red sports car'
+]
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("Two-Stage vs Single-Stage Search")
+    print("=" * 60)
+
+    try:
+        index = resolve_index(INDEX_NAME)
+        if not index.get('coarse_index'):
+            raise ValueError(f"No coarse_index configured for '{INDEX_NAME}' in index_aliases.json")
+
+        print(f"\n  Full Index: {index['index']} ({index['dimension']}-d)")
+        print(f"  Coarse Index: {index['coarse_index']} ({index['coarse_dimension']}-d)")
+        print(f"  Top K: {TOP_K}, Shortlist: {SHORTLIST}")
+
+        reports = []
+        for text in QUERIES:
+            embedding = generate_text_embedding(bedrock_client, MODEL_ID, text, index['dimension'])
+            report = compare_with_single_stage(
+                s3vectors_client, VECTOR_BUCKET, index['coarse_index'], index['index'],
+                embedding, index['coarse_dimension'], TOP_K, SHORTLIST
+            )
+            reports.append(report)
+            print(f"\n  '{text}': recall@{TOP_K} {report['recall_at_k']:.2f}, "
+                  f"single {report['single_stage_seconds'] * 1000:.0f} ms, "
+                  f"two-stage {report['two_stage_seconds'] * 1000:.0f} ms")
+
+        single = np.array([r['single_stage_seconds'] for r in reports]) * 1000
+        two_stage = np.array([r['two_stage_seconds'] for r in reports]) * 1000
+        summary = {
+            'queries': len(reports),
+            'top_k': TOP_K,
+            'shortlist': SHORTLIST,
+            'mean_recall_at_k': float(np.mean([r['recall_at_k'] for r in reports])),
+            'single_stage_p50_ms': float(np.percentile(single, 50)),
+            'single_stage_p99_ms': float(np.percentile(single, 99)),
+            'two_stage_p50_ms': float(np.percentile(two_stage, 50)),
+            'two_stage_p99_ms': float(np.percentile(two_stage, 99))
+        }
+
+        print("\n" + "=" * 60)
+        print("Summary")
+        print("=" * 60)
+        print(json.dumps(summary, indent=2))
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Evaluate recall, MRR, latency and cost of model/dimension/index configurations on a labelled query set"""
+
+import boto3
+import json
+
+from evaluation import load_query_set, evaluate_config, append_results
+
+# AWS clients
+bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+
+# Configuration
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+QUERY_SET_FILE = 'eval_queries.jsonl'  # {"query": "...", "relevant": ["s3://...", ...]} per line
+RESULTS_FILE = 'eval_results.jsonl'  # One JSON line per configuration per run
+TOP_K = 10
+
+# Fill in price_per_1k_tokens (USD, input text tokens) from the Amazon Bedrock pricing page
+# to get cost estimates; None reports the cost as null
+EVAL_CONFIGS = [
+    {
+        'name': 'nova-3072',
+        'model_id': 'amazon.nova-2-multimodal-embeddings-v1:0',
+        'index': 'nova-mme-images',
+        'dimension': 3072,
+        'backend': 's3vectors',
+        'price_per_1k_tokens': None
+    },
+    {
+        'name': 'marengo3-512',
+        'model_id': 'twelvelabs.marengo-embed-3-0-v1:0',
+        'index': 'marengo-3-images',
+        'dimension': 512,
+        'backend': 's3vectors',
+        'price_per_1k_tokens': None
+    },
+    # Local replica built with 10_local_ann.py
+    # {
+    #     'name': 'nova-3072-local-ann',
+    #     'model_id': 'amazon.nova-2-multimodal-embeddings-v1:0',
+    #     'index': 'nova-mme-images',
+    #     'dimension': 3072,
+    #     'backend': 'local_ann',
+    #     'local_dir': 'local-ann/my-image-index-02-lambda',
+    #     'price_per_1k_tokens': None
+    # },
+]
+
+# Exact search over a local replica supplies the relevant set for unlabelled queries
+# e.g. {'model_id': 'amazon.nova-2-multimodal-embeddings-v1:0', 'dimension': 3072,
+#       'local_dir': 'local-ann/my-image-index-02-lambda'}
+GROUND_TRUTH = None
+
+
+def format_metric(value, suffix: str = '') -> str:
+    """Format optional metric value"""
+    if value is None:
+        return 'n/a'
+    return f"{value:.4f}{suffix}" if isinstance(value, float) else f"{value}{suffix}"
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("Retrieval Evaluation")
+    print("=" * 60)
+
+    try:
+        queries = load_query_set(QUERY_SET_FILE)
+        print(f"\n  Query Set: {QUERY_SET_FILE} ({len(queries)} queries)")
+        print(f"  Top K: {TOP_K}")
+
+        results = []
+        for config in EVAL_CONFIGS:
+            print(f"\nEvaluating {config['name']}...")
+            result = evaluate_config(
+                config, queries, bedrock_client, s3vectors_client,
+                VECTOR_BUCKET, TOP_K, GROUND_TRUTH
+            )
+            results.append(result)
+
+            print(f"  Index: {result['index']} ({result['dimension']}-d, {result['backend']})")
+            print(f"  Queries evaluated: {result['queries']}")
+            print(f"  Recall@{TOP_K}: {format_metric(result['recall_at_k'])}")
+            print(f"  MRR: {format_metric(result['mrr'])}")
+            print(f"  Mean distance: {format_metric(result['mean_distance'])}")
+            print(f"  Latency p50/p99: {format_metric(result['latency_p50_ms'], ' ms')} / "
+                  f"{format_metric(result['latency_p99_ms'], ' ms')}")
+            print(f"  Bedrock cost per 1k queries: {format_metric(result['bedrock_cost_per_1k_queries_usd'], ' USD')}")
+
+        append_results(RESULTS_FILE, results)
+
+        print("\n" + "=" * 60)
+        print(f"✓ Evaluation Completed! Results appended to {RESULTS_FILE}")
+        print("=" * 60)
+        print(json.dumps(results, indent=2))
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
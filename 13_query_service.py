@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Run the text search service used by GUI-query.py and 02_query_text.py as a backend"""
+
+import asyncio
+
+from query_service import QueryService
+
+# Configuration
+REGION = 'us-east-1'
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+HOST = '127.0.0.1'
+PORT = 8765
+CACHE_TTL_SECONDS = 300  # How long identical queries are answered from cache
+CACHE_SIZE = 1024
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("Text Search Service")
+    print("=" * 60)
+
+    service = QueryService(REGION, VECTOR_BUCKET, CACHE_TTL_SECONDS, CACHE_SIZE)
+
+    print(f"\n  Vector Bucket: {VECTOR_BUCKET}")
+    print(f"  Listening on: http://{HOST}:{PORT}")
+    print(f"  Cache: {CACHE_SIZE} entries, TTL {CACHE_TTL_SECONDS}s")
+    print(f"  Stats: http://{HOST}:{PORT}/stats")
+
+    try:
+        asyncio.run(service.serve(HOST, PORT))
+    except KeyboardInterrupt:
+        print("\n✓ Service stopped")
+        print(f"  {service.stats}")
+
+
+if __name__ == '__main__':
+    main()
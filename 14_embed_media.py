@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Embed video and audio files in S3 with Nova MME segmented async embedding, one vector per segment"""
+
+import boto3
+import tempfile
+
+from media_embedding import (
+    AsyncJobTracker, LocalAsyncInvoker, OutputReader, embed_media, media_format
+)
+
+# AWS clients
+bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
+s3_client = boto3.client('s3', region_name='us-east-1')
+s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
+
+# Configuration
+MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
+EMBEDDING_DIMENSION = 3072
+SOURCE_BUCKET = 'nova-mme-demo-source-media'
+SOURCE_PREFIX = ''
+OUTPUT_S3_URI = 's3://nova-mme-demo-async-output/segments/'  # Async job results (Bedrock needs write access)
+VECTOR_BUCKET = 'my-nova-mme-demo-01'
+INDEX_NAME = 'my-media-index-01'
+SEGMENT_LENGTH_SECONDS = 15  # 1-30 seconds per segment
+MAX_IN_FLIGHT = 8  # Concurrent async jobs
+POLL_INTERVAL_SECONDS = 10
+JOBS_FILE = 'media_jobs.json'  # Re-run the script to resume
+
+# True = run the whole flow against a local stand-in for the async API, without
+# calling Bedrock or writing vectors (segments are printed instead)
+USE_LOCAL_STAND_IN = False
+
+
+def list_media(bucket: str, prefix: str):
+    """Yield S3 URIs of video and audio objects under a prefix"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if media_format(obj['Key']):
+                yield f"s3://{bucket}/{obj['Key']}"
+
+
+def run_local_stand_in():
+    """Exercise job tracking and segment parsing against LocalAsyncInvoker"""
+    sources = [
+        's3://local-demo/video/a.mp4',
+        's3://local-demo/video/b.mov',
+        's3://local-demo/audio/c.mp3',
+        's3://local-demo/audio/broken.wav'
+    ]
+    invoker = LocalAsyncInvoker(
+        durations={sources[0]: 95.0, sources[1]: 20.0, sources[2]: 42.0},
+        fail_uris=(sources[3],)
+    )
+
+    class PrintingVectors:
+        def put_vectors(self, vectorBucketName, indexName, vectors):
+            for vector in vectors:
+                metadata = vector['metadata']
+                print(f"    {metadata['s3_uri']} #{metadata['segment_index']} "
+                      f"{metadata['start_seconds']:.0f}-{metadata['end_seconds']:.0f}s "
+                      f"({len(vector['data']['float32'])}-d)")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        tracker = AsyncJobTracker(
+            invoker, output_dir, OutputReader(), max_in_flight=2, poll_interval=0.1
+        )
+        counts = embed_media(
+            tracker, PrintingVectors(), VECTOR_BUCKET, INDEX_NAME, sources, 256, SEGMENT_LENGTH_SECONDS
+        )
+    print(f"\n  Max jobs in flight: {invoker.max_in_flight}")
+    return counts
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("Nova MME Segmented Video/Audio Embedding")
+    print("=" * 60)
+
+    try:
+        if USE_LOCAL_STAND_IN:
+            print("\n  Using local stand-in for the async invoke API")
+            counts = run_local_stand_in()
+        else:
+            print(f"\n  Source: s3://{SOURCE_BUCKET}/{SOURCE_PREFIX}")
+            print(f"  Async Output: {OUTPUT_S3_URI}")
+            print(f"  Vector Bucket: {VECTOR_BUCKET}")
+            print(f"  Index: {INDEX_NAME} (dimension: {EMBEDDING_DIMENSION})")
+            print(f"  Segment Length: {SEGMENT_LENGTH_SECONDS}s, Max Jobs In Flight: {MAX_IN_FLIGHT}")
+            print(f"  Jobs File: {JOBS_FILE}\n")
+
+            tracker = AsyncJobTracker(
+                bedrock_client,
+                OUTPUT_S3_URI,
+                OutputReader(s3_client),
+                jobs_file=JOBS_FILE,
+                model_id=MODEL_ID,
+                max_in_flight=MAX_IN_FLIGHT,
+                poll_interval=POLL_INTERVAL_SECONDS
+            )
+            counts = embed_media(
+                tracker, s3vectors_client, VECTOR_BUCKET, INDEX_NAME,
+                list_media(SOURCE_BUCKET, SOURCE_PREFIX), EMBEDDING_DIMENSION, SEGMENT_LENGTH_SECONDS
+            )
+
+        print(f"\n✓ Jobs: {counts['submitted']} submitted, {counts['completed']} completed, "
+              f"{counts['failed']} failed, {counts['skipped']} already done")
+        print(f"✓ Segment vectors written: {counts['vectors']}")
+
+        print("\n" + "=" * 60)
+        print("✓ Media Embedding Completed!")
+        print("=" * 60)
+
+    except KeyboardInterrupt:
+        print("\n\n✗ Interrupted by user")
+        print(f"Job state has been saved to: {JOBS_FILE}")
+        print("You can safely re-run this script to continue")
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == '__main__':
+    main()
@@ -8,14 +8,28 @@ A macOS native-style GUI for searching images using text queries
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import boto3
 import json
 import base64
 from io import BytesIO
 from PIL import Image, ImageTk
+from botocore.exceptions import ClientError
 import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
+from client_registry import ClientRegistry
+from embedding_models import generate_text_embedding
+from federated_search import federated_query
+from index_config import resolve_index
+from knn_graph import KnnGraph
+from local_ann import LocalAnnIndex
+from query_service import search_via_service
+from rerank import MAX_TOP_K, query_with_rerank
+from stored_vectors import query_by_key
+from thumbnail_cache import ThumbnailCache, MemoryImageCache
+
 # Try to import mousewheel support for better scrolling on macOS
 try:
     import tkintermousewheel
@@ -25,14 +39,16 @@ except ImportError:
 
 class NovaImageSearchGUI:
     # Model configurations
+    # 'index' is an alias from index_aliases.json (or a physical index name),
+    # resolved on every search so a migration cutover takes effect immediately
     MODELS = {
         'amazon.nova-2-multimodal-embeddings-v1:0': {
             'dimension': 3072,
-            'index': 'my-image-index-02-lambda'
+            'index': 'nova-mme-images'
         },
         'twelvelabs.marengo-embed-3-0-v1:0': {
             'dimension': 512,
-            'index': 'my-image-index-03-tme3'
+            'index': 'marengo-3-images'
         }
     }
     
@@ -46,18 +62,70 @@ class NovaImageSearchGUI:
         self.default_model = 'amazon.nova-2-multimodal-embeddings-v1:0'
         self.embedding_dimension = self.MODELS[self.default_model]['dimension']
         
+        # Precomputed neighbour graphs (09_build_knn_graph.py), keyed by index name
+        self.knn_graph_root = 'knn-graph'
+        self.knn_graphs = {}
+        
+        # Local IVF-int8 indexes (10_local_ann.py), keyed by index name
+        self.local_ann_root = 'local-ann'
+        self.local_ann_indexes = {}
+        
         # Thumbnail size
         self.thumbnail_size = (360, 240)
         
-        # AWS clients (will be initialized on query)
+        # Thumbnails are fetched and decoded on a bounded pool and placed on the
+        # Tk main loop as they finish; a new search cancels the previous loads
+        self.thumbnail_workers = 8
+        self.thumbnail_executor = ThreadPoolExecutor(
+            max_workers=self.thumbnail_workers, thread_name_prefix='thumbnail'
+        )
+        self.thumbnail_futures = []
+        self.display_generation = 0
+        self.placeholder_photo = None
+        
+        # Resized thumbnails on local disk, shared across GUI sessions
+        self.thumbnail_cache = ThumbnailCache()
+        
+        # Tiles hold only thumbnails; full-resolution images are loaded on click
+        # (top results are prefetched) and kept in a memory-capped LRU
+        self.full_image_prefetch = 3
+        self.full_images = MemoryImageCache()
+        self.full_image_futures = {}
+        
+        # Virtualised results grid: only tiles in or near the viewport exist,
+        # and tiles scrolled out of range are recycled for other results
+        self.tile_width = 400
+        self.tile_height = 400
+        self.overscan_rows = 1
+        self.tile_pool = []
+        self.visible_results = []
+        self.scrollregion = None
+        self.last_scroll_position = None
+        self.layout_pending = False
+        self.recent_thumbnails = MemoryImageCache(64 * 1024 * 1024)
+        
+        # AWS clients, created once per region and shared by worker threads
+        self.clients = ClientRegistry()
         self.bedrock_client = None
         self.s3vectors_client = None
         self.s3_client = None
         
         # Results storage
         self.current_results = []
-        self.image_labels = []
-        self.results_container = None
+        
+        # Every search gets an ID; threads stop and results are dropped once a
+        # newer search has started (live search-as-you-type supersedes often)
+        self.query_id = 0
+        self.live_search_delay_ms = 400
+        self.live_search_min_chars = 3
+        self.live_search_after = None
+        self.last_live_query = None
+        
+        # Recent query embeddings (LRU), so retyping or deleting characters does not call
+        # Bedrock again; shared by live-search worker threads, hence the lock
+        self.embedding_cache = OrderedDict()
+        self.embedding_cache_size = 256
+        self.embedding_cache_lock = threading.Lock()
         
         # Setup UI
         self.setup_ui()
@@ -133,13 +201,26 @@ class NovaImageSearchGUI:
         topk_combo = ttk.Combobox(
             config_frame, 
             textvariable=self.topk_var, 
-            values=["5", "10"],
+            values=["5", "10", "50", str(MAX_TOP_K)],  # query_vectors returns at most MAX_TOP_K
             state="readonly",
             width=10
         )
         topk_combo.grid(row=row, column=1, sticky=tk.W, pady=5, padx=(10, 0))
         row += 1
         
+        # Re-rank (over-fetch Top K x N candidates, MMR + near-duplicate suppression)
+        ttk.Label(config_frame, text="Re-rank Over-fetch:").grid(row=row, column=0, sticky=tk.W, pady=5)
+        self.rerank_var = tk.StringVar(value="Off")
+        rerank_combo = ttk.Combobox(
+            config_frame,
+            textvariable=self.rerank_var,
+            values=["Off", "2", "4", "8"],
+            state="readonly",
+            width=10
+        )
+        rerank_combo.grid(row=row, column=1, sticky=tk.W, pady=5, padx=(10, 0))
+        row += 1
+        
         # Distance Threshold
         ttk.Label(config_frame, text="Distance Threshold:").grid(row=row, column=0, sticky=tk.W, pady=5)
         threshold_frame = ttk.Frame(config_frame)
@@ -155,6 +236,41 @@ class NovaImageSearchGUI:
             font=('Helvetica', 9), 
             foreground='gray'
         ).pack(side=tk.LEFT, padx=(5, 0))
+        row += 1
+        
+        # Federated search across all models
+        self.federated_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            config_frame,
+            text="Federated search (query all models concurrently and fuse results)",
+            variable=self.federated_var
+        ).grid(row=row, column=0, columnspan=2, sticky=tk.W, pady=5)
+        row += 1
+        
+        # Local approximate index instead of S3 Vectors query
+        self.local_ann_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            config_frame,
+            text="Search local ANN index when available (local-ann/<index name>)",
+            variable=self.local_ann_var
+        ).grid(row=row, column=0, columnspan=2, sticky=tk.W, pady=5)
+        row += 1
+        
+        # Query service (13_query_service.py) keeps clients warm and caches results
+        ttk.Label(config_frame, text="Query Service URL:").grid(row=row, column=0, sticky=tk.W, pady=5)
+        service_frame = ttk.Frame(config_frame)
+        service_frame.grid(row=row, column=1, sticky=(tk.W, tk.E), pady=5, padx=(10, 0))
+        
+        self.service_var = tk.StringVar(value="")
+        service_entry = ttk.Entry(service_frame, textvariable=self.service_var, width=30)
+        service_entry.pack(side=tk.LEFT)
+        
+        ttk.Label(
+            service_frame,
+            text="(e.g. http://127.0.0.1:8765, empty = call AWS directly)",
+            font=('Helvetica', 9),
+            foreground='gray'
+        ).pack(side=tk.LEFT, padx=(5, 0))
         
         # Query section
         query_frame = ttk.LabelFrame(main_frame, text="Search Query", padding="10")
@@ -167,6 +283,7 @@ class NovaImageSearchGUI:
         query_entry = ttk.Entry(query_frame, textvariable=self.query_var, font=('Helvetica', 12))
         query_entry.grid(row=1, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
         query_entry.bind('<Return>', lambda e: self.search_images())
+        query_entry.bind('<KeyRelease>', self.on_query_changed)
         
         # Search button
         self.search_button = ttk.Button(
@@ -182,23 +299,29 @@ class NovaImageSearchGUI:
         status_label = ttk.Label(query_frame, textvariable=self.status_var, foreground='gray')
         status_label.grid(row=3, column=0)
         
+        # Live search
+        self.live_search_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            query_frame,
+            text="Search as you type",
+            variable=self.live_search_var
+        ).grid(row=4, column=0, pady=(5, 0))
+        
         # Results section
         results_frame = ttk.LabelFrame(main_frame, text="Search Results", padding="10")
         results_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         main_frame.rowconfigure(3, weight=1)
         
-        # Create canvas with scrollbar for results
+        # Create canvas with scrollbar for results; tiles are canvas window items
+        # positioned by layout_tiles() on scroll and resize
         canvas = tk.Canvas(results_frame, bg='white')
         scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=canvas.yview)
-        self.results_container = ttk.Frame(canvas)
+        canvas.configure(yscrollcommand=self.on_results_scrolled)
+        canvas.bind("<Configure>", self.schedule_layout)
         
-        self.results_container.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=self.results_container, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
+        # Message shown instead of results (e.g. no results)
+        self.message_label = ttk.Label(canvas, font=('Helvetica', 14), justify=tk.CENTER, background='white')
+        self.message_window = canvas.create_window((10, 20), window=self.message_label, anchor="nw", state='hidden')
         
         canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
@@ -207,17 +330,18 @@ class NovaImageSearchGUI:
         
         # Store canvas reference for mouse wheel binding
         self.results_canvas = canvas
+        self.results_scrollbar = scrollbar
         
         # Setup mouse wheel scrolling
         if tkintermousewheel:
             # Use tkintermousewheel for better macOS support
-            tkintermousewheel.enable_mousewheel(canvas, self.results_container)
+            tkintermousewheel.enable_mousewheel(canvas, self.message_label)
         else:
             # Fallback to manual binding
             canvas.bind("<MouseWheel>", self._on_canvas_mousewheel)
             canvas.bind("<Button-4>", self._on_canvas_mousewheel)
             canvas.bind("<Button-5>", self._on_canvas_mousewheel)
-            self._bind_mousewheel_recursive(self.results_container)
+            self._bind_mousewheel_recursive(self.message_label)
         
         # Add keyboard shortcuts for scrolling
         self.root.bind("<Up>", lambda e: self._scroll_results(-3))
@@ -270,131 +394,154 @@ class NovaImageSearchGUI:
             self.index_var.set(self.MODELS[model_id]['index'])
             self.embedding_dimension = self.MODELS[model_id]['dimension']
     
-    def initialize_clients(self):
-        """Initialize AWS clients with current region"""
-        region = self.region_var.get()
-        self.bedrock_client = boto3.client('bedrock-runtime', region_name=region)
-        self.s3vectors_client = boto3.client('s3vectors', region_name=region)
-        self.s3_client = boto3.client('s3', region_name=region)
-    
-    def generate_text_embedding(self, text: str) -> List[float]:
-        """Generate embedding for text using selected model"""
-        model_id = self.model_var.get()
-        
-        if model_id == 'amazon.nova-2-multimodal-embeddings-v1:0':
-            return self._generate_nova_embedding(text)
-        elif model_id == 'twelvelabs.marengo-embed-3-0-v1:0':
-            return self._generate_tme3_embedding(text)
-        else:
-            raise ValueError(f"Unknown model: {model_id}")
-    
-    def _generate_nova_embedding(self, text: str) -> List[float]:
-        """Generate embedding using Amazon Nova MME"""
-        model_input = {
-            "taskType": "SINGLE_EMBEDDING",
-            "singleEmbeddingParams": {
-                "embeddingPurpose": "IMAGE_RETRIEVAL",
-                "embeddingDimension": self.embedding_dimension,
-                "text": {
-                    "truncationMode": "END",
-                    "value": text
-                }
-            }
-        }
+    def initialize_clients(self) -> str:
+        """Get AWS clients for the current region, reusing them unless the region changed"""
+        region = self.region_var.get().strip()
+        services = ('bedrock-runtime', 's3vectors', 's3')
+        reused = all((region, service) in self.clients for service in services)
         
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_var.get(),
-            body=json.dumps(model_input)
-        )
+        start_time = time.perf_counter()
+        self.bedrock_client = self.clients.get('bedrock-runtime', region)
+        self.s3vectors_client = self.clients.get('s3vectors', region)
+        self.s3_client = self.clients.get('s3', region)
+        elapsed = time.perf_counter() - start_time
         
-        result = json.loads(response['body'].read())
-        embedding = result.get('embeddings', [{}])[0].get('embedding', [])
-        
-        return embedding
+        return "clients reused" if reused else f"clients created in {elapsed * 1000:.0f} ms"
     
-    def _generate_tme3_embedding(self, text: str) -> List[float]:
-        """Generate embedding using Twelve Labs Marengo Embed 3.0"""
-        model_input = {
-            "inputType": "text",
-            "text": {
-                "inputText": text
-            }
-        }
+    def generate_text_embedding(self, text: str) -> List[float]:
+        """Generate embedding for text using selected model (recent queries are cached)"""
+        cache_key = (self.model_var.get(), text, self.embedding_dimension)
+        with self.embedding_cache_lock:
+            embedding = self.embedding_cache.get(cache_key)
+            if embedding is not None:
+                self.embedding_cache.move_to_end(cache_key)
+                return embedding
         
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_var.get(),
-            body=json.dumps(model_input)
+        # Bedrock is called outside the lock so other searches are not held up
+        embedding = generate_text_embedding(
+            self.bedrock_client, self.model_var.get(), text, self.embedding_dimension
         )
-        
-        result = json.loads(response['body'].read())
-        
-        # Parse TME3 response format
-        if isinstance(result, dict) and 'data' in result:
-            data_list = result['data']
-            if isinstance(data_list, list) and len(data_list) > 0:
-                first_item = data_list[0]
-                if isinstance(first_item, dict) and 'embedding' in first_item:
-                    embedding = first_item['embedding']
-                else:
-                    raise ValueError(f"Unexpected data item format: {first_item}")
-            else:
-                raise ValueError("Empty data list in response")
-        elif isinstance(result, dict) and 'embedding' in result:
-            embedding_list = result['embedding']
-            if isinstance(embedding_list, list) and len(embedding_list) > 0:
-                first_item = embedding_list[0]
-                if isinstance(first_item, dict) and 'embedding' in first_item:
-                    embedding = first_item['embedding']
-                elif isinstance(first_item, (int, float)):
-                    embedding = embedding_list
-                else:
-                    raise ValueError(f"Unexpected embedding item format: {first_item}")
-            else:
-                embedding = embedding_list
-        else:
-            raise ValueError(f"Unexpected response format: {result}")
-        
+        with self.embedding_cache_lock:
+            self.embedding_cache[cache_key] = embedding
+            self.embedding_cache.move_to_end(cache_key)
+            while len(self.embedding_cache) > self.embedding_cache_size:
+                self.embedding_cache.popitem(last=False)
         return embedding
     
-    def query_vectors(self, query_embedding: List[float]) -> List[Dict[str, Any]]:
+    def resolve_index(self) -> Dict[str, Any]:
+        """Resolve index field (alias or physical name) and update embedding dimension"""
+        model_id = self.model_var.get()
+        resolved = resolve_index(self.index_var.get().strip(), self.MODELS[model_id]['dimension'])
+        self.embedding_dimension = resolved['dimension']
+        return resolved
+    
+    def query_vectors(self, query_embedding: List[float], index_name: str = None) -> List[Dict[str, Any]]:
         """Query S3 Vectors for similar vectors"""
         response = self.s3vectors_client.query_vectors(
             vectorBucketName=self.bucket_var.get(),
-            indexName=self.index_var.get(),
+            indexName=index_name or self.index_var.get(),
             queryVector={'float32': query_embedding},
-            topK=int(self.topk_var.get()),
+            topK=self.get_top_k(MAX_TOP_K),
             returnDistance=True,
             returnMetadata=True
         )
         
         return response.get('vectors', [])
     
-    def load_image_from_s3(self, s3_uri: str, thumbnail_size=None) -> tuple:
-        """Load image from S3 and create thumbnail"""
+    def parse_s3_uri(self, s3_uri: str) -> tuple:
+        """Split an S3 URI into (bucket, key), or (None, None) if it is not one"""
+        if not s3_uri.startswith('s3://'):
+            return None, None
+        parts = s3_uri[5:].split('/', 1)
+        return parts[0], parts[1] if len(parts) > 1 else ''
+    
+    def load_image_from_s3(self, s3_uri: str, thumbnail_size=None):
+        """Load thumbnail for an S3 image (from the thumbnail cache when still valid)"""
         if thumbnail_size is None:
             thumbnail_size = self.thumbnail_size
             
         # Parse S3 URI
-        if s3_uri.startswith('s3://'):
-            path = s3_uri[5:]
-            parts = path.split('/', 1)
-            bucket = parts[0]
-            key = parts[1] if len(parts) > 1 else ''
-        else:
-            return None, None
+        bucket, key = self.parse_s3_uri(s3_uri)
+        if bucket is None:
+            return None
         
-        # Download image from S3
-        response = self.s3_client.get_object(Bucket=bucket, Key=key)
+        # One conditional GET: 304 means the cached thumbnail is still current
+        size_tag = f"{thumbnail_size[0]}x{thumbnail_size[1]}"
+        cached = self.thumbnail_cache.get(s3_uri, size_tag)
+        params = {'IfNoneMatch': cached[0]} if cached else {}
+        try:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key, **params)
+        except ClientError as e:
+            if cached and e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+                self.thumbnail_cache.touch(s3_uri, size_tag)
+                return cached[1]
+            raise
         image_data = response['Body'].read()
         
-        # Create PIL Image
-        original_image = Image.open(BytesIO(image_data))
-        
-        # Create thumbnail
-        thumbnail = original_image.copy()
+        # Let the JPEG decoder scale down by up to 8x while decoding (draft mode),
+        # instead of decoding every pixel of a large original; no-op for other formats
+        thumbnail = Image.open(BytesIO(image_data))
+        thumbnail.draft('RGB', (thumbnail_size[0] * 2, thumbnail_size[1] * 2))
         thumbnail.thumbnail(thumbnail_size, Image.Resampling.LANCZOS)
+        self.thumbnail_cache.put(s3_uri, size_tag, response['ETag'], thumbnail)
+        
+        return thumbnail
+    
+    def load_full_image(self, s3_uri: str):
+        """
+        Download and decode the original image, keeping it in the memory-capped cache
+        Paths that are not s3:// URIs (files ingested from a local directory) are
+        opened from the local filesystem
+        """
+        image = self.full_images.get(s3_uri)
+        if image is not None:
+            return image
         
-        return original_image, thumbnail
+        bucket, key = self.parse_s3_uri(s3_uri)
+        if bucket is None:
+            image = Image.open(s3_uri)
+        else:
+            response = self.s3_client.get_object(Bucket=bucket, Key=key)
+            image = Image.open(BytesIO(response['Body'].read()))
+        image.load()
+        self.full_images.put(s3_uri, image)
+        return image
+    
+    def fetch_full_image(self, s3_uri: str):
+        """Start (or join) a background load of the original image, returning its future"""
+        future = self.full_image_futures.get(s3_uri)
+        if future is None or future.cancelled():
+            future = self.thumbnail_executor.submit(self.load_full_image, s3_uri)
+            self.full_image_futures[s3_uri] = future
+            future.add_done_callback(lambda _, uri=s3_uri: self.full_image_futures.pop(uri, None))
+        return future
+    
+    def open_full_image(self, s3_uri: str):
+        """Show the original image once loaded (click handler, Tk main loop)"""
+        image = self.full_images.get(s3_uri)
+        if image is not None:
+            self.show_full_image(image, s3_uri)
+            return
+        
+        self.status_var.set(f"Loading full image {s3_uri}...")
+        future = self.fetch_full_image(s3_uri)
+        future.add_done_callback(
+            lambda f, uri=s3_uri: self.root.after(0, self.on_full_image_loaded, uri, f)
+        )
+    
+    def on_full_image_loaded(self, s3_uri: str, future):
+        """Open the window for a loaded original image (Tk main loop)"""
+        if future.cancelled():
+            # The click joined a prefetch that a newer search cancelled: load it again
+            self.open_full_image(s3_uri)
+            return
+        try:
+            image = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to load image: {str(e)}")
+            return
+        self.status_var.set(f"✓ Loaded {s3_uri}")
+        self.show_full_image(image, s3_uri)
     
     def show_full_image(self, original_image, title):
         """Show full-size image in a new window"""
@@ -418,27 +565,225 @@ class NovaImageSearchGUI:
         
         # Calculate columns (thumbnail width + padding)
         # 360 (thumbnail) + 20 (padding left/right) + 20 (frame padding) = 400
-        item_width = 400
-        columns = max(2, window_width // item_width)  # At least 2 columns
+        columns = max(2, window_width // self.tile_width)  # At least 2 columns
         
         return columns
     
+    def get_top_k(self, limit: int = None) -> int:
+        """Selected Top K, optionally capped (e.g. at the query_vectors limit)"""
+        top_k = int(self.topk_var.get())
+        return min(top_k, limit) if limit else top_k
+    
+    def cancel_thumbnail_loads(self):
+        """Cancel pending thumbnail loads and ignore any still running"""
+        for future in self.thumbnail_futures:
+            future.cancel()
+        self.thumbnail_futures = []
+        self.display_generation += 1
+    
+    def load_thumbnail(self, thumbnail_uri: str):
+        """Thumbnail from this session's memory (tiles scrolled back into view), else S3 or disk cache"""
+        thumbnail = self.recent_thumbnails.get(thumbnail_uri)
+        if thumbnail is None:
+            thumbnail = self.load_image_from_s3(thumbnail_uri)
+            if thumbnail is not None:
+                self.recent_thumbnails.put(thumbnail_uri, thumbnail)
+        return thumbnail
+    
+    def place_thumbnail(self, tile: Dict[str, Any], token: int, future):
+        """Put a loaded thumbnail into its tile unless the tile was recycled (Tk main loop)"""
+        if tile['token'] != token or future.cancelled():
+            return
+        image_label = tile['image']
+        
+        try:
+            thumbnail = future.result()
+        except Exception as e:
+            image_label.config(image='', text=f"Error: {str(e)}")
+            return
+        
+        if thumbnail is None:
+            image_label.config(image='', text="Failed to load image")
+            return
+        
+        # Convert to PhotoImage
+        photo = ImageTk.PhotoImage(thumbnail)
+        image_label.config(image=photo, text='')
+        image_label.image = photo  # Keep a reference
+    
+    def create_tile(self) -> Dict[str, Any]:
+        """Create a reusable result tile as a canvas window item"""
+        frame = ttk.Frame(self.results_canvas, relief='solid', borderwidth=1, padding=10)
+        frame.columnconfigure(0, weight=1)
+        
+        info_label = ttk.Label(frame, font=('Helvetica', 12, 'bold'))
+        info_label.grid(row=0, column=0, pady=(0, 5))
+        
+        image_label = tk.Label(frame, compound='center', wraplength=340, cursor="hand2")
+        image_label.grid(row=1, column=0, pady=(0, 5))
+        
+        uri_label = ttk.Label(frame, font=('Helvetica', 9), foreground='gray', wraplength=340)
+        uri_label.grid(row=2, column=0, pady=(5, 0))
+        
+        button = ttk.Button(frame, text="More like this")
+        button.grid(row=3, column=0, pady=(5, 0))
+        
+        window = self.results_canvas.create_window(
+            0, 0, window=frame, anchor='nw',
+            width=self.tile_width - 20, height=self.tile_height - 20
+        )
+        # Bound even with tkintermousewheel, which only covers widgets existing at startup
+        self._bind_mousewheel_recursive(frame)
+        
+        tile = {
+            'frame': frame, 'window': window, 'info': info_label, 'image': image_label,
+            'uri': uri_label, 'button': button,
+            'index': None, 'generation': None, 'token': 0, 'future': None
+        }
+        self.tile_pool.append(tile)
+        return tile
+    
+    def bind_tile(self, tile: Dict[str, Any], index: int):
+        """Show result number index in a (possibly recycled) tile and start loading its thumbnail"""
+        result = self.visible_results[index]
+        
+        # Extract metadata
+        metadata = result.get('metadata', {})
+        s3_uri = metadata.get('s3_uri') or metadata.get('full_path', '')
+        distance = result.get('distance', 'N/A')
+        
+        # Result info
+        if 'fused_score' in result:
+            info_text = f"Result {index + 1}\nFused Score: {result['fused_score']:.4f}"
+        elif isinstance(distance, float):
+            info_text = f"Result {index + 1}\nDistance: {distance:.4f}"
+        else:
+            info_text = f"Result {index + 1}"
+        tile['info'].config(text=info_text)
+        tile['uri'].config(text=s3_uri)
+        
+        # "More like this" reuses the stored embedding of this vector
+        vector_key = result.get('key')
+        if vector_key:
+            tile['button'].config(command=lambda k=vector_key: self.more_like_this(k))
+            tile['button'].grid()
+        else:
+            tile['button'].grid_remove()
+        
+        # Placeholder until the thumbnail is loaded; click opens the original
+        tile['image'].config(image=self.placeholder_photo, text="Loading...")
+        tile['image'].image = None
+        tile['image'].bind("<Button-1>", lambda e, uri=s3_uri: self.open_full_image(uri))
+        
+        if tile['future']:
+            tile['future'].cancel()
+        tile['index'] = index
+        tile['generation'] = self.display_generation
+        tile['token'] += 1
+        
+        # Pre-sized derivative written at ingest time, when present
+        thumbnail_uri = metadata.get('thumbnail_uri') or s3_uri
+        future = self.thumbnail_executor.submit(self.load_thumbnail, thumbnail_uri)
+        future.add_done_callback(
+            lambda f, t=tile, token=tile['token']: self.root.after(0, self.place_thumbnail, t, token, f)
+        )
+        tile['future'] = future
+        self.thumbnail_futures = [f for f in self.thumbnail_futures if not f.done()]
+        self.thumbnail_futures.append(future)
+    
+    def release_tile(self, tile: Dict[str, Any]):
+        """Hide a tile that scrolled out of range and drop its image"""
+        if tile['future']:
+            tile['future'].cancel()
+        tile['future'] = None
+        tile['index'] = None
+        tile['token'] += 1
+        tile['image'].config(image=self.placeholder_photo)
+        tile['image'].image = None
+        self.results_canvas.itemconfigure(tile['window'], state='hidden')
+    
+    def on_results_scrolled(self, first, last):
+        """Canvas scroll callback: update scrollbar and lay out tiles for the new viewport"""
+        self.results_scrollbar.set(first, last)
+        if (first, last) != self.last_scroll_position:
+            self.last_scroll_position = (first, last)
+            self.schedule_layout()
+    
+    def schedule_layout(self, event=None):
+        """Coalesce scroll/resize events into one layout pass when Tk is idle"""
+        if not self.layout_pending:
+            self.layout_pending = True
+            self.root.after_idle(self.layout_tiles)
+    
+    def layout_tiles(self):
+        """Instantiate tiles only for rows in or near the viewport, recycling the rest"""
+        self.layout_pending = False
+        canvas = self.results_canvas
+        count = len(self.visible_results)
+        columns = self.calculate_columns()
+        rows = -(-count // columns)
+        
+        scrollregion = (0, 0, columns * self.tile_width, rows * self.tile_height)
+        if scrollregion != self.scrollregion:
+            self.scrollregion = scrollregion
+            canvas.configure(scrollregion=scrollregion)
+        
+        top = canvas.canvasy(0)
+        first_row = max(0, int(top // self.tile_height) - self.overscan_rows)
+        last_row = min(rows, int((top + canvas.winfo_height()) // self.tile_height) + 1 + self.overscan_rows)
+        wanted = range(first_row * columns, min(count, last_row * columns))
+        
+        # Keep tiles already showing a wanted result of the current search, recycle the others
+        bound, free = {}, []
+        for tile in self.tile_pool:
+            if tile['index'] in wanted and tile['generation'] == self.display_generation:
+                bound[tile['index']] = tile
+            else:
+                free.append(tile)
+        
+        shown = []
+        for index in wanted:
+            tile = bound.get(index)
+            if tile is None:
+                tile = free.pop() if free else self.create_tile()
+                self.bind_tile(tile, index)
+            row, col = divmod(index, columns)
+            canvas.coords(tile['window'], col * self.tile_width + 10, row * self.tile_height + 10)
+            canvas.itemconfigure(tile['window'], state='normal')
+            shown.append(tile)
+        
+        for tile in free:
+            if tile['index'] is not None:
+                self.release_tile(tile)
+        
+        # Grow the row height to fit the tallest tile (font size depends on display scaling)
+        needed = max((tile['frame'].winfo_reqheight() for tile in shown), default=0) + 20
+        if needed > self.tile_height:
+            self.tile_height = needed
+            for tile in self.tile_pool:
+                canvas.itemconfigure(tile['window'], height=self.tile_height - 20)
+            self.schedule_layout()
+    
+    def show_message(self, text: str):
+        """Replace results with a message"""
+        self.visible_results = []
+        self.layout_tiles()
+        self.message_label.config(text=text)
+        self.results_canvas.itemconfigure(self.message_window, state='normal')
+    
     def display_results(self, results: List[Dict[str, Any]]):
-        """Display search results with images"""
-        # Store results for potential re-layout
+        """Display search results in the virtualised grid (Tk main loop only)"""
+        # Store results for re-layout on scroll and resize
         self.current_results = results
         
-        # Clear previous results
-        for widget in self.results_container.winfo_children():
-            widget.destroy()
+        # Stop loading thumbnails of the previous results
+        self.cancel_thumbnail_loads()
+        if self.placeholder_photo is None:
+            self.placeholder_photo = ImageTk.PhotoImage(Image.new('RGB', self.thumbnail_size, '#eeeeee'))
+        self.results_canvas.itemconfigure(self.message_window, state='hidden')
         
         if not results:
-            no_results = ttk.Label(
-                self.results_container, 
-                text="No results found", 
-                font=('Helvetica', 14)
-            )
-            no_results.grid(row=0, column=0, pady=20)
+            self.show_message("No results found")
             return
         
         # Filter results by distance threshold
@@ -450,121 +795,272 @@ class NovaImageSearchGUI:
         filtered_results = []
         for result in results:
             distance = result.get('distance')
-            if distance is not None and distance <= threshold:
+            if 'fused_score' in result:
+                # Distances of different models are not comparable, keep fused results
+                filtered_results.append(result)
+            elif distance is not None and distance <= threshold:
                 filtered_results.append(result)
         
         if not filtered_results:
-            no_results = ttk.Label(
-                self.results_container, 
-                text=f"No results found within distance threshold {threshold}\n(Try increasing the threshold value)", 
-                font=('Helvetica', 14),
-                justify=tk.CENTER
+            self.show_message(
+                f"No results found within distance threshold {threshold}\n(Try increasing the threshold value)"
             )
-            no_results.grid(row=0, column=0, pady=20)
             return
         
-        # Calculate columns based on window width
-        columns = self.calculate_columns()
+        self.visible_results = filtered_results
+        self.results_canvas.yview_moveto(0)
+        self.layout_tiles()
         
-        # Display filtered results in a responsive grid
-        for idx, result in enumerate(filtered_results):
-            row = idx // columns
-            col = idx % columns
-            
-            # Create frame for each result
-            result_frame = ttk.Frame(self.results_container, relief='solid', borderwidth=1, padding=10)
-            result_frame.grid(row=row, column=col, padx=10, pady=10, sticky=(tk.W, tk.E, tk.N, tk.S))
-            
-            # Extract metadata
-            metadata = result.get('metadata', {})
-            s3_uri = metadata.get('s3_uri') or metadata.get('full_path', '')
-            distance = result.get('distance', 'N/A')
-            
-            # Result info
-            info_text = f"Result {idx + 1}\nDistance: {distance:.4f}" if isinstance(distance, float) else f"Result {idx + 1}"
-            info_label = ttk.Label(result_frame, text=info_text, font=('Helvetica', 12, 'bold'))
-            info_label.grid(row=0, column=0, pady=(0, 5))
-            
-            # Load and display image
-            try:
-                original_image, thumbnail = self.load_image_from_s3(s3_uri)
-                
-                if thumbnail:
-                    # Convert to PhotoImage
-                    photo = ImageTk.PhotoImage(thumbnail)
-                    
-                    # Create clickable image label
-                    image_label = tk.Label(result_frame, image=photo, cursor="hand2")
-                    image_label.image = photo  # Keep a reference
-                    image_label.grid(row=1, column=0, pady=(0, 5))
-                    
-                    # Bind click event to show full image
-                    image_label.bind(
-                        "<Button-1>", 
-                        lambda e, img=original_image, uri=s3_uri: self.show_full_image(img, uri)
-                    )
-                else:
-                    error_label = ttk.Label(result_frame, text="Failed to load image")
-                    error_label.grid(row=1, column=0)
-            
-            except Exception as e:
-                error_label = ttk.Label(result_frame, text=f"Error: {str(e)}")
-                error_label.grid(row=1, column=0)
-            
-            # Display S3 URI
-            uri_label = ttk.Label(
-                result_frame, 
-                text=s3_uri, 
-                font=('Helvetica', 9),
-                foreground='gray',
-                wraplength=340
-            )
-            uri_label.grid(row=2, column=0, pady=(5, 0))
+        # Prefetch originals of the top results; submitted after layout_tiles()
+        # so they queue behind the visible thumbnails on the shared pool
+        for result in filtered_results[:self.full_image_prefetch]:
+            s3_uri = result.get('metadata', {}).get('s3_uri', '')
+            if s3_uri.startswith('s3://'):
+                self.thumbnail_futures.append(self.fetch_full_image(s3_uri))
+    
+    def is_current(self, query_id: int) -> bool:
+        """Whether no newer search has started since query_id"""
+        return query_id == self.query_id
     
-    def search_images_thread(self):
+    def display_current_results(self, query_id: int, results: List[Dict[str, Any]]):
+        """Display results unless their search has been superseded (Tk main loop)"""
+        if self.is_current(query_id):
+            self.display_results(results)
+    
+    def search_images_thread(self, query_id: int, query_text: str):
         """Search images in a separate thread"""
         try:
             # Update status
             self.status_var.set("Initializing AWS clients...")
-            self.initialize_clients()
+            search_start = time.perf_counter()
+            client_note = self.initialize_clients()
             
-            # Get query text
-            query_text = self.query_var.get().strip()
-            if not query_text:
-                messagebox.showwarning("Warning", "Please enter search text")
-                self.status_var.set("Ready")
-                self.search_button.config(state='normal')
+            if self.federated_var.get():
+                self.federated_search(query_id, query_text, client_note)
+                return
+            
+            # Resolve index alias to the current physical index
+            index = self.resolve_index()
+            
+            service_url = self.service_var.get().strip()
+            local_index = self.get_local_ann_index(index['index']) if self.local_ann_var.get() else None
+            if service_url and not local_index:
+                self.status_var.set(f"Searching through query service for: '{query_text}'...")
+                response = search_via_service(
+                    service_url,
+                    index=self.index_var.get().strip(),
+                    query=query_text,
+                    top_k=self.get_top_k(MAX_TOP_K),
+                    model_id=self.model_var.get(),
+                    dimension=index['dimension']
+                )
+                results = response['results']
+                timings = response['timings']
+                rerank_note = " (query service, cached)" if response['cached'] else (
+                    f" (query service: embedding {timings['embed_seconds'] * 1000:.0f} ms, "
+                    f"query {timings['query_seconds'] * 1000:.0f} ms)"
+                )
+                search_ms = (time.perf_counter() - search_start) * 1000
+                if not self.is_current(query_id):
+                    return
+                
+                self.status_var.set(f"Found {len(results)} results. Loading images...")
+                self.root.after(0, self.display_current_results, query_id, results)
+                self.status_var.set(
+                    f"✓ Search completed! Found {len(results)} results in {search_ms:.0f} ms"
+                    f"{rerank_note} ({client_note})"
+                )
                 return
             
             # Generate embedding
             self.status_var.set(f"Generating embedding for: '{query_text}'...")
             embedding = self.generate_text_embedding(query_text)
+            if not self.is_current(query_id):
+                return
             
             # Query vectors
-            self.status_var.set("Searching for similar images...")
-            results = self.query_vectors(embedding)
+            self.status_var.set(f"Searching for similar images in {index['index']}...")
+            rerank_note = ""
+            if local_index:
+                start_time = time.time()
+                results = local_index.search(embedding, self.get_top_k())
+                rerank_note = f" (local ANN index, {(time.time() - start_time) * 1000:.1f} ms)"
+            elif self.rerank_var.get() != "Off":
+                response = query_with_rerank(
+                    self.s3vectors_client,
+                    vector_bucket=self.bucket_var.get(),
+                    index_name=index['index'],
+                    query_embedding=embedding,
+                    top_k=self.get_top_k(MAX_TOP_K),
+                    overfetch=int(self.rerank_var.get())
+                )
+                results = response['results']
+                rerank_note = (
+                    f" (re-ranked {response['candidates']} candidates, "
+                    f"+{response['timings']['extra_seconds'] * 1000:.0f} ms)"
+                )
+            else:
+                results = self.query_vectors(embedding, index['index'])
+            search_ms = (time.perf_counter() - search_start) * 1000
+            if not self.is_current(query_id):
+                return
             
             # Display results
             self.status_var.set(f"Found {len(results)} results. Loading images...")
-            self.display_results(results)
+            self.root.after(0, self.display_current_results, query_id, results)
             
             # Update status
-            self.status_var.set(f"✓ Search completed! Found {len(results)} results")
+            self.status_var.set(
+                f"✓ Search completed! Found {len(results)} results in {search_ms:.0f} ms"
+                f"{rerank_note} ({client_note})"
+            )
             
         except Exception as e:
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
-            self.status_var.set("Error occurred")
+            if self.is_current(query_id):
+                messagebox.showerror("Error", f"Search failed: {str(e)}")
+                self.status_var.set("Error occurred")
         
         finally:
-            self.search_button.config(state='normal')
+            # The latest search re-enables the button (superseded ones may finish later)
+            if self.is_current(query_id):
+                self.search_button.config(state='normal')
+    
+    def federated_search(self, query_id: int, query_text: str, client_note: str = ""):
+        """Query every configured model/index concurrently and display fused results"""
+        self.status_var.set(f"Federated search for: '{query_text}'...")
+        legs = [
+            {'model_id': model_id, 'index': config['index'], 'dimension': config['dimension']}
+            for model_id, config in self.MODELS.items()
+        ]
+        response = federated_query(
+            self.bedrock_client,
+            self.s3vectors_client,
+            vector_bucket=self.bucket_var.get(),
+            legs=legs,
+            text=query_text,
+            top_k=self.get_top_k(MAX_TOP_K)
+        )
+        results = response['results']
+        if not self.is_current(query_id):
+            return
+        
+        self.status_var.set(f"Found {len(results)} fused results. Loading images...")
+        self.root.after(0, self.display_current_results, query_id, results)
+        
+        leg_times = ", ".join(
+            f"{leg['index']} {leg['total_seconds'] * 1000:.0f} ms" for leg in response['legs']
+        )
+        self.status_var.set(
+            f"✓ Federated search completed! {len(results)} results in "
+            f"{response['total_seconds'] * 1000:.0f} ms ({leg_times}; {client_note})"
+        )
+    
+    def get_local_ann_index(self, index_name: str):
+        """Load (once) the local ANN index for an index, if one exists"""
+        if index_name not in self.local_ann_indexes:
+            self.local_ann_indexes[index_name] = LocalAnnIndex.load_if_exists(
+                f"{self.local_ann_root}/{index_name}"
+            )
+        return self.local_ann_indexes[index_name]
+    
+    def get_knn_graph(self, index_name: str):
+        """Load (once) the precomputed kNN graph for an index, if one exists"""
+        if index_name not in self.knn_graphs:
+            self.knn_graphs[index_name] = KnnGraph.load_if_exists(f"{self.knn_graph_root}/{index_name}")
+        return self.knn_graphs[index_name]
+    
+    def more_like_this_thread(self, query_id: int, vector_key: str):
+        """Search with the stored vector of an existing result in a separate thread"""
+        try:
+            start_time = time.time()
+            client_note = self.initialize_clients()
+            index = self.resolve_index()
+            
+            self.status_var.set(f"Finding images similar to {vector_key}...")
+            graph = self.get_knn_graph(index['index'])
+            if graph and vector_key in graph:
+                results = graph.related(vector_key, self.get_top_k())
+                source = "local kNN graph"
+            else:
+                results = query_by_key(
+                    self.s3vectors_client,
+                    vector_bucket=self.bucket_var.get(),
+                    index_name=index['index'],
+                    key=vector_key,
+                    top_k=self.get_top_k(MAX_TOP_K - 1)
+                )
+                source = "no embedding call"
+            elapsed = time.time() - start_time
+            if not self.is_current(query_id):
+                return
+            
+            self.status_var.set(f"Found {len(results)} similar results. Loading images...")
+            self.root.after(0, self.display_current_results, query_id, results)
+            
+            self.status_var.set(
+                f"✓ More like this: {len(results)} results in {elapsed * 1000:.0f} ms ({source}, {client_note})"
+            )
+        
+        except Exception as e:
+            if self.is_current(query_id):
+                messagebox.showerror("Error", f"Search failed: {str(e)}")
+                self.status_var.set("Error occurred")
+        
+        finally:
+            # The latest search re-enables the button (superseded ones may finish later)
+            if self.is_current(query_id):
+                self.search_button.config(state='normal')
+    
+    def new_query_id(self) -> int:
+        """Start a new search: supersede running searches and their thumbnail loads"""
+        self.query_id += 1
+        self.cancel_thumbnail_loads()
+        return self.query_id
+    
+    def more_like_this(self, vector_key: str):
+        """Start a similar-items search for a result"""
+        query_id = self.new_query_id()
+        self.search_button.config(state='disabled')
+        thread = threading.Thread(target=self.more_like_this_thread, args=(query_id, vector_key), daemon=True)
+        thread.start()
+    
+    def on_query_changed(self, event=None):
+        """Debounce keystrokes in live search mode"""
+        if not self.live_search_var.get():
+            return
+        if self.live_search_after is not None:
+            self.root.after_cancel(self.live_search_after)
+        self.live_search_after = self.root.after(self.live_search_delay_ms, self.live_search)
+    
+    def live_search(self):
+        """Search once typing has paused, skipping short or unchanged queries"""
+        self.live_search_after = None
+        query_text = self.query_var.get().strip()
+        if len(query_text) < self.live_search_min_chars or query_text == self.last_live_query:
+            return
+        self.last_live_query = query_text
+        
+        # Button stays enabled, so a newer query can start while this one runs
+        query_id = self.new_query_id()
+        thread = threading.Thread(target=self.search_images_thread, args=(query_id, query_text), daemon=True)
+        thread.start()
     
     def search_images(self):
         """Start image search"""
+        query_text = self.query_var.get().strip()
+        if not query_text:
+            messagebox.showwarning("Warning", "Please enter search text")
+            return
+        
+        # A new search supersedes running ones and thumbnails still loading
+        query_id = self.new_query_id()
+        self.last_live_query = query_text
+        
         # Disable search button
         self.search_button.config(state='disabled')
         
         # Run search in separate thread to avoid blocking UI
-        thread = threading.Thread(target=self.search_images_thread, daemon=True)
+        thread = threading.Thread(target=self.search_images_thread, args=(query_id, query_text), daemon=True)
         thread.start()
 
 
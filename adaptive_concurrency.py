@@ -0,0 +1,149 @@
+"""
+Adaptive (AIMD) concurrency control per AWS service
+Each service (Bedrock, S3 Vectors) gets an in-flight limit that grows
+additively while calls succeed (about +1 per limit's worth of successful
+calls made while the limit was reached) and is cut multiplicatively when a
+call is throttled, the way TCP congestion control finds the available
+bandwidth. Only one cut is made per round: throttled calls that started
+before the last cut do not cut again. Callers block in
+acquire() while the limit is reached, so a burst of workers backs off
+instead of turning throttling into failures; throttled calls are retried
+with jittered backoff. Current limit, in-flight count and recent throttle
+rate are exposed by metrics().
+
+Only the standard library is used, so the module can be packaged with the
+Lambda function as-is.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Callable
+
+from vector_writer import is_throttling_error, backoff_delay
+
+INITIAL_LIMIT = 4
+MIN_LIMIT = 1
+MAX_LIMIT = 64
+DECREASE_FACTOR = 0.5  # Limit multiplier on throttling
+MAX_RETRIES = 6  # Retries of a throttled call
+THROTTLE_WINDOW_SECONDS = 60  # Window of the reported throttle rate
+
+
+class AdaptiveLimiter:
+    """Thread-safe AIMD in-flight limit for one service"""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = INITIAL_LIMIT,
+        min_limit: int = MIN_LIMIT,
+        max_limit: int = MAX_LIMIT,
+        decrease_factor: float = DECREASE_FACTOR,
+        max_retries: int = MAX_RETRIES
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.decrease_factor = decrease_factor
+        self.max_retries = max_retries
+
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.generation = 0  # Bumped on every cut
+        self.recent = deque()  # (time, throttled) of calls in the throttle window
+        self.stats = {'calls': 0, 'throttled': 0, 'retries': 0, 'decreases': 0}
+
+    def acquire(self) -> int:
+        """Wait for a free slot under the current limit; returns the token to pass to release()"""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+            return self.generation
+
+    def release(self, token: int, throttled: bool = False):
+        """Free a slot and adjust the limit by the call's outcome"""
+        now = time.monotonic()
+        with self.condition:
+            limited = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            self.stats['calls'] += 1
+            self.recent.append((now, throttled))
+            while self.recent and self.recent[0][0] < now - THROTTLE_WINDOW_SECONDS:
+                self.recent.popleft()
+
+            if throttled:
+                self.stats['throttled'] += 1
+                if token == self.generation:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.generation += 1
+                    self.stats['decreases'] += 1
+            elif limited:
+                # Grow only while the limit is what holds callers back
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.condition.notify_all()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Run fn under the limit, retrying throttled calls with jittered backoff"""
+        for attempt in range(self.max_retries + 1):
+            token = self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                self.release(token, throttled)
+                if not throttled or attempt == self.max_retries:
+                    raise
+                with self.condition:
+                    self.stats['retries'] += 1
+                time.sleep(backoff_delay(attempt))
+                continue
+            self.release(token)
+            return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current limit, in-flight count, counters and throttle rate over the window"""
+        with self.condition:
+            window = len(self.recent)
+            throttled = sum(1 for _, t in self.recent if t)
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                **self.stats,
+                'throttle_rate': throttled / window if window else 0.0
+            }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_lock = threading.Lock()
+
+
+def get_limiter(service: str, **kwargs) -> AdaptiveLimiter:
+    """
+    Process-wide limiter of a service ('bedrock', 's3vectors'), created on
+    first use with kwargs; later calls share it and ignore kwargs, so all
+    callers in the process (and warm Lambda invocations) share what it learned
+    """
+    with _lock:
+        limiter = _limiters.get(service)
+        if limiter is None:
+            limiter = _limiters[service] = AdaptiveLimiter(service, **kwargs)
+        return limiter
+
+
+def limiter_metrics() -> Dict[str, Dict[str, Any]]:
+    """Metrics of every limiter created so far, keyed by service"""
+    with _lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.metrics() for limiter in limiters}
+
+
+def format_metrics(metrics: Dict[str, Dict[str, Any]]) -> str:
+    """One-line summary: service limit (in flight, throttle rate)"""
+    return " | ".join(
+        f"{name} limit {m['limit']} (in flight {m['in_flight']}, "
+        f"throttled {m['throttle_rate'] * 100:.1f}%)"
+        for name, m in metrics.items()
+    )
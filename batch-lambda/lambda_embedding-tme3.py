@@ -5,10 +5,14 @@ and writes them to S3 Vector Bucket
 """
 
 import json
+import os
 import boto3
 import uuid
 from typing import Dict, Any
 
+# Shared model definitions, packaged next to this file from s3vectors-embed-cli/models.py
+from models import SupportedModel
+
 # AWS clients (initialized outside handler for reuse)
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
 s3_client = boto3.client('s3', region_name='us-east-1')
@@ -17,8 +21,13 @@ s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
 # Configuration
 MODEL_ID = 'twelvelabs.marengo-embed-3-0-v1:0'
 EMBEDDING_DIMENSION = 512  # TME3 uses 512 dimensions (reduced from 1024)
-VECTOR_BUCKET = 'my-nova-mme-demo-01'
-INDEX_NAME = 'my-image-index-03-tme3'
+# Target bucket/index can be overridden with Lambda environment variables,
+# e.g. to point writers at a new index during a migration
+VECTOR_BUCKET = os.environ.get('VECTOR_BUCKET', 'my-nova-mme-demo-01')
+INDEX_NAME = os.environ.get('INDEX_NAME', 'my-image-index-03-tme3')
+
+# Payload schema and response path for Marengo Embed 3.0
+model = SupportedModel.from_model_id(MODEL_ID)
 
 
 def get_account_id() -> str:
@@ -36,17 +45,14 @@ def generate_embedding(bucket: str, key: str) -> Dict[str, Any]:
     
     # Prepare model input for TME3
     # Using S3 location directly (no need to download and base64 encode)
-    model_input = {
-        "inputType": "image",
-        "image": {
-            "mediaSource": {
-                "s3Location": {
-                    "uri": f"s3://{bucket}/{key}",
-                    "bucketOwner": account_id
-                }
+    model_input = model.build_payload('image', {
+        'media_source': {
+            's3Location': {
+                'uri': f"s3://{bucket}/{key}",
+                'bucketOwner': account_id
             }
         }
-    }
+    })
     
     # Invoke Bedrock model synchronously
     response = bedrock_client.invoke_model(
@@ -56,33 +62,7 @@ def generate_embedding(bucket: str, key: str) -> Dict[str, Any]:
     
     # Parse response
     result = json.loads(response['body'].read())
-    
-    # TME3 response format: dict with 'data' key containing a list with embedding
-    if isinstance(result, dict) and 'data' in result:
-        data_list = result['data']
-        if isinstance(data_list, list) and len(data_list) > 0:
-            first_item = data_list[0]
-            if isinstance(first_item, dict) and 'embedding' in first_item:
-                embedding = first_item['embedding']
-            else:
-                raise ValueError(f"Unexpected data item format: {first_item}")
-        else:
-            raise ValueError(f"Empty data list in response")
-    elif isinstance(result, dict) and 'embedding' in result:
-        # Alternative format: dict with 'embedding' key
-        embedding_list = result['embedding']
-        if isinstance(embedding_list, list) and len(embedding_list) > 0:
-            first_item = embedding_list[0]
-            if isinstance(first_item, dict) and 'embedding' in first_item:
-                embedding = first_item['embedding']
-            elif isinstance(first_item, (int, float)):
-                embedding = embedding_list
-            else:
-                raise ValueError(f"Unexpected embedding item format: {first_item}")
-        else:
-            embedding = embedding_list
-    else:
-        raise ValueError(f"Unexpected response format: {result}")
+    embedding = model.extract_embedding(result)
     
     return {
         'bucket': bucket,
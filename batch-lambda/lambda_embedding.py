@@ -5,10 +5,19 @@ and writes them to S3 Vector Bucket
 """
 
 import json
+import math
+import os
 import boto3
 import base64
 import uuid
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, Any, List, Tuple
+
+# Packaged next to this file from the repository root
+from ingest_pipeline import Pipeline, Stage, format_stats
+from vector_writer import VectorWriter
+from adaptive_concurrency import get_limiter, limiter_metrics, format_metrics
 
 # AWS clients (initialized outside handler for reuse)
 bedrock_client = boto3.client('bedrock-runtime', region_name='us-east-1')
@@ -17,9 +26,47 @@ s3vectors_client = boto3.client('s3vectors', region_name='us-east-1')
 
 # Configuration
 MODEL_ID = 'amazon.nova-2-multimodal-embeddings-v1:0'
-EMBEDDING_DIMENSION = 3072
-VECTOR_BUCKET = 'my-nova-mme-demo-01'
-INDEX_NAME = 'my-image-index-02-lambda'
+# Target bucket/index/dimension can be overridden with Lambda environment variables,
+# e.g. to point writers at a new index during a migration
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '3072'))
+VECTOR_BUCKET = os.environ.get('VECTOR_BUCKET', 'my-nova-mme-demo-01')
+INDEX_NAME = os.environ.get('INDEX_NAME', 'my-image-index-02-lambda')
+
+# Optional low-dimension copy of every vector for two-stage (coarse + rerank) search.
+# Nova MME embeddings are Matryoshka-style, so a truncated, renormalised prefix
+# is itself a usable embedding. Leave COARSE_INDEX_NAME empty to disable.
+COARSE_INDEX_NAME = os.environ.get('COARSE_INDEX_NAME', '')
+COARSE_DIMENSION = int(os.environ.get('COARSE_DIMENSION', '256'))
+
+# Optional pre-sized thumbnail written next to every vector, so viewers fetch a
+# few KB instead of the original. Needs Pillow (e.g. as a Lambda layer) and
+# s3:PutObject on the thumbnail bucket. Leave THUMBNAIL_BUCKET empty to disable.
+# Keep the thumbnail prefix outside the source prefix being ingested.
+THUMBNAIL_BUCKET = os.environ.get('THUMBNAIL_BUCKET', '')
+THUMBNAIL_PREFIX = os.environ.get('THUMBNAIL_PREFIX', 'thumbnails/')
+THUMBNAIL_SIZE = tuple(int(x) for x in os.environ.get('THUMBNAIL_SIZE', '360x240').split('x'))
+
+# Ingestion pipeline: workers per stage and vectors per put_vectors call.
+# EMBED_WORKERS is an upper bound: the adaptive limiter below decides how many
+# Bedrock calls are actually in flight.
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', '4'))
+EMBED_WORKERS = int(os.environ.get('EMBED_WORKERS', '16'))
+WRITE_BATCH_SIZE = int(os.environ.get('WRITE_BATCH_SIZE', '100'))
+
+# Vectors that still cannot be written after retries (or when the invocation is
+# about to time out) are spilled here as JSON Lines, e.g. s3://my-bucket/vector-spool/,
+# and can be written later with vector_writer.replay_spool. Needs s3:PutObject.
+SPOOL_URI = os.environ.get('SPOOL_URI', '')
+SPILL_MARGIN_SECONDS = 10  # Invocation time reserved for spilling unwritten vectors
+if not SPOOL_URI:
+    print("⚠ SPOOL_URI is not set: vectors that cannot be written are dropped and "
+          "their messages reported as failed")
+
+# AIMD in-flight limits per service: raised while calls succeed, halved on
+# throttling. Created at module level so warm invocations keep what they learned.
+bedrock_limiter = get_limiter('bedrock', initial_limit=int(os.environ.get('BEDROCK_INITIAL_CONCURRENCY', '4')),
+                              max_limit=EMBED_WORKERS)
+s3vectors_limiter = get_limiter('s3vectors', initial_limit=int(os.environ.get('S3VECTORS_INITIAL_CONCURRENCY', '2')))
 
 
 def get_image_format(key: str) -> str:
@@ -33,123 +80,230 @@ def get_image_format(key: str) -> str:
     return 'jpeg'
 
 
-def generate_embedding(bucket: str, key: str) -> Dict[str, Any]:
-    """Generate embedding for an image from S3"""
-    print(f"Processing: s3://{bucket}/{key}")
+def write_thumbnail(image_bytes: bytes, key: str) -> str:
+    """Write a pre-sized JPEG thumbnail of the image, returning its S3 URI ('' if skipped)"""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("Pillow not available, skipping thumbnail")
+        return ''
+    
+    # Draft mode lets the JPEG decoder scale down while decoding
+    image = Image.open(BytesIO(image_bytes))
+    image.draft('RGB', (THUMBNAIL_SIZE[0] * 2, THUMBNAIL_SIZE[1] * 2))
+    image.thumbnail(THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    
+    buffer = BytesIO()
+    image.convert('RGB').save(buffer, format='JPEG', quality=85)
+    thumbnail_key = f"{THUMBNAIL_PREFIX}{key}.jpg"
+    s3_client.put_object(
+        Bucket=THUMBNAIL_BUCKET,
+        Key=thumbnail_key,
+        Body=buffer.getvalue(),
+        ContentType='image/jpeg'
+    )
+    
+    return f's3://{THUMBNAIL_BUCKET}/{thumbnail_key}'
+
+
+def fetch_image(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Fetch stage: download the image from S3"""
+    print(f"Processing: s3://{item['bucket']}/{item['key']}")
+    response = s3_client.get_object(Bucket=item['bucket'], Key=item['key'])
+    item['image_bytes'] = response['Body'].read()
+    return item
+
+
+def prepare_input(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Preprocess stage: write the thumbnail and build the model input"""
+    image_bytes = item.pop('image_bytes')
+    
+    # The image bytes are already in memory, so the thumbnail costs no extra download
+    item['thumbnail_uri'] = ''
+    if THUMBNAIL_BUCKET:
+        try:
+            item['thumbnail_uri'] = write_thumbnail(image_bytes, item['key'])
+        except Exception as e:
+            print(f"✗ Thumbnail failed for {item['key']}: {e}")
     
-    # Download image from S3
-    response = s3_client.get_object(Bucket=bucket, Key=key)
-    image_bytes = response['Body'].read()
     image_base64 = base64.b64encode(image_bytes).decode('utf-8')
     
     # Prepare model input
-    model_input = {
+    item['model_input'] = {
         "taskType": "SINGLE_EMBEDDING",
         "singleEmbeddingParams": {
             "embeddingPurpose": "GENERIC_INDEX",
             "embeddingDimension": EMBEDDING_DIMENSION,
             "image": {
-                "format": get_image_format(key),
+                "format": get_image_format(item['key']),
                 "source": {
                     "bytes": image_base64
                 }
             }
         }
     }
-    
-    # Invoke Bedrock model synchronously
-    response = bedrock_client.invoke_model(
+    return item
+
+
+def generate_embedding(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Embed stage: invoke Bedrock model synchronously under the adaptive limit"""
+    response = bedrock_limiter.call(
+        bedrock_client.invoke_model,
         modelId=MODEL_ID,
-        body=json.dumps(model_input)
+        body=json.dumps(item.pop('model_input'))
     )
     
     # Parse response
     result = json.loads(response['body'].read())
-    embedding = result.get('embeddings', [{}])[0].get('embedding', [])
-    
-    return {
-        'bucket': bucket,
-        'key': key,
-        'embedding': embedding,
-        'dimension': len(embedding)
-    }
+    item['embedding'] = result.get('embeddings', [{}])[0].get('embedding', [])
+    return item
+
+
+def truncate_embedding(embedding: list, dimension: int) -> list:
+    """Truncate embedding to a lower dimension and renormalize to unit length"""
+    truncated = embedding[:dimension]
+    norm = math.sqrt(sum(x * x for x in truncated))
+    if norm == 0:
+        return truncated
+    return [x / norm for x in truncated]
 
 
 def store_embedding_to_s3_vectors(
-    embedding: list,
-    source_bucket: str,
-    source_key: str,
-    vector_bucket: str,
-    index_name: str
+    item: Dict[str, Any],
+    writer: VectorWriter,
+    coarse_writer: VectorWriter = None
 ) -> Dict[str, Any]:
-    """Store embedding vector to S3 Vectors with metadata"""
+    """Write stage: hand the embedding with metadata to the coalescing writer(s)"""
     # Generate unique ID using UUID directly (no prefix to avoid hotspot)
-    vector_key = uuid.uuid4().hex
+    item['vector_key'] = uuid.uuid4().hex
     
     # Prepare metadata
     metadata = {
-        'source_bucket': source_bucket,
-        'source_key': source_key,
-        's3_uri': f's3://{source_bucket}/{source_key}'
+        'source_bucket': item['bucket'],
+        'source_key': item['key'],
+        's3_uri': f"s3://{item['bucket']}/{item['key']}"
     }
+    if item['thumbnail_uri']:
+        metadata['thumbnail_uri'] = item['thumbnail_uri']
     
-    print(f"Storing to S3 Vectors with key: {vector_key}")
-    
-    # Write embedding to S3 Vectors using put_vectors API
-    response = s3vectors_client.put_vectors(
-        vectorBucketName=vector_bucket,
-        indexName=index_name,
-        vectors=[
-            {
-                'key': vector_key,
-                'data': {'float32': embedding},
-                'metadata': metadata
-            }
-        ]
-    )
+    # The writer batches vectors into put_vectors calls in the background
+    writer.add({
+        'key': item['vector_key'],
+        'data': {'float32': item['embedding']},
+        'metadata': metadata
+    })
     
-    return {
-        'vector_key': vector_key,
-        'vector_bucket': vector_bucket,
-        'index_name': index_name,
-        'metadata': metadata,
-        'response': response
-    }
+    # Same keys in the coarse index so the two stages can be joined
+    if coarse_writer:
+        coarse_writer.add({
+            'key': item['vector_key'],
+            'data': {'float32': truncate_embedding(item['embedding'], COARSE_DIMENSION)},
+            'metadata': metadata
+        })
+    
+    return item
+
+
+def close_writers(writers: List[VectorWriter], context=None) -> List[Dict[str, Any]]:
+    """
+    Close the writers concurrently against one deadline, leaving
+    SPILL_MARGIN_SECONDS of the invocation to spill what is unwritten
+    """
+    timeout = None
+    if context is not None:
+        timeout = max(1.0, context.get_remaining_time_in_millis() / 1000 - SPILL_MARGIN_SECONDS)
+    with ThreadPoolExecutor(max_workers=len(writers)) as executor:
+        futures = [executor.submit(writer.close, timeout) for writer in writers]
+        return [future.result() for future in futures]
 
 
-def process_message(message_body: Dict) -> Dict[str, Any]:
-    """Process a single SQS message"""
-    bucket = message_body['bucket']
-    key = message_body['key']
+def process_messages(message_bodies: List[Dict], context=None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Process SQS messages on the ingestion pipeline
+    fetch -> preprocess -> embed -> write, each stage with its own workers and
+    bounded queues, so images are downloaded and embedded concurrently. The
+    write stage feeds a VectorWriter that coalesces put_vectors calls, retries
+    throttling and spills what it cannot write to SPOOL_URI.
+    A message succeeds only once its vector has been written (to the coarse
+    index too, if configured); spooled vectors are reported as 'spilled' and
+    vectors lost without a spool as 'error'.
+    Returns (per-message results, writer stats)
+    """
+    results = []
+    queued = []
+    spool = SPOOL_URI or None
+    written_keys = {INDEX_NAME: set(), COARSE_INDEX_NAME: set()}
     
-    try:
-        # Generate embedding
-        embedding_result = generate_embedding(bucket, key)
-        print(f"✓ Embedding generated (dimension: {embedding_result['dimension']})")
-        
-        # Store to S3 Vectors
-        store_result = store_embedding_to_s3_vectors(
-            embedding=embedding_result['embedding'],
-            source_bucket=bucket,
-            source_key=key,
-            vector_bucket=VECTOR_BUCKET,
-            index_name=INDEX_NAME
+    def on_flush(index_name):
+        def record(vectors):
+            written_keys[index_name].update(vector['key'] for vector in vectors)
+        return record
+    
+    writers = [VectorWriter(
+        s3vectors_client, VECTOR_BUCKET, INDEX_NAME,
+        spool=spool, s3_client=s3_client, max_vectors=WRITE_BATCH_SIZE,
+        on_flush=on_flush(INDEX_NAME), limiter=s3vectors_limiter
+    )]
+    coarse_writer = None
+    if COARSE_INDEX_NAME:
+        print(f"Storing {COARSE_DIMENSION}-d copies to coarse index: {COARSE_INDEX_NAME}")
+        coarse_writer = VectorWriter(
+            s3vectors_client, VECTOR_BUCKET, COARSE_INDEX_NAME,
+            spool=spool, s3_client=s3_client, max_vectors=WRITE_BATCH_SIZE,
+            on_flush=on_flush(COARSE_INDEX_NAME), limiter=s3vectors_limiter
         )
-        print(f"✓ Stored to S3 Vectors")
-        
-        return {
-            'status': 'success',
-            'source': f's3://{bucket}/{key}',
-            'vector_key': store_result['vector_key']
-        }
+        writers.append(coarse_writer)
+    
+    def on_result(item):
+        # Status is decided once the writers are closed
+        queued.append(item)
     
-    except Exception as e:
-        print(f"✗ Error processing {key}: {e}")
-        return {
+    def on_error(stage, item, e):
+        print(f"✗ Error processing {item['key']} ({stage}): {e}")
+        results.append({
             'status': 'error',
-            'source': f's3://{bucket}/{key}',
+            'source': f"s3://{item['bucket']}/{item['key']}",
             'error': str(e)
-        }
+        })
+    
+    pipeline = Pipeline([
+        Stage('fetch', fetch_image, workers=FETCH_WORKERS),
+        Stage('preprocess', prepare_input, workers=2),
+        Stage('embed', generate_embedding, workers=EMBED_WORKERS),
+        Stage('write', lambda item: store_embedding_to_s3_vectors(item, writers[0], coarse_writer))
+    ], on_error=on_error, on_result=on_result)
+    
+    try:
+        stats = pipeline.run(message_bodies)
+        print(f"Pipeline: {format_stats(stats)}")
+    finally:
+        all_stats = close_writers(writers, context)
+    
+    indexes = [INDEX_NAME] + ([COARSE_INDEX_NAME] if COARSE_INDEX_NAME else [])
+    for item in queued:
+        source = f"s3://{item['bucket']}/{item['key']}"
+        missing = [index for index in indexes if item['vector_key'] not in written_keys[index]]
+        if not missing:
+            print(f"✓ Stored {source} (dimension: {len(item['embedding'])})")
+            results.append({'status': 'success', 'source': source, 'vector_key': item['vector_key']})
+        elif spool:
+            print(f"⚠ Spilled {source} to {spool} (not written to {', '.join(missing)})")
+            results.append({'status': 'spilled', 'source': source, 'vector_key': item['vector_key']})
+        else:
+            print(f"✗ Vector for {source} not written to {', '.join(missing)} and SPOOL_URI is not set")
+            results.append({
+                'status': 'error',
+                'source': source,
+                'error': f"put_vectors failed for {', '.join(missing)} and no spool is configured"
+            })
+    
+    write_stats = all_stats[0]
+    write_stats['spool_files'] = [f for stats in all_stats for f in stats['spool_files']]
+    print(f"Writer: {write_stats['written']} vectors in {write_stats['requests']} put_vectors calls, "
+          f"{write_stats['retries']} retries ({write_stats['throttled']} throttled), "
+          f"{write_stats['spilled']} spilled")
+    print(f"Concurrency: {format_metrics(limiter_metrics())}")
+    return results, write_stats
 
 
 def lambda_handler(event, context):
@@ -160,17 +314,13 @@ def lambda_handler(event, context):
     print(f"Received {len(event['Records'])} messages")
     
     results = []
+    message_bodies = []
     
-    # Process each SQS message
+    # Parse each SQS message
     for record in event['Records']:
         try:
-            # Parse message body
             message_body = json.loads(record['body'])
-            
-            # Process the message
-            result = process_message(message_body)
-            results.append(result)
-        
+            message_bodies.append({'bucket': message_body['bucket'], 'key': message_body['key']})
         except Exception as e:
             print(f"✗ Error processing record: {e}")
             results.append({
@@ -178,11 +328,16 @@ def lambda_handler(event, context):
                 'error': str(e)
             })
     
+    # Process the messages
+    processed, write_stats = process_messages(message_bodies, context)
+    results.extend(processed)
+    
     # Summary
     success_count = sum(1 for r in results if r['status'] == 'success')
     error_count = sum(1 for r in results if r['status'] == 'error')
+    spilled_count = sum(1 for r in results if r['status'] == 'spilled')
     
-    print(f"\nSummary: {success_count} succeeded, {error_count} failed")
+    print(f"\nSummary: {success_count} succeeded, {spilled_count} spilled, {error_count} failed")
     
     return {
         'statusCode': 200,
@@ -190,6 +345,9 @@ def lambda_handler(event, context):
             'processed': len(results),
             'succeeded': success_count,
             'failed': error_count,
+            'spilled': spilled_count,
+            'spool_files': write_stats['spool_files'],
+            'concurrency': limiter_metrics(),
             'results': results
         })
     }
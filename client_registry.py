@@ -0,0 +1,45 @@
+"""
+Shared AWS client registry
+Clients are created lazily once per (region, service) and reused, so their
+connection pools and TLS sessions survive across searches. boto3 clients are
+thread-safe once built, but building them from the default session is not,
+so creation is serialised behind a lock.
+"""
+
+import threading
+from typing import Dict, Tuple
+
+import boto3
+from botocore.config import Config
+
+MAX_POOL_CONNECTIONS = 16
+
+
+class ClientRegistry:
+    """Lazily created boto3 clients keyed by (region, service)"""
+
+    def __init__(self, max_pool_connections: int = MAX_POOL_CONNECTIONS):
+        self._config = Config(max_pool_connections=max_pool_connections)
+        self._session = boto3.session.Session()
+        self._clients: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service: str, region: str):
+        """Return the client for a service in a region, creating it on first use"""
+        key = (region, service)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = self._session.client(service, region_name=region, config=self._config)
+                    self._clients[key] = client
+        return client
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self._clients
+
+    def clear(self):
+        """Drop all clients (e.g. after credentials change)"""
+        with self._lock:
+            self._clients.clear()
@@ -0,0 +1,279 @@
+"""
+Parallel, resumable ingestion of a local directory tree
+Walks the tree lazily, filters files by extension and size, and runs the files
+through the staged ingestion pipeline (read, preprocess, embed on a bounded
+worker pool, coalesced put_vectors writes through VectorWriter). A local manifest records (path,
+size, mtime, vector key) for every written file, so a re-run only embeds new
+or changed files; changed files keep their vector key and are overwritten in
+place. New files get a key derived from their path, so re-embedding a file
+whose vector was spilled (and maybe replayed) never creates a second vector.
+Text files are embedded in batches: models that accept several texts per
+request (Cohere) get one request per batch instead of one per file.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Iterator, Tuple
+
+from adaptive_concurrency import get_limiter, limiter_metrics
+from embedding_models import get_model
+from ingest_pipeline import Pipeline, Stage
+from vector_writer import VectorWriter
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+TEXT_EXTENSIONS = ('.txt', '.md')
+MAX_FILE_SIZE = 20 * 1024 * 1024  # Larger images exceed the synchronous invoke_model body limit once base64 encoded
+MAX_TEXT_FILE_SIZE = 64 * 1024  # Longer texts exceed the models' input token limits
+FETCH_WORKERS = 4  # Concurrent file reads
+WORKERS = 8  # Most concurrent Bedrock calls (the adaptive limit decides how many run)
+WRITE_BATCH_SIZE = 100  # Vectors per put_vectors call (API limit 500)
+REPORT_INTERVAL_SECONDS = 10  # Per-stage progress lines (None = quiet)
+
+
+def walk_files(
+    root: str,
+    extensions: Tuple[str, ...] = IMAGE_EXTENSIONS,
+    min_size: int = 1,
+    max_size: int = MAX_FILE_SIZE
+) -> Iterator[Tuple[str, int, float]]:
+    """Yield (path, size, mtime) of matching files, one directory at a time"""
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError as e:
+            print(f"  Skipping {directory}: {e}")
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(extensions):
+                    stat = entry.stat()
+                    if min_size <= stat.st_size <= max_size:
+                        yield entry.path, stat.st_size, stat.st_mtime
+
+
+class IngestManifest:
+    """
+    Append-only JSON Lines record of ingested files, replayed on load
+    (the last line for a path wins), so large trees never rewrite the file
+    """
+
+    def __init__(self, manifest_file: str):
+        self.manifest_file = manifest_file
+        self.entries = {}
+        if os.path.exists(manifest_file):
+            with open(manifest_file, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['path']] = entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def is_current(self, path: str, size: int, mtime: float) -> bool:
+        """Whether the file was ingested and has not changed since"""
+        entry = self.entries.get(path)
+        return entry is not None and entry['size'] == size and entry['mtime'] == mtime
+
+    def vector_key(self, path: str) -> str:
+        """
+        Existing vector key of a file, or one derived from its path, so a file
+        that was spilled and replayed is overwritten rather than duplicated
+        when it is embedded again
+        """
+        entry = self.entries.get(path)
+        # Name-based UUID directly (no prefix to avoid hotspot)
+        return entry['key'] if entry else uuid.uuid5(uuid.NAMESPACE_URL, os.path.abspath(path)).hex
+
+    def record(self, entries: List[Dict[str, Any]]):
+        """Append entries after their vectors have been written"""
+        with open(self.manifest_file, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+                self.entries[entry['path']] = entry
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def file_metadata(path: str) -> Dict[str, str]:
+    """Metadata stored with the vector of a local file"""
+    path_obj = Path(path)
+    return {
+        'file_path': str(path_obj.parent),
+        'file_name': path_obj.name,
+        'full_path': path
+    }
+
+
+def ingest_directory(
+    root: str,
+    build_input_fn: Callable[[str, bytes], Dict[str, Any]],
+    invoke_fn: Callable[[Dict[str, Any]], List[float]],
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    manifest_file: str,
+    extensions: Tuple[str, ...] = IMAGE_EXTENSIONS,
+    max_file_size: int = MAX_FILE_SIZE,
+    fetch_workers: int = FETCH_WORKERS,
+    workers: int = WORKERS,
+    batch_size: int = WRITE_BATCH_SIZE,
+    report_interval: float = REPORT_INTERVAL_SECONDS,
+    spool: str = None,
+    embed_batch_size: int = 1
+) -> Dict[str, Any]:
+    """
+    Embed every new or changed file under root and write its vector
+    Runs on the ingestion pipeline: fetch (read file) -> preprocess
+    (build_input_fn(path, bytes) returns the model input) -> embed
+    (invoke_fn(model_input) returns the embedding) -> write (VectorWriter
+    coalesces put_vectors; the manifest is updated as each batch lands).
+    Bounded queues between the stages keep only a few files in memory
+    however large the tree is. Vectors that cannot be written are spilled
+    to spool (local directory or s3:// prefix) for replay_spool. Bedrock
+    and S3 Vectors calls run under the process-wide adaptive limiters.
+    With embed_batch_size > 1, invoke_fn receives a list of up to that many
+    model inputs and returns their embeddings in the same order.
+    """
+    manifest = IngestManifest(manifest_file)
+    counts = {'scanned': 0, 'unchanged': 0}
+    pending = {}  # vector key -> manifest entry awaiting its write
+    pending_lock = threading.Lock()
+    bedrock_limiter = get_limiter('bedrock', max_limit=workers)
+
+    def on_flush(vectors):
+        # Recorded only after the write, so a crash re-embeds rather than loses files
+        with pending_lock:
+            entries = [pending.pop(vector['key']) for vector in vectors]
+        manifest.record(entries)
+
+    writer = VectorWriter(
+        s3vectors_client, vector_bucket, index_name,
+        spool=spool, max_vectors=batch_size, on_flush=on_flush,
+        limiter=get_limiter('s3vectors')
+    )
+
+    def source():
+        for path, size, mtime in walk_files(root, extensions, max_size=max_file_size):
+            counts['scanned'] += 1
+            if manifest.is_current(path, size, mtime):
+                counts['unchanged'] += 1
+                continue
+            yield {'path': path, 'size': size, 'mtime': mtime}
+
+    def fetch(item):
+        with open(item['path'], 'rb') as f:
+            item['data'] = f.read()
+        return item
+
+    def preprocess(item):
+        item['model_input'] = build_input_fn(item['path'], item.pop('data'))
+        return item
+
+    def embed(item):
+        item['embedding'] = bedrock_limiter.call(invoke_fn, item.pop('model_input'))
+        return item
+
+    def embed_batch(items):
+        embeddings = bedrock_limiter.call(invoke_fn, [item['model_input'] for item in items])
+        if len(embeddings) != len(items):
+            raise ValueError(f"Expected {len(items)} embeddings, got {len(embeddings)}")
+        for item, embedding in zip(items, embeddings):
+            del item['model_input']
+            item['embedding'] = embedding
+        return items
+
+    def write(item):
+        key = manifest.vector_key(item['path'])
+        with pending_lock:
+            pending[key] = {'path': item['path'], 'size': item['size'], 'mtime': item['mtime'], 'key': key}
+        writer.add({'key': key, 'data': {'float32': item.pop('embedding')}, 'metadata': file_metadata(item['path'])})
+        return item
+
+    def on_error(stage: str, item: Dict[str, Any], e: Exception):
+        print(f"  ✗ {stage} {item['path']}: {e}")
+
+    pipeline = Pipeline([
+        Stage('fetch', fetch, workers=fetch_workers, queue_size=2 * fetch_workers),
+        Stage('preprocess', preprocess, workers=2, queue_size=2 * fetch_workers),
+        Stage(
+            'embed', embed_batch if embed_batch_size > 1 else embed,
+            workers=workers, queue_size=2 * max(workers, embed_batch_size), batch_size=embed_batch_size
+        ),
+        Stage('write', write, workers=1, queue_size=2 * workers)
+    ], on_error=on_error)
+    try:
+        stats = pipeline.run(source(), report_interval)
+    finally:
+        write_stats = writer.close()
+
+    counts['embedded'] = stats['embed']['emitted']
+    counts['failed'] = sum(stage['failed'] for stage in stats.values())
+    counts['written'] = write_stats['written']
+    counts['spilled'] = write_stats['spilled']
+    counts['spool_files'] = write_stats['spool_files']
+    counts['elapsed_seconds'] = time.perf_counter() - pipeline.start_time
+    counts['stages'] = stats
+    counts['concurrency'] = limiter_metrics()
+    return counts
+
+
+def batch_text_embedder(bedrock_client, model_id: str) -> Callable[[List[Dict[str, Any]]], List[List[float]]]:
+    """
+    invoke_fn for batched text ingestion: packs the contents into as few
+    requests as the model allows and returns their embeddings in order
+    """
+    model = get_model(model_id)
+
+    def invoke(contents: List[Dict[str, Any]]) -> List[List[float]]:
+        embeddings = []
+        for payload in model.build_batch_payloads("text", contents):
+            response = bedrock_client.invoke_model(modelId=model_id, body=json.dumps(payload))
+            embeddings.extend(model.extract_embeddings(json.loads(response['body'].read())))
+        return embeddings
+
+    return invoke
+
+
+def ingest_text_directory(
+    root: str,
+    bedrock_client,
+    model_id: str,
+    dimension: int,
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    manifest_file: str,
+    extensions: Tuple[str, ...] = TEXT_EXTENSIONS,
+    max_file_size: int = MAX_TEXT_FILE_SIZE,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Embed every new or changed UTF-8 text file under root, one vector per file
+    Files are embedded in batches of the model's text batch size (96 for
+    Cohere, 1 for models without batching); other arguments are passed to
+    ingest_directory
+    """
+    def build_input(path: str, data: bytes) -> Dict[str, Any]:
+        return {"text": data.decode('utf-8', errors='replace'), "index": {"dimensions": dimension}}
+
+    embed_texts = batch_text_embedder(bedrock_client, model_id)
+    embed_batch_size = get_model(model_id).max_batch_size("text")
+
+    def embed_text(content: Dict[str, Any]) -> List[float]:
+        return embed_texts([content])[0]
+
+    return ingest_directory(
+        root, build_input, embed_texts if embed_batch_size > 1 else embed_text,
+        s3vectors_client, vector_bucket, index_name, manifest_file,
+        extensions=extensions, max_file_size=max_file_size,
+        embed_batch_size=embed_batch_size, **kwargs
+    )
@@ -0,0 +1,63 @@
+"""
+Query-side text embedding for the models used in this demo
+Request bodies and response parsing come from the shared SupportedModel
+definitions in s3vectors-embed-cli/models.py, so every model (Amazon Nova MME,
+Twelve Labs Marengo Embed 3.0, ...) is described in one place
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Tuple
+
+# The CLI directory name is not a valid package name, so put it on the path
+sys.path.insert(0, str(Path(__file__).resolve().parent / 's3vectors-embed-cli'))
+from models import SupportedModel  # noqa: E402
+
+NOVA_MME_MODEL_ID = SupportedModel.NOVA_MME.model_id
+TME3_MODEL_ID = SupportedModel.TWELVELABS_MARENGO_V3.model_id
+
+# Query-side overrides merged into the indexing payload of a model
+QUERY_PARAMS = {
+    # Use IMAGE_RETRIEVAL to match the image index
+    NOVA_MME_MODEL_ID: {"singleEmbeddingParams": {"embeddingPurpose": "IMAGE_RETRIEVAL"}}
+}
+
+
+def get_model(model_id: str) -> SupportedModel:
+    """Look up the model definition for a Bedrock model ID"""
+    model = SupportedModel.from_model_id(model_id)
+    if model is None:
+        raise ValueError(f"Unknown model: {model_id}")
+    return model
+
+
+def build_text_input(model_id: str, text: str, dimension: int) -> Dict[str, Any]:
+    """Build model input for a text query"""
+    content = {"text": text, "index": {"dimensions": dimension}}
+    return get_model(model_id).build_payload("text", content, QUERY_PARAMS.get(model_id))
+
+
+def parse_embedding(model_id: str, result: Any) -> List[float]:
+    """Extract embedding vector from model response"""
+    return get_model(model_id).extract_embedding(result)
+
+
+def invoke_text_embedding(bedrock_client, model_id: str, text: str, dimension: int) -> Tuple[List[float], int]:
+    """Generate query embedding for text, returning (embedding, input token count)"""
+    response = bedrock_client.invoke_model(
+        modelId=model_id,
+        body=json.dumps(build_text_input(model_id, text, dimension))
+    )
+    result = json.loads(response['body'].read())
+
+    # Bedrock reports billed input tokens in a response header
+    headers = response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+    input_tokens = int(headers.get('x-amzn-bedrock-input-token-count', 0))
+
+    return parse_embedding(model_id, result), input_tokens
+
+
+def generate_text_embedding(bedrock_client, model_id: str, text: str, dimension: int) -> List[float]:
+    """Generate query embedding for text with the given model"""
+    return invoke_text_embedding(bedrock_client, model_id, text, dimension)[0]
@@ -0,0 +1,171 @@
+"""
+Retrieval evaluation harness
+Runs a labelled query set against model/dimension/index configurations and
+reports recall@k, MRR, mean distance, p50/p99 latency and estimated Bedrock
+cost per 1k queries. Relevance is judged by source object (s3_uri or
+full_path), so configurations over different models and indexes are
+comparable. Queries without labels can take their relevant set from an exact
+search over a local replica (a LocalAnnIndex built from a snapshot).
+"""
+
+import json
+import time
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from embedding_models import invoke_text_embedding
+from federated_search import source_id
+from index_config import resolve_index
+from local_ann import LocalAnnIndex
+from two_stage_search import two_stage_query
+
+
+def load_query_set(path: str) -> List[Dict[str, Any]]:
+    """
+    Load labelled queries from a JSONL file, one object per line:
+    {"query": "Wind turbine", "relevant": ["s3://bucket/01/b-01.jpg", ...]}
+    """
+    queries = []
+    with open(path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                queries.append(json.loads(line))
+    return queries
+
+
+def search(
+    config: Dict[str, Any],
+    s3vectors_client,
+    vector_bucket: str,
+    index: Dict[str, Any],
+    embedding: List[float],
+    top_k: int,
+    local_index: Optional[LocalAnnIndex]
+) -> List[Dict[str, Any]]:
+    """Run one search with the backend selected by the configuration"""
+    backend = config.get('backend', 's3vectors')
+    if backend == 'local_ann':
+        return local_index.search(embedding, top_k, config.get('nprobe', 8))
+    elif backend == 'local_exact':
+        return local_index.exact_search(embedding, top_k)
+    elif backend == 'two_stage':
+        return two_stage_query(
+            s3vectors_client, vector_bucket, index['coarse_index'], index['index'],
+            embedding, index['coarse_dimension'], top_k
+        )['results']
+    return s3vectors_client.query_vectors(
+        vectorBucketName=vector_bucket,
+        indexName=index['index'],
+        queryVector={'float32': embedding},
+        topK=top_k,
+        returnDistance=True,
+        returnMetadata=True
+    ).get('vectors', [])
+
+
+def score_ranking(ranking: List[str], relevant: set) -> Dict[str, float]:
+    """Recall and reciprocal rank of one ranked list of source ids"""
+    recall = len(relevant & set(ranking)) / len(relevant) if relevant else 0.0
+    reciprocal_rank = 0.0
+    for rank, source in enumerate(ranking, 1):
+        if source in relevant:
+            reciprocal_rank = 1.0 / rank
+            break
+    return {'recall': recall, 'reciprocal_rank': reciprocal_rank}
+
+
+def evaluate_config(
+    config: Dict[str, Any],
+    queries: List[Dict[str, Any]],
+    bedrock_client,
+    s3vectors_client,
+    vector_bucket: str,
+    top_k: int = 10,
+    ground_truth: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    Evaluate one configuration
+    config: {'name', 'model_id', 'index' (alias or name), 'dimension',
+             'backend': 's3vectors' | 'two_stage' | 'local_ann' | 'local_exact',
+             'local_dir': LocalAnnIndex directory for local backends,
+             'price_per_1k_tokens': Bedrock input price (USD) for cost estimates}
+    ground_truth: {'model_id', 'dimension', 'local_dir'} replica used for unlabelled queries
+    """
+    index = resolve_index(config['index'], config.get('dimension'))
+    local_index = LocalAnnIndex(config['local_dir']) if config.get('local_dir') else None
+    truth_index = LocalAnnIndex(ground_truth['local_dir']) if ground_truth else None
+
+    recalls, reciprocal_ranks, distances = [], [], []
+    embed_times, search_times, total_times = [], [], []
+    input_tokens = 0
+    evaluated = 0
+
+    for item in queries:
+        text = item['query']
+
+        start_time = time.perf_counter()
+        embedding, tokens = invoke_text_embedding(bedrock_client, config['model_id'], text, index['dimension'])
+        embed_time = time.perf_counter()
+        results = search(config, s3vectors_client, vector_bucket, index, embedding, top_k, local_index)
+        search_time = time.perf_counter()
+
+        relevant = set(item.get('relevant', []))
+        if not relevant and truth_index is not None:
+            if ground_truth['model_id'] == config['model_id']:
+                truth_embedding = embedding
+            else:
+                truth_embedding, _ = invoke_text_embedding(
+                    bedrock_client, ground_truth['model_id'], text, ground_truth['dimension']
+                )
+            relevant = {source_id(r) for r in truth_index.exact_search(truth_embedding, top_k)}
+        if not relevant:
+            continue
+
+        scores = score_ranking([source_id(r) for r in results], relevant)
+        recalls.append(scores['recall'])
+        reciprocal_ranks.append(scores['reciprocal_rank'])
+        distances.extend(r['distance'] for r in results if r.get('distance') is not None)
+        embed_times.append(embed_time - start_time)
+        search_times.append(search_time - embed_time)
+        total_times.append(search_time - start_time)
+        # Fall back to a ~4 characters per token estimate if the header is missing
+        input_tokens += tokens or max(1, len(text) // 4)
+        evaluated += 1
+
+    def percentile(values: List[float], q: int) -> Optional[float]:
+        return float(np.percentile(values, q) * 1000) if values else None
+
+    price = config.get('price_per_1k_tokens')
+    cost_per_1k_queries = None
+    if price is not None and evaluated:
+        # (tokens per query / 1000) * price per 1k tokens * 1000 queries
+        cost_per_1k_queries = (input_tokens / evaluated) * price
+
+    return {
+        'name': config.get('name', f"{config['model_id']}:{index['index']}"),
+        'model_id': config['model_id'],
+        'index': index['index'],
+        'dimension': index['dimension'],
+        'backend': config.get('backend', 's3vectors'),
+        'top_k': top_k,
+        'queries': evaluated,
+        'recall_at_k': float(np.mean(recalls)) if recalls else None,
+        'mrr': float(np.mean(reciprocal_ranks)) if reciprocal_ranks else None,
+        'mean_distance': float(np.mean(distances)) if distances else None,
+        'embed_p50_ms': percentile(embed_times, 50),
+        'search_p50_ms': percentile(search_times, 50),
+        'latency_p50_ms': percentile(total_times, 50),
+        'latency_p99_ms': percentile(total_times, 99),
+        'mean_input_tokens': input_tokens / evaluated if evaluated else None,
+        'bedrock_cost_per_1k_queries_usd': cost_per_1k_queries
+    }
+
+
+def append_results(path: str, results: List[Dict[str, Any]], run_id: str = None):
+    """Append results as JSON lines so runs can be tracked over time"""
+    run_id = run_id or time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    with open(path, 'a') as f:
+        for result in results:
+            f.write(json.dumps({'run_id': run_id, **result}) + '\n')
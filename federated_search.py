@@ -0,0 +1,136 @@
+"""
+Federated multi-index search
+Embeds a text query with every configured model and queries every index
+concurrently, then merges results by source object with rank fusion
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from adaptive_concurrency import get_limiter
+from embedding_models import generate_text_embedding
+from index_config import resolve_index
+
+FUSION_METHODS = ('rrf', 'score')
+RRF_K = 60  # Reciprocal rank fusion constant
+
+
+def source_id(result: Dict[str, Any]) -> str:
+    """Identify the source object a vector was generated from"""
+    metadata = result.get('metadata', {})
+    return metadata.get('s3_uri') or metadata.get('full_path') or result.get('key')
+
+
+def run_leg(
+    bedrock_client,
+    s3vectors_client,
+    vector_bucket: str,
+    leg: Dict[str, Any],
+    text: str,
+    top_k: int,
+    metadata_filter: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """Embed and query a single model/index pair, with timings"""
+    index = resolve_index(leg['index'], leg.get('dimension'))
+
+    start_time = time.time()
+    embedding = get_limiter('bedrock').call(
+        generate_text_embedding, bedrock_client, leg['model_id'], text, index['dimension']
+    )
+    embed_time = time.time() - start_time
+
+    params = {
+        'vectorBucketName': vector_bucket,
+        'indexName': index['index'],
+        'queryVector': {'float32': embedding},
+        'topK': top_k,
+        'returnDistance': True,
+        'returnMetadata': True
+    }
+    if metadata_filter:
+        params['filter'] = metadata_filter
+
+    response = get_limiter('s3vectors').call(s3vectors_client.query_vectors, **params)
+
+    return {
+        'model_id': leg['model_id'],
+        'index': index['index'],
+        'results': response.get('vectors', []),
+        'embed_seconds': embed_time,
+        'total_seconds': time.time() - start_time
+    }
+
+
+def fuse_results(legs: List[Dict[str, Any]], method: str = 'rrf', rrf_k: int = RRF_K) -> List[Dict[str, Any]]:
+    """
+    Merge per-index result lists by source object
+    - rrf: sum of 1 / (rrf_k + rank) over the lists containing the object
+    - score: per-list min-max normalised similarity (1 - distance), summed
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unsupported fusion method: {method} (expected one of {FUSION_METHODS})")
+
+    fused = {}
+    for leg in legs:
+        results = leg['results']
+        if method == 'score' and results:
+            similarities = [1.0 - r.get('distance', 1.0) for r in results]
+            low, high = min(similarities), max(similarities)
+            spread = high - low
+
+        for rank, result in enumerate(results, 1):
+            if method == 'rrf':
+                contribution = 1.0 / (rrf_k + rank)
+            else:
+                similarity = 1.0 - result.get('distance', 1.0)
+                contribution = (similarity - low) / spread if spread > 0 else 1.0
+
+            source = source_id(result)
+            entry = fused.setdefault(source, {
+                'source': source,
+                'fused_score': 0.0,
+                'metadata': result.get('metadata', {}),
+                'legs': {}
+            })
+            entry['fused_score'] += contribution
+            entry['legs'][leg['model_id']] = {
+                'key': result.get('key'),
+                'rank': rank,
+                'distance': result.get('distance')
+            }
+
+    return sorted(fused.values(), key=lambda e: e['fused_score'], reverse=True)
+
+
+def federated_query(
+    bedrock_client,
+    s3vectors_client,
+    vector_bucket: str,
+    legs: List[Dict[str, Any]],
+    text: str,
+    top_k: int = 5,
+    fusion: str = 'rrf',
+    metadata_filter: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    Run a text query against several model/index pairs concurrently
+    Each leg is {'model_id': ..., 'index': alias or index name, 'dimension': ...}
+    """
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=len(legs)) as executor:
+        futures = [
+            executor.submit(
+                run_leg, bedrock_client, s3vectors_client, vector_bucket,
+                leg, text, top_k, metadata_filter
+            )
+            for leg in legs
+        ]
+        leg_results = [future.result() for future in futures]
+
+    return {
+        'results': fuse_results(leg_results, fusion)[:top_k],
+        'legs': leg_results,
+        'total_seconds': time.time() - start_time
+    }
@@ -0,0 +1,57 @@
+"""
+Index alias configuration
+Maps logical index aliases to physical S3 Vectors index names and dimensions,
+so readers can be switched to a new index by rewriting one file
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any
+
+# Alias file location (override with INDEX_ALIASES_FILE environment variable)
+ALIASES_FILE = os.environ.get(
+    'INDEX_ALIASES_FILE',
+    str(Path(__file__).resolve().parent / 'index_aliases.json')
+)
+
+
+def load_aliases(aliases_file: str = ALIASES_FILE) -> Dict[str, Dict[str, Any]]:
+    """Load alias table from file (empty if file does not exist)"""
+    if not os.path.exists(aliases_file):
+        return {}
+    with open(aliases_file, 'r') as f:
+        return json.load(f)
+
+
+def resolve_index(name: str, dimension: int = None, aliases_file: str = ALIASES_FILE) -> Dict[str, Any]:
+    """
+    Resolve an alias to its physical index name, dimension and any extra settings
+    Names that are not aliases are returned unchanged as physical index names
+    """
+    entry = load_aliases(aliases_file).get(name)
+    if entry is None:
+        return {'index': name, 'dimension': dimension}
+    # Optional per-deployment settings (e.g. coarse_index / coarse_dimension) pass through
+    resolved = dict(entry)
+    resolved.setdefault('dimension', dimension)
+    return resolved
+
+
+def set_alias(alias: str, index_name: str, dimension: int, aliases_file: str = ALIASES_FILE) -> Dict[str, Any]:
+    """Point an alias at a new index, replacing the alias file atomically"""
+    aliases = load_aliases(aliases_file)
+    previous = aliases.get(alias)
+    # Settings tied to the old physical index (e.g. its coarse index) are dropped
+    aliases[alias] = {'index': index_name, 'dimension': dimension}
+
+    # Write to a temp file in the same directory, then rename over the original
+    # so readers see either the old or the new table, never a partial one
+    tmp_file = f"{aliases_file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(aliases, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, aliases_file)
+
+    return {'alias': alias, 'previous': previous, 'current': aliases[alias]}
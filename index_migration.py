@@ -0,0 +1,298 @@
+"""
+Index migration engine
+Copies, truncates (re-dimensions) or re-embeds every vector of a source index
+into a target index using parallel list_vectors segments and batched
+put_vectors writes. Progress is checkpointed per segment so an interrupted
+migration resumes where it stopped, and the reader alias is switched only
+after every segment has completed. Vectors added to the source while the
+segments were copied are picked up by a catch-up pass (re-list both indexes,
+copy keys missing from the target) just before the cutover.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional
+
+import numpy as np
+
+from index_config import set_alias
+from stored_vectors import get_vectors_by_keys
+from vector_snapshot import MAX_SEGMENTS, LIST_PAGE_SIZE, PUT_BATCH_SIZE
+
+MIGRATION_MODES = ('copy', 'truncate', 'reembed')
+
+
+def truncate_and_normalize(vector: List[float], dimension: int) -> List[float]:
+    """Truncate a Matryoshka embedding to a lower dimension and renormalize to unit length"""
+    truncated = np.asarray(vector[:dimension], dtype=np.float32)
+    norm = np.linalg.norm(truncated)
+    if norm > 0:
+        truncated = truncated / norm
+    return truncated.tolist()
+
+
+class MigrationProgress:
+    """Thread-safe per-segment checkpoint stored in a local JSON file"""
+
+    def __init__(self, progress_file: str, job: Dict[str, Any]):
+        self.progress_file = progress_file
+        self.lock = threading.Lock()
+        self.state = self._load(job)
+
+    def _load(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        if os.path.exists(self.progress_file):
+            with open(self.progress_file, 'r') as f:
+                state = json.load(f)
+            if state.get('job') != job:
+                raise ValueError(
+                    f"Progress file {self.progress_file} belongs to a different migration: {state.get('job')}"
+                )
+            return state
+        return {'job': job, 'segments': {}}
+
+    def _save(self):
+        tmp_file = f"{self.progress_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.progress_file)
+
+    def segment(self, segment_index: int) -> Dict[str, Any]:
+        """Get checkpoint for a segment"""
+        with self.lock:
+            return dict(self.state['segments'].get(
+                str(segment_index), {'next_token': None, 'migrated': 0, 'done': False}
+            ))
+
+    def update(self, segment_index: int, next_token: Optional[str], migrated: int, done: bool):
+        """Record a completed page for a segment"""
+        with self.lock:
+            self.state['segments'][str(segment_index)] = {
+                'next_token': next_token,
+                'migrated': migrated,
+                'done': done
+            }
+            self._save()
+
+    def is_complete(self, segment_count: int) -> bool:
+        """Check whether every segment has finished"""
+        with self.lock:
+            return all(
+                self.state['segments'].get(str(i), {}).get('done', False)
+                for i in range(segment_count)
+            )
+
+    def total_migrated(self) -> int:
+        """Total number of vectors written so far"""
+        with self.lock:
+            return sum(s['migrated'] for s in self.state['segments'].values())
+
+
+def migrate_segment(
+    s3vectors_client,
+    vector_bucket: str,
+    source_index: str,
+    target_index: str,
+    segment_index: int,
+    segment_count: int,
+    transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+    progress: MigrationProgress,
+    needs_data: bool = True
+) -> int:
+    """Migrate one list_vectors segment, checkpointing after each page"""
+    checkpoint = progress.segment(segment_index)
+    if checkpoint['done']:
+        return checkpoint['migrated']
+
+    next_token = checkpoint['next_token']
+    migrated = checkpoint['migrated']
+
+    while True:
+        params = {
+            'vectorBucketName': vector_bucket,
+            'indexName': source_index,
+            'maxResults': LIST_PAGE_SIZE,
+            'segmentCount': segment_count,
+            'segmentIndex': segment_index,
+            'returnData': needs_data,
+            'returnMetadata': True
+        }
+        if next_token:
+            params['nextToken'] = next_token
+
+        response = s3vectors_client.list_vectors(**params)
+
+        target_vectors = []
+        for vector in response.get('vectors', []):
+            converted = transform(vector)
+            if converted is not None:
+                target_vectors.append(converted)
+
+        for start in range(0, len(target_vectors), PUT_BATCH_SIZE):
+            s3vectors_client.put_vectors(
+                vectorBucketName=vector_bucket,
+                indexName=target_index,
+                vectors=target_vectors[start:start + PUT_BATCH_SIZE]
+            )
+
+        # Checkpoint only after the whole page is written. A crash mid-page
+        # replays that page, which is safe because put_vectors overwrites by key.
+        migrated += len(target_vectors)
+        next_token = response.get('nextToken')
+        progress.update(segment_index, next_token, migrated, done=not next_token)
+
+        if not next_token:
+            return migrated
+
+
+def list_keys(s3vectors_client, vector_bucket: str, index_name: str, segment_count: int = MAX_SEGMENTS) -> set:
+    """All vector keys of an index, listed with parallel segments (keys only, no data)"""
+    def list_segment(segment_index: int) -> List[str]:
+        keys = []
+        params = {
+            'vectorBucketName': vector_bucket,
+            'indexName': index_name,
+            'maxResults': LIST_PAGE_SIZE,
+            'segmentCount': segment_count,
+            'segmentIndex': segment_index,
+            'returnData': False,
+            'returnMetadata': False
+        }
+        while True:
+            response = s3vectors_client.list_vectors(**params)
+            keys.extend(vector['key'] for vector in response.get('vectors', []))
+            if not response.get('nextToken'):
+                return keys
+            params['nextToken'] = response['nextToken']
+
+    with ThreadPoolExecutor(max_workers=segment_count) as executor:
+        return {key for keys in executor.map(list_segment, range(segment_count)) for key in keys}
+
+
+def catch_up(
+    s3vectors_client,
+    vector_bucket: str,
+    source_index: str,
+    target_index: str,
+    transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]],
+    segment_count: int = MAX_SEGMENTS
+) -> int:
+    """
+    Copy vectors whose keys are in the source but not the target, i.e. writes
+    that landed behind a segment's list position while it was being copied.
+    Keys only in the target are left alone (writers may already write there);
+    existing keys overwritten in the source during the copy are not detected.
+    """
+    source_keys = list_keys(s3vectors_client, vector_bucket, source_index, segment_count)
+    target_keys = list_keys(s3vectors_client, vector_bucket, target_index, segment_count)
+    missing = sorted(source_keys - target_keys)
+
+    copied = 0
+    for start in range(0, len(missing), PUT_BATCH_SIZE):
+        vectors = get_vectors_by_keys(
+            s3vectors_client, vector_bucket, source_index, missing[start:start + PUT_BATCH_SIZE]
+        )
+        target_vectors = [
+            converted for converted in map(transform, vectors.values()) if converted is not None
+        ]
+        if target_vectors:
+            s3vectors_client.put_vectors(
+                vectorBucketName=vector_bucket,
+                indexName=target_index,
+                vectors=target_vectors
+            )
+        copied += len(target_vectors)
+    return copied
+
+
+def migrate_index(
+    s3vectors_client,
+    vector_bucket: str,
+    source_index: str,
+    target_index: str,
+    progress_file: str,
+    mode: str = 'copy',
+    target_dimension: int = None,
+    reembed_fn: Callable[[Dict[str, Any], int], List[float]] = None,
+    segment_count: int = MAX_SEGMENTS,
+    alias: str = None,
+    catch_up_pass: bool = True
+) -> Dict[str, Any]:
+    """
+    Migrate all vectors from source index to target index
+    - copy: write vectors unchanged
+    - truncate: truncate to target_dimension and renormalize (Matryoshka)
+    - reembed: call reembed_fn(metadata, target_dimension) for each vector
+    Once all segments are done, a catch-up pass copies vectors written to the
+    source in the meantime, then alias (when given) is switched to the target
+    index. Writers should already write to the target by then: vectors written
+    to the source after the catch-up pass are not copied.
+    """
+    if mode not in MIGRATION_MODES:
+        raise ValueError(f"Unsupported migration mode: {mode} (expected one of {MIGRATION_MODES})")
+    if mode in ('truncate', 'reembed') and not target_dimension:
+        raise ValueError(f"target_dimension is required for mode '{mode}'")
+    if mode == 'reembed' and reembed_fn is None:
+        raise ValueError("reembed_fn is required for mode 'reembed'")
+
+    def transform(vector: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        metadata = vector.get('metadata', {})
+        if mode == 'copy':
+            data = vector['data']['float32']
+        elif mode == 'truncate':
+            data = truncate_and_normalize(vector['data']['float32'], target_dimension)
+        else:
+            data = reembed_fn(metadata, target_dimension)
+            if not data:
+                return None
+        return {'key': vector['key'], 'data': {'float32': data}, 'metadata': metadata}
+
+    job = {
+        'vector_bucket': vector_bucket,
+        'source_index': source_index,
+        'target_index': target_index,
+        'mode': mode,
+        'target_dimension': target_dimension,
+        'segment_count': segment_count
+    }
+    progress = MigrationProgress(progress_file, job)
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=segment_count) as executor:
+        futures = [
+            executor.submit(
+                migrate_segment, s3vectors_client, vector_bucket, source_index,
+                target_index, segment_index, segment_count, transform, progress,
+                mode != 'reembed'
+            )
+            for segment_index in range(segment_count)
+        ]
+        for future in futures:
+            future.result()
+
+    complete = progress.is_complete(segment_count)
+    caught_up = 0
+    if complete and catch_up_pass:
+        caught_up = catch_up(
+            s3vectors_client, vector_bucket, source_index, target_index, transform, segment_count
+        )
+
+    result = {
+        'migrated_vectors': progress.total_migrated() + caught_up,
+        'caught_up_vectors': caught_up,
+        'complete': complete,
+        'elapsed_seconds': time.time() - start_time,
+        'cutover': None
+    }
+
+    if alias and result['complete']:
+        dimension = target_dimension
+        if dimension is None:
+            dimension = s3vectors_client.get_index(
+                vectorBucketName=vector_bucket, indexName=target_index
+            )['index']['dimension']
+        result['cutover'] = set_alias(alias, target_index, dimension)
+
+    return result
@@ -0,0 +1,203 @@
+"""
+Staged ingestion pipeline
+Runs items through a chain of stages (e.g. fetch -> preprocess -> embed ->
+write), each with its own worker threads, connected by bounded queues. When a
+later stage is slow its input queue fills up and the stages before it block,
+so back-pressure reaches the source instead of items piling up in memory.
+Every stage exposes queue depth, processed/failed counts and throughput.
+
+Only the standard library is used, so the module can be packaged with the
+Lambda function as-is.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, Any, List, Callable, Iterable, Optional, Tuple
+
+QUEUE_SIZE = 16  # Default items buffered in front of each stage
+BATCH_TIMEOUT_SECONDS = 0.5  # Longest a batch stage waits to fill a batch
+
+_DONE = object()  # End-of-stream marker, one per worker
+
+
+class Stage:
+    """
+    One pipeline stage
+    fn(item) returns the item for the next stage, or None to drop it. With
+    batch_size > 1, fn receives a list of up to batch_size items and returns
+    a list (or None).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any], Any],
+        workers: int = 1,
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = 1,
+        batch_timeout: float = BATCH_TIMEOUT_SECONDS
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.emitted = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def put(self, item):
+        """Enqueue an item, blocking while the stage is full (back-pressure)"""
+        self.queue.put(item)
+        depth = self.queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self.queue.qsize(),
+                'max_queue_depth': self.max_queue_depth,
+                'processed': self.processed,
+                'failed': self.failed,
+                'emitted': self.emitted,
+                'items_per_second': self.processed / elapsed if elapsed > 0 else 0.0,
+                # Share of worker time spent in fn; near 1.0 marks the bottleneck stage
+                'utilization': self.busy_seconds / (elapsed * self.workers) if elapsed > 0 else 0.0
+            }
+
+
+class Pipeline:
+    """Chain of stages fed from an iterable in the calling thread"""
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        on_error: Callable[[str, Any, Exception], None] = None,
+        on_result: Callable[[Any], None] = None
+    ):
+        self.stages = stages
+        self.on_error = on_error or (lambda stage, item, e: print(f"  ✗ {stage}: {e}"))
+        self.on_result = on_result or (lambda item: None)
+        self.start_time = None
+
+    def _emit(self, index: int, item):
+        if index + 1 < len(self.stages):
+            self.stages[index + 1].put(item)
+        else:
+            self.on_result(item)
+
+    def _next_batch(self, stage: Stage) -> Tuple[List[Any], bool]:
+        """Take up to batch_size items; returns (items, end of stream seen)"""
+        first = stage.queue.get()
+        if first is _DONE:
+            return [], True
+        items = [first]
+        deadline = time.monotonic() + stage.batch_timeout
+        while len(items) < stage.batch_size:
+            try:
+                item = stage.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return items, True
+            items.append(item)
+        return items, False
+
+    def _worker(self, index: int, remaining: List[int]):
+        stage = self.stages[index]
+        try:
+            self._process(index, stage)
+        finally:
+            # The last worker of a stage to finish closes the next stage
+            with stage.lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    self.stages[index + 1].queue.put(_DONE)
+
+    def _process(self, index: int, stage: Stage):
+        done = False
+        while not done:
+            if stage.batch_size > 1:
+                items, done = self._next_batch(stage)
+                if not items:
+                    continue
+                work = items
+            else:
+                work = stage.queue.get()
+                if work is _DONE:
+                    break
+                items = [work]
+
+            started = time.perf_counter()
+            try:
+                result = stage.fn(work)
+                failed = False
+            except Exception as e:
+                failed = True
+                for item in items:
+                    self.on_error(stage.name, item, e)
+            elapsed = time.perf_counter() - started
+
+            outputs = []
+            if not failed and result is not None:
+                outputs = result if stage.batch_size > 1 else [result]
+            with stage.lock:
+                stage.busy_seconds += elapsed
+                stage.processed += len(items)
+                stage.failed += len(items) if failed else 0
+                stage.emitted += len(outputs)
+            for output in outputs:
+                self._emit(index, output)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-stage counters, safe to call while running"""
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        return {stage.name: stage.stats(elapsed) for stage in self.stages}
+
+    def run(self, items: Iterable[Any], report_interval: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Feed items through all stages and wait for them to drain, returning final stats"""
+        self.start_time = time.perf_counter()
+        remaining = [stage.workers for stage in self.stages]
+        threads = [
+            threading.Thread(target=self._worker, args=(index, remaining), daemon=True)
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        stop_reporting = threading.Event()
+        if report_interval:
+            def report():
+                while not stop_reporting.wait(report_interval):
+                    print("  " + format_stats(self.stats()))
+            threading.Thread(target=report, daemon=True).start()
+
+        try:
+            for item in items:
+                self.stages[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.stages[0].queue.put(_DONE)
+            for thread in threads:
+                thread.join()
+            stop_reporting.set()
+        return self.stats()
+
+
+def format_stats(stats: Dict[str, Dict[str, Any]]) -> str:
+    """One-line summary: stage processed (rate, queue depth, utilization)"""
+    return " | ".join(
+        f"{name} {s['processed']} ({s['items_per_second']:.1f}/s, q{s['queue_depth']}, "
+        f"{s['utilization'] * 100:.0f}%)"
+        for name, s in stats.items()
+    )
@@ -0,0 +1,176 @@
+"""
+Offline k-nearest-neighbour graph for an exported index
+Computes exact cosine kNN for every vector of a snapshot with blocked matrix
+products in bounded memory, spread across processes, and stores the graph as
+compact memory-mapped arrays plus a key table so related items can be served
+locally without any remote calls
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+
+from rerank import normalize_rows
+from vector_snapshot import load_manifest, iter_snapshot
+
+GRAPH_MANIFEST_FILE = 'graph.json'
+BLOCK_SIZE = 4096  # Rows per query/corpus block (peak ~ BLOCK_SIZE^2 float32 similarities per worker)
+
+
+def knn_block(args: Tuple[str, int, int, int, int]) -> int:
+    """Compute neighbours for query rows [start, end) against the whole corpus"""
+    graph_dir, start, end, k, block_size = args
+    graph_path = Path(graph_dir)
+
+    vectors = np.load(graph_path / 'vectors.npy', mmap_mode='r')
+    total = vectors.shape[0]
+    queries = np.asarray(vectors[start:end], dtype=np.float32)
+    rows = end - start
+
+    best_similarity = np.full((rows, k), -np.inf, dtype=np.float32)
+    best_index = np.full((rows, k), -1, dtype=np.int64)
+
+    for corpus_start in range(0, total, block_size):
+        corpus_end = min(corpus_start + block_size, total)
+        block = np.asarray(vectors[corpus_start:corpus_end], dtype=np.float32)
+        similarity = queries @ block.T
+
+        # A vector is not its own neighbour
+        overlap = np.arange(max(start, corpus_start), min(end, corpus_end))
+        similarity[overlap - start, overlap - corpus_start] = -np.inf
+
+        # Merge this block into the running top-k
+        merged_similarity = np.concatenate([best_similarity, similarity], axis=1)
+        merged_index = np.concatenate([
+            best_index,
+            np.broadcast_to(np.arange(corpus_start, corpus_end), similarity.shape)
+        ], axis=1)
+        top = np.argpartition(-merged_similarity, k - 1, axis=1)[:, :k]
+        best_similarity = np.take_along_axis(merged_similarity, top, axis=1)
+        best_index = np.take_along_axis(merged_index, top, axis=1)
+
+    order = np.argsort(-best_similarity, axis=1)
+    best_similarity = np.take_along_axis(best_similarity, order, axis=1)
+    best_index = np.take_along_axis(best_index, order, axis=1)
+
+    neighbors = np.load(graph_path / 'neighbors.npy', mmap_mode='r+')
+    distances = np.load(graph_path / 'distances.npy', mmap_mode='r+')
+    neighbors[start:end] = best_index
+    distances[start:end] = 1.0 - best_similarity
+    neighbors.flush()
+    distances.flush()
+
+    return rows
+
+
+def build_knn_graph(
+    snapshot_dir: str,
+    graph_dir: str,
+    k: int = 10,
+    block_size: int = BLOCK_SIZE,
+    workers: int = None
+) -> Dict[str, Any]:
+    """Build an exact cosine kNN graph from a snapshot created by vector_snapshot"""
+    manifest = load_manifest(snapshot_dir)
+    total = manifest['total_vectors']
+    dimension = manifest['dimension']
+    if total < 2:
+        raise ValueError("Snapshot needs at least two vectors to build a kNN graph")
+    k = min(k, total - 1)
+
+    graph_path = Path(graph_dir)
+    graph_path.mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+
+    # Consolidate normalised vectors into one memory-mapped matrix shared by workers
+    vectors = np.lib.format.open_memmap(
+        graph_path / 'vectors.npy', mode='w+', dtype=np.float32, shape=(total, dimension)
+    )
+    keys, metadata = [], []
+    row = 0
+    for shard_keys, shard_vectors, shard_metadata in iter_snapshot(snapshot_dir, mmap_mode='r'):
+        vectors[row:row + len(shard_keys)] = normalize_rows(np.asarray(shard_vectors, dtype=np.float32))
+        row += len(shard_keys)
+        keys.extend(shard_keys)
+        metadata.extend(shard_metadata)
+    vectors.flush()
+    del vectors
+
+    # Compact outputs: int32 neighbour rows and float16 cosine distances
+    for name, dtype in (('neighbors.npy', np.int32), ('distances.npy', np.float16)):
+        output = np.lib.format.open_memmap(graph_path / name, mode='w+', dtype=dtype, shape=(total, k))
+        output.flush()
+        del output
+
+    tasks = [
+        (str(graph_path), start, min(start + block_size, total), k, block_size)
+        for start in range(0, total, block_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        processed = sum(executor.map(knn_block, tasks))
+
+    with open(graph_path / 'keys.json', 'w') as f:
+        json.dump({'key': keys, 'metadata': metadata}, f, separators=(',', ':'))
+
+    graph_manifest = {
+        'source_index': manifest['index_name'],
+        'vector_bucket': manifest['vector_bucket'],
+        'total_vectors': total,
+        'dimension': dimension,
+        'k': k,
+        'metric': 'cosine',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+    with open(graph_path / GRAPH_MANIFEST_FILE, 'w') as f:
+        json.dump(graph_manifest, f, indent=2)
+
+    # The consolidated vectors are only needed while building
+    os.remove(graph_path / 'vectors.npy')
+
+    graph_manifest['processed'] = processed
+    graph_manifest['elapsed_seconds'] = time.time() - start_time
+    return graph_manifest
+
+
+class KnnGraph:
+    """Read-only lookup of precomputed neighbours by vector key"""
+
+    def __init__(self, graph_dir: str):
+        graph_path = Path(graph_dir)
+        with open(graph_path / GRAPH_MANIFEST_FILE, 'r') as f:
+            self.manifest = json.load(f)
+        with open(graph_path / 'keys.json', 'r') as f:
+            table = json.load(f)
+        self.keys = table['key']
+        self.metadata = table['metadata']
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.neighbors = np.load(graph_path / 'neighbors.npy', mmap_mode='r')
+        self.distances = np.load(graph_path / 'distances.npy', mmap_mode='r')
+
+    @classmethod
+    def load_if_exists(cls, graph_dir: str) -> Optional['KnnGraph']:
+        """Load a graph if the directory contains one"""
+        if graph_dir and (Path(graph_dir) / GRAPH_MANIFEST_FILE).exists():
+            return cls(graph_dir)
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def related(self, key: str, top_k: int = None) -> List[Dict[str, Any]]:
+        """Get neighbours of a key in query_vectors result format"""
+        row = self.rows[key]
+        top_k = top_k or self.manifest['k']
+        return [
+            {
+                'key': self.keys[neighbor],
+                'distance': float(distance),
+                'metadata': self.metadata[neighbor]
+            }
+            for neighbor, distance in zip(self.neighbors[row][:top_k], self.distances[row][:top_k])
+        ]
@@ -0,0 +1,264 @@
+"""
+Local approximate nearest neighbour index (IVF + int8 quantisation)
+Built from an index snapshot created by vector_snapshot. Vectors are grouped
+into inverted lists by spherical k-means, scanned as int8 codes for the lists
+closest to the query, and the shortlist is rescored exactly against the
+full-precision vectors. Every array is stored as a .npy file and opened with
+memory mapping, so indexes larger than RAM work offline on a laptop CPU.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from rerank import normalize_rows
+from vector_snapshot import load_manifest, iter_snapshot
+
+ANN_MANIFEST_FILE = 'ann.json'
+BLOCK_SIZE = 8192  # Rows processed per block during build and exact search
+KMEANS_ITERATIONS = 10
+TRAIN_POINTS_PER_LIST = 64
+
+
+def quantize_int8(block: np.ndarray):
+    """Symmetric per-vector int8 quantisation, returning (codes, scales)"""
+    scales = np.abs(block).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.round(block / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, block_size: int = BLOCK_SIZE) -> np.ndarray:
+    """Assign each vector to its most similar centroid"""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block_size):
+        block = np.asarray(vectors[start:start + block_size], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def train_centroids(vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the (normalised) vectors"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * TRAIN_POINTS_PER_LIST)
+    sample_rows = np.sort(rng.choice(len(vectors), size=sample_size, replace=False))
+    sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+    centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = assign_lists(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        # Re-seed empty lists with random sample points
+        empty = np.flatnonzero(counts == 0)
+        sums[empty] = sample[rng.choice(sample_size, size=len(empty))]
+        centroids = normalize_rows(sums)
+
+    return centroids
+
+
+def build_ann_index(
+    snapshot_dir: str,
+    index_dir: str,
+    n_lists: int = None,
+    block_size: int = BLOCK_SIZE
+) -> Dict[str, Any]:
+    """Build an IVF-int8 index from a snapshot"""
+    manifest = load_manifest(snapshot_dir)
+    total = manifest['total_vectors']
+    dimension = manifest['dimension']
+    if n_lists is None:
+        n_lists = max(1, int(4 * np.sqrt(total)))
+    n_lists = min(n_lists, total)
+
+    index_path = Path(index_dir)
+    index_path.mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+
+    # Pass 1: consolidate normalised vectors (in snapshot order) into a scratch memmap
+    scratch_path = index_path / 'scratch.npy'
+    scratch = np.lib.format.open_memmap(scratch_path, mode='w+', dtype=np.float32, shape=(total, dimension))
+    keys, metadata = [], []
+    row = 0
+    for shard_keys, shard_vectors, shard_metadata in iter_snapshot(snapshot_dir, mmap_mode='r'):
+        scratch[row:row + len(shard_keys)] = normalize_rows(np.asarray(shard_vectors, dtype=np.float32))
+        row += len(shard_keys)
+        keys.extend(shard_keys)
+        metadata.extend(shard_metadata)
+    scratch.flush()
+
+    centroids = train_centroids(scratch, n_lists)
+    assignments = assign_lists(scratch, centroids, block_size)
+
+    # Pass 2: write vectors grouped by list so each list is a contiguous range
+    order = np.argsort(assignments, kind='stable')
+    offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assignments, minlength=n_lists))
+
+    vectors = np.lib.format.open_memmap(index_path / 'vectors.npy', mode='w+', dtype=np.float32, shape=(total, dimension))
+    codes = np.lib.format.open_memmap(index_path / 'codes.npy', mode='w+', dtype=np.int8, shape=(total, dimension))
+    scales = np.lib.format.open_memmap(index_path / 'scales.npy', mode='w+', dtype=np.float32, shape=(total,))
+    for start in range(0, total, block_size):
+        rows = order[start:start + block_size]
+        # Gather in ascending row order (sequential reads), then restore list order
+        sorted_rows = np.sort(rows)
+        block = np.asarray(scratch[sorted_rows], dtype=np.float32)[np.searchsorted(sorted_rows, rows)]
+        vectors[start:start + len(rows)] = block
+        codes[start:start + len(rows)], scales[start:start + len(rows)] = quantize_int8(block)
+    for array in (vectors, codes, scales):
+        array.flush()
+    del vectors, codes, scales, scratch
+    scratch_path.unlink()
+
+    np.save(index_path / 'centroids.npy', centroids.astype(np.float32))
+    np.save(index_path / 'offsets.npy', offsets)
+    with open(index_path / 'keys.json', 'w') as f:
+        json.dump({
+            'key': [keys[i] for i in order],
+            'metadata': [metadata[i] for i in order]
+        }, f, separators=(',', ':'))
+
+    ann_manifest = {
+        'source_index': manifest['index_name'],
+        'vector_bucket': manifest['vector_bucket'],
+        'total_vectors': total,
+        'dimension': dimension,
+        'n_lists': n_lists,
+        'quantization': 'int8',
+        'metric': 'cosine',
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    }
+    with open(index_path / ANN_MANIFEST_FILE, 'w') as f:
+        json.dump(ann_manifest, f, indent=2)
+
+    ann_manifest['elapsed_seconds'] = time.time() - start_time
+    return ann_manifest
+
+
+class LocalAnnIndex:
+    """Memory-mapped IVF-int8 index with exact rescoring of the shortlist"""
+
+    def __init__(self, index_dir: str):
+        index_path = Path(index_dir)
+        with open(index_path / ANN_MANIFEST_FILE, 'r') as f:
+            self.manifest = json.load(f)
+        with open(index_path / 'keys.json', 'r') as f:
+            table = json.load(f)
+        self.keys = table['key']
+        self.metadata = table['metadata']
+        self.centroids = np.load(index_path / 'centroids.npy')
+        self.offsets = np.load(index_path / 'offsets.npy')
+        self.vectors = np.load(index_path / 'vectors.npy', mmap_mode='r')
+        self.codes = np.load(index_path / 'codes.npy', mmap_mode='r')
+        self.scales = np.load(index_path / 'scales.npy', mmap_mode='r')
+
+    @classmethod
+    def load_if_exists(cls, index_dir: str) -> Optional['LocalAnnIndex']:
+        """Load an index if the directory contains one"""
+        if index_dir and (Path(index_dir) / ANN_MANIFEST_FILE).exists():
+            return cls(index_dir)
+        return None
+
+    def _results(self, rows: np.ndarray, similarities: np.ndarray) -> List[Dict[str, Any]]:
+        return [
+            {
+                'key': self.keys[row],
+                'distance': float(1.0 - similarity),
+                'metadata': self.metadata[row]
+            }
+            for row, similarity in zip(rows, similarities)
+        ]
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        nprobe: int = 8,
+        rescore: int = None
+    ) -> List[Dict[str, Any]]:
+        """Approximate search: scan int8 codes of the nprobe closest lists, then rescore exactly"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        rescore = max(top_k, rescore or top_k * 10)
+
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        candidate_rows, approx = [], []
+        for list_id in lists:
+            start, end = self.offsets[list_id], self.offsets[list_id + 1]
+            if start == end:
+                continue
+            codes = np.asarray(self.codes[start:end], dtype=np.float32)
+            approx.append((codes @ query) * self.scales[start:end])
+            candidate_rows.append(np.arange(start, end))
+        if not candidate_rows:
+            return []
+
+        candidate_rows = np.concatenate(candidate_rows)
+        approx = np.concatenate(approx)
+        if len(approx) > rescore:
+            shortlist = np.argpartition(-approx, rescore - 1)[:rescore]
+            candidate_rows = candidate_rows[shortlist]
+
+        # Exact rescoring against full-precision vectors
+        candidate_rows = np.sort(candidate_rows)
+        exact = np.asarray(self.vectors[candidate_rows], dtype=np.float32) @ query
+        best = np.argsort(-exact)[:top_k]
+        return self._results(candidate_rows[best], exact[best])
+
+    def exact_search(self, query_embedding: List[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """Brute-force search over all vectors (ground truth for recall)"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        similarities = np.empty(len(self.vectors), dtype=np.float32)
+        for start in range(0, len(self.vectors), BLOCK_SIZE):
+            block = np.asarray(self.vectors[start:start + BLOCK_SIZE], dtype=np.float32)
+            similarities[start:start + len(block)] = block @ query
+        top_k = min(top_k, len(similarities))
+        best = np.argpartition(-similarities, top_k - 1)[:top_k]
+        best = best[np.argsort(-similarities[best])]
+        return self._results(best, similarities[best])
+
+    def evaluate(
+        self,
+        num_queries: int = 100,
+        top_k: int = 10,
+        nprobe: int = 8,
+        rescore: int = None,
+        seed: int = 0
+    ) -> Dict[str, Any]:
+        """Measure recall@k and latency against exact search, using stored vectors as queries"""
+        rng = np.random.default_rng(seed)
+        rows = rng.choice(len(self.vectors), size=min(num_queries, len(self.vectors)), replace=False)
+
+        recalls, ann_times, exact_times = [], [], []
+        for row in rows:
+            query = np.asarray(self.vectors[row], dtype=np.float32)
+
+            start_time = time.perf_counter()
+            ann = self.search(query, top_k, nprobe, rescore)
+            ann_times.append(time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            exact = self.exact_search(query, top_k)
+            exact_times.append(time.perf_counter() - start_time)
+
+            truth = {r['key'] for r in exact}
+            recalls.append(len(truth & {r['key'] for r in ann}) / len(truth))
+
+        return {
+            'queries': len(rows),
+            'top_k': top_k,
+            'nprobe': nprobe,
+            'recall_at_k': float(np.mean(recalls)),
+            'ann_p50_ms': float(np.percentile(ann_times, 50) * 1000),
+            'ann_p99_ms': float(np.percentile(ann_times, 99) * 1000),
+            'exact_p50_ms': float(np.percentile(exact_times, 50) * 1000),
+            'exact_p99_ms': float(np.percentile(exact_times, 99) * 1000)
+        }
@@ -0,0 +1,464 @@
+"""
+Segmented video and audio embedding with Nova MME
+Long media is embedded with the model's asynchronous SEGMENTED_EMBEDDING task:
+Nova MME splits each file into fixed-length segments and embeds them in one
+async invocation. A job tracker keeps several invocations in flight at once,
+polls them, and writes one vector per segment with its time offsets as
+metadata. Job state is checkpointed to a local JSON file so an interrupted
+run resumes polling instead of resubmitting.
+
+LocalAsyncInvoker stands in for the Bedrock async invoke API (and its S3
+output) so the whole flow can be exercised without AWS.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from embedding_models import NOVA_MME_MODEL_ID, get_model
+from vector_snapshot import PUT_BATCH_SIZE
+
+# Segment length accepted by Nova MME segmentationConfig (1-30 seconds)
+SEGMENT_SECONDS = 15
+POLL_INTERVAL_SECONDS = 10
+MAX_IN_FLIGHT = 8  # Concurrent async invocations (keep below the account quota)
+WRITE_WORKERS = 4  # Threads writing finished jobs' segments to S3 Vectors
+
+# Async job result layout written by Nova MME under <output uri>/<invocation id>/
+RESULT_MANIFEST = 'segmented-embedding-result.json'
+
+# File extension -> (media type, Nova MME format)
+MEDIA_FORMATS = {
+    '.mp4': ('video', 'mp4'),
+    '.mov': ('video', 'mov'),
+    '.mkv': ('video', 'mkv'),
+    '.webm': ('video', 'webm'),
+    '.flv': ('video', 'flv'),
+    '.mpeg': ('video', 'mpeg'),
+    '.mpg': ('video', 'mpg'),
+    '.wmv': ('video', 'wmv'),
+    '.3gp': ('video', '3gp'),
+    '.mp3': ('audio', 'mp3'),
+    '.wav': ('audio', 'wav'),
+    '.ogg': ('audio', 'ogg')
+}
+
+
+def media_format(key: str) -> Optional[Tuple[str, str]]:
+    """(media type, format) for a video or audio object key, or None for other files"""
+    return MEDIA_FORMATS.get(os.path.splitext(key.lower())[1])
+
+
+def build_segmented_input(
+    s3_uri: str,
+    media_type: str,
+    fmt: str,
+    dimension: int,
+    segment_seconds: int = SEGMENT_SECONDS,
+    embedding_mode: str = 'AUDIO_VIDEO_COMBINED'
+) -> Dict[str, Any]:
+    """Build Nova MME model input for a segmented embedding of a video or audio file in S3"""
+    content = {
+        "file_path": s3_uri,
+        "format": fmt,
+        "segment_seconds": segment_seconds,
+        "index": {"dimensions": dimension}
+    }
+    user_params = None
+    if media_type == 'video':
+        # AUDIO_VIDEO_COMBINED = one vector per segment covering picture and sound
+        user_params = {"segmentedEmbeddingParams": {"video": {"embeddingMode": embedding_mode}}}
+    return get_model(NOVA_MME_MODEL_ID).build_payload(media_type, content, user_params)
+
+
+class OutputReader:
+    """Read async job output from S3 (s3:// URIs) or the local filesystem (other paths)"""
+
+    def __init__(self, s3_client=None):
+        self.s3_client = s3_client
+
+    def __call__(self, uri: str) -> bytes:
+        if uri.startswith('s3://'):
+            bucket, _, key = uri[len('s3://'):].partition('/')
+            return self.s3_client.get_object(Bucket=bucket, Key=key)['Body'].read()
+        with open(uri, 'rb') as f:
+            return f.read()
+
+
+def read_segments(read_output: Callable[[str], bytes], output_uri: str) -> List[Dict[str, Any]]:
+    """
+    Read the segments of a completed job from its output folder
+    Returns [{'segment_index', 'start_seconds', 'end_seconds', 'embedding_type', 'embedding'}]
+    ordered by start time
+    """
+    manifest = json.loads(read_output(f"{output_uri.rstrip('/')}/{RESULT_MANIFEST}"))
+
+    segments = []
+    for result in manifest.get('embeddingResults', []):
+        if result.get('status', 'SUCCESS') != 'SUCCESS':
+            print(f"  Skipping {result.get('embeddingType')} result: {result.get('failureReason')}")
+            continue
+        for line in read_output(result['outputFileUri']).decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get('status', 'SUCCESS') != 'SUCCESS':
+                continue
+            segment = item.get('segmentMetadata', {})
+            segments.append({
+                'segment_index': segment.get('segmentIndex', len(segments)),
+                'start_seconds': segment.get('segmentStartSeconds', 0.0),
+                'end_seconds': segment.get('segmentEndSeconds', 0.0),
+                'embedding_type': result.get('embeddingType', ''),
+                'embedding': item['embedding']
+            })
+
+    segments.sort(key=lambda s: (s['start_seconds'], s['embedding_type']))
+    return segments
+
+
+def segment_vector_key(source_uri: str, segment: Dict[str, Any]) -> str:
+    """Deterministic key per segment, so re-running a job overwrites instead of duplicating"""
+    name = f"{source_uri}#{segment['embedding_type']}#{segment['segment_index']}"
+    return hashlib.sha256(name.encode('utf-8')).hexdigest()[:32]
+
+
+def write_segments(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    source_uri: str,
+    media_type: str,
+    segments: List[Dict[str, Any]]
+) -> int:
+    """Write one vector per segment with its time offsets as metadata"""
+    bucket, _, key = source_uri[len('s3://'):].partition('/')
+    vectors = [
+        {
+            'key': segment_vector_key(source_uri, segment),
+            'data': {'float32': segment['embedding']},
+            'metadata': {
+                'source_bucket': bucket,
+                'source_key': key,
+                's3_uri': source_uri,
+                'media_type': media_type,
+                'embedding_type': segment['embedding_type'],
+                'segment_index': segment['segment_index'],
+                'start_seconds': segment['start_seconds'],
+                'end_seconds': segment['end_seconds']
+            }
+        }
+        for segment in segments
+    ]
+    for start in range(0, len(vectors), PUT_BATCH_SIZE):
+        s3vectors_client.put_vectors(
+            vectorBucketName=vector_bucket,
+            indexName=index_name,
+            vectors=vectors[start:start + PUT_BATCH_SIZE]
+        )
+    return len(vectors)
+
+
+class AsyncJobTracker:
+    """
+    Submit async segmented-embedding jobs with a bounded number in flight,
+    poll them together and hand each finished job's segments to a callback
+    """
+
+    def __init__(
+        self,
+        bedrock_client,
+        output_uri: str,
+        read_output: Callable[[str], bytes],
+        jobs_file: str = None,
+        model_id: str = NOVA_MME_MODEL_ID,
+        max_in_flight: int = MAX_IN_FLIGHT,
+        poll_interval: float = POLL_INTERVAL_SECONDS
+    ):
+        self.bedrock_client = bedrock_client
+        self.output_uri = output_uri
+        self.read_output = read_output
+        self.jobs_file = jobs_file
+        self.model_id = model_id
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        self.jobs = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self.jobs_file and os.path.exists(self.jobs_file):
+            with open(self.jobs_file, 'r') as f:
+                return json.load(f)
+        return {}
+
+    def _save(self):
+        if not self.jobs_file:
+            return
+        tmp_file = f"{self.jobs_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.jobs, f, indent=2)
+        os.replace(tmp_file, self.jobs_file)
+
+    def _start(self, source_uri: str, media_type: str, model_input: Dict[str, Any]):
+        response = self.bedrock_client.start_async_invoke(
+            modelId=self.model_id,
+            modelInput=model_input,
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': self.output_uri}}
+        )
+        self.jobs[source_uri] = {
+            'invocation_arn': response['invocationArn'],
+            'media_type': media_type,
+            'status': 'InProgress',
+            'submitted_at': time.time()
+        }
+        self._save()
+
+    def _collect_writes(self, writes: List[Tuple[str, Future]], counts: Dict[str, int], block: bool = False):
+        """
+        Mark jobs Completed once their segment writes succeed; a failed write
+        leaves the job Embedded so the next run writes it again
+        """
+        if block:
+            wait([future for _, future in writes])
+        for source_uri, future in [w for w in writes if w[1].done()]:
+            writes.remove((source_uri, future))
+            job = self.jobs[source_uri]
+            error = future.exception()
+            if error is not None:
+                print(f"  ✗ Writing {source_uri} failed: {error}")
+                job['error'] = str(error)
+                counts['failed'] += 1
+            else:
+                job['status'] = 'Completed'
+                job.pop('error', None)
+                counts['completed'] += 1
+            self._save()
+
+    def _job_output_uri(self, job: Dict[str, Any], response: Dict[str, Any]) -> str:
+        # Results go to a folder named after the invocation id under the output URI
+        base = response.get('outputDataConfig', {}).get('s3OutputDataConfig', {}).get('s3Uri', self.output_uri)
+        return f"{base.rstrip('/')}/{job['invocation_arn'].rsplit('/', 1)[-1]}"
+
+    def run(
+        self,
+        inputs: Iterator[Tuple[str, str, Dict[str, Any]]],
+        on_complete: Callable[[str, Dict[str, Any], List[Dict[str, Any]]], None]
+    ) -> Dict[str, int]:
+        """
+        Process (source_uri, media_type, model_input) tuples until all jobs finish
+        on_complete(source_uri, job, segments) runs for each finished invocation
+        and may return a Future for the write of the segments. A job is Embedded
+        until that write succeeds and Completed after it. Completed jobs in the
+        jobs file are skipped; jobs still in progress, and Embedded jobs whose
+        write did not finish, are polled again (re-reading the invocation
+        output) rather than resubmitted; failed jobs are submitted again
+        """
+        counts = {'submitted': 0, 'completed': 0, 'failed': 0, 'skipped': 0}
+        pending = iter(inputs)
+        exhausted = False
+        in_flight = [uri for uri, job in self.jobs.items() if job['status'] in ('InProgress', 'Embedded')]
+        resumed = set(in_flight)
+        writes = []
+
+        while in_flight or not exhausted:
+            # Top up to max_in_flight, pulling inputs lazily
+            while not exhausted and len(in_flight) < self.max_in_flight:
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                    break
+                source_uri, media_type, model_input = item
+                job = self.jobs.get(source_uri)
+                if job is not None and job['status'] != 'Failed':
+                    # Completed earlier, or resumed above and already being polled
+                    if job['status'] == 'Completed' and source_uri not in resumed:
+                        counts['skipped'] += 1
+                    continue
+                self._start(source_uri, media_type, model_input)
+                in_flight.append(source_uri)
+                counts['submitted'] += 1
+
+            still_running = []
+            for source_uri in in_flight:
+                job = self.jobs[source_uri]
+                response = self.bedrock_client.get_async_invoke(invocationArn=job['invocation_arn'])
+                status = response['status']
+                if status == 'InProgress':
+                    still_running.append(source_uri)
+                    continue
+
+                if status == 'Completed':
+                    try:
+                        segments = read_segments(self.read_output, self._job_output_uri(job, response))
+                        write = on_complete(source_uri, job, segments)
+                    except Exception as e:
+                        job['status'] = 'Failed'
+                        job['error'] = str(e)
+                        counts['failed'] += 1
+                        self._save()
+                        continue
+                    job['status'] = 'Embedded'
+                    job['segments'] = len(segments)
+                    self._save()
+                    if not isinstance(write, Future):
+                        # Written synchronously by on_complete
+                        write = Future()
+                        write.set_result(None)
+                    writes.append((source_uri, write))
+                else:
+                    job['status'] = status
+                    job['error'] = response.get('failureMessage', status)
+                    counts['failed'] += 1
+                    self._save()
+
+            self._collect_writes(writes, counts)
+            in_flight = still_running
+            if in_flight:
+                time.sleep(self.poll_interval)
+
+        self._collect_writes(writes, counts, block=True)
+        return counts
+
+
+def embed_media(
+    tracker: AsyncJobTracker,
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    sources: Iterator[str],
+    dimension: int,
+    segment_seconds: int = SEGMENT_SECONDS,
+    write_workers: int = WRITE_WORKERS
+) -> Dict[str, int]:
+    """
+    Embed every video/audio S3 URI in sources, one vector per segment
+    Segment writes run on a thread pool so polling continues while finished
+    jobs are written; a job is only recorded as Completed once its write
+    succeeds, so a failed write is retried on the next run
+    """
+    def inputs():
+        for source_uri in sources:
+            fmt = media_format(source_uri)
+            if fmt is None:
+                continue
+            media_type, media_fmt = fmt
+            yield source_uri, media_type, build_segmented_input(
+                source_uri, media_type, media_fmt, dimension, segment_seconds
+            )
+
+    executor = ThreadPoolExecutor(max_workers=write_workers)
+    writes = []
+
+    def on_complete(source_uri: str, job: Dict[str, Any], segments: List[Dict[str, Any]]):
+        print(f"  ✓ {source_uri}: {len(segments)} segments")
+        future = executor.submit(
+            write_segments, s3vectors_client, vector_bucket, index_name, source_uri, job['media_type'], segments
+        )
+        writes.append(future)
+        return future
+
+    try:
+        counts = tracker.run(inputs(), on_complete)
+        counts['vectors'] = sum(future.result() for future in writes if future.exception() is None)
+    finally:
+        executor.shutdown(wait=True)
+    return counts
+
+
+class LocalAsyncInvoker:
+    """
+    Local stand-in for the Bedrock async invoke API
+    Implements start_async_invoke/get_async_invoke and writes Nova MME style
+    segmented results (manifest + JSON lines) to the local output folder after
+    a few polls, with deterministic unit-length embeddings per segment.
+    """
+
+    def __init__(
+        self,
+        durations: Dict[str, float] = None,
+        default_duration: float = 60.0,
+        polls_until_done: int = 2,
+        fail_uris: Tuple[str, ...] = ()
+    ):
+        self.durations = durations or {}
+        self.default_duration = default_duration
+        self.polls_until_done = polls_until_done
+        self.fail_uris = set(fail_uris)
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.max_in_flight = 0
+
+    def start_async_invoke(self, modelId: str, modelInput: Dict[str, Any], outputDataConfig: Dict[str, Any], **kwargs):
+        invocation_id = uuid.uuid4().hex
+        arn = f"arn:aws:bedrock:local:000000000000:async-invoke/{invocation_id}"
+        with self.lock:
+            self.jobs[arn] = {
+                'input': modelInput,
+                'output_uri': outputDataConfig['s3OutputDataConfig']['s3Uri'],
+                'polls': 0,
+                'status': 'InProgress'
+            }
+            running = sum(1 for job in self.jobs.values() if job['status'] == 'InProgress')
+            self.max_in_flight = max(self.max_in_flight, running)
+        return {'invocationArn': arn}
+
+    def get_async_invoke(self, invocationArn: str, **kwargs):
+        with self.lock:
+            job = self.jobs[invocationArn]
+            job['polls'] += 1
+            if job['status'] == 'InProgress' and job['polls'] >= self.polls_until_done:
+                job['status'] = self._finish(invocationArn, job)
+            response = {
+                'invocationArn': invocationArn,
+                'status': job['status'],
+                'outputDataConfig': {'s3OutputDataConfig': {'s3Uri': job['output_uri']}}
+            }
+            if job['status'] == 'Failed':
+                response['failureMessage'] = 'Simulated failure'
+            return response
+
+    def _finish(self, arn: str, job: Dict[str, Any]) -> str:
+        params = job['input']['segmentedEmbeddingParams']
+        media_type = 'video' if 'video' in params else 'audio'
+        media = params[media_type]
+        source_uri = media['source']['s3Location']['uri']
+        if source_uri in self.fail_uris:
+            return 'Failed'
+
+        dimension = params['embeddingDimension']
+        step = media['segmentationConfig']['durationSeconds']
+        duration = self.durations.get(source_uri, self.default_duration)
+        embedding_type = media.get('embeddingMode', 'AUDIO')
+
+        folder = Path(job['output_uri']) / arn.rsplit('/', 1)[-1]
+        folder.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for index, start in enumerate(np.arange(0, duration, step)):
+            seed = int.from_bytes(hashlib.sha256(f"{source_uri}#{index}".encode('utf-8')).digest()[:4], 'big')
+            vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+            lines.append(json.dumps({
+                'embedding': (vector / np.linalg.norm(vector)).tolist(),
+                'segmentMetadata': {
+                    'segmentIndex': index,
+                    'segmentStartSeconds': float(start),
+                    'segmentEndSeconds': float(min(start + step, duration))
+                },
+                'status': 'SUCCESS'
+            }))
+        result_file = folder / f"embedding-{embedding_type.lower()}.jsonl"
+        result_file.write_text('\n'.join(lines) + '\n')
+        (folder / RESULT_MANIFEST).write_text(json.dumps({
+            'sourceFileUri': source_uri,
+            'embeddingDimension': dimension,
+            'embeddingResults': [
+                {'embeddingType': embedding_type, 'status': 'SUCCESS', 'outputFileUri': str(result_file)}
+            ]
+        }))
+        return 'Completed'
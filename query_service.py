@@ -0,0 +1,333 @@
+"""
+Long-running text search service
+A small asyncio HTTP server that wraps embed-and-query behind warm, pooled
+AWS clients. Identical in-flight queries share one Bedrock call and one
+vector query, and results are cached per (index, query, topK, filter) for a
+TTL, so interactive callers only pay model plus vector-search time.
+
+Endpoints:
+  POST /search  {"index", "query", "top_k", "model_id", "dimension", "filter"}
+  GET  /stats   request, cache and coalescing counters, adaptive concurrency limits
+  GET  /health
+"""
+
+import asyncio
+import functools
+import json
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+import boto3
+from botocore.config import Config
+
+from adaptive_concurrency import get_limiter, limiter_metrics
+from embedding_models import NOVA_MME_MODEL_ID, generate_text_embedding, get_model
+from index_config import resolve_index
+
+CACHE_TTL_SECONDS = 300
+CACHE_SIZE = 1024
+MAX_WORKERS = 16  # Threads for blocking boto3 calls (also the connection pool size)
+DEFAULT_PORT = 8765
+DEFAULT_TOP_K = 5
+MAX_TOP_K = 100  # query_vectors topK limit
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 502: 'Bad Gateway'}
+
+
+class InvalidRequest(ValueError):
+    """A /search body that fails validation (answered with 400)"""
+
+
+def parse_search_request(body: bytes) -> Dict[str, Any]:
+    """
+    Validate a /search body and fill in defaults, resolving the index alias
+    Only malformed requests raise InvalidRequest; errors reading the alias
+    file propagate unchanged
+    """
+    try:
+        request = json.loads(body or b'{}')
+    except ValueError as e:
+        raise InvalidRequest(f"body is not valid JSON: {e}")
+    if not isinstance(request, dict):
+        raise InvalidRequest("body must be a JSON object")
+
+    for field in ('index', 'query'):
+        if not isinstance(request.get(field), str) or not request[field].strip():
+            raise InvalidRequest(f"'{field}' must be a non-empty string")
+
+    model_id = request.get('model_id', NOVA_MME_MODEL_ID)
+    try:
+        get_model(model_id)
+    except (TypeError, ValueError):
+        raise InvalidRequest(f"unknown model_id: {model_id!r}")
+
+    top_k = request.get('top_k', DEFAULT_TOP_K)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or not 1 <= top_k <= MAX_TOP_K:
+        raise InvalidRequest(f"'top_k' must be an integer from 1 to {MAX_TOP_K}")
+
+    dimension = request.get('dimension')
+    if dimension is not None and (isinstance(dimension, bool) or not isinstance(dimension, int) or dimension < 1):
+        raise InvalidRequest("'dimension' must be a positive integer")
+
+    metadata_filter = request.get('filter')
+    if metadata_filter is not None and not isinstance(metadata_filter, dict):
+        raise InvalidRequest("'filter' must be a JSON object")
+
+    # Resolved per request so an alias cutover takes effect immediately
+    index = resolve_index(request['index'], dimension)
+    if not index.get('dimension'):
+        raise InvalidRequest(f"unknown dimension for index '{request['index']}'; pass 'dimension'")
+
+    return {
+        'index': index,
+        'query': request['query'],
+        'model_id': model_id,
+        'top_k': top_k,
+        'filter': metadata_filter
+    }
+
+
+class TTLCache:
+    """LRU cache whose entries expire after a fixed time to live"""
+
+    def __init__(self, ttl_seconds: float = CACHE_TTL_SECONDS, max_entries: int = CACHE_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class QueryService:
+    """Embed-and-query with warm clients, in-flight coalescing and a result cache"""
+
+    def __init__(
+        self,
+        region: str,
+        vector_bucket: str,
+        cache_ttl: float = CACHE_TTL_SECONDS,
+        cache_size: int = CACHE_SIZE,
+        max_workers: int = MAX_WORKERS
+    ):
+        # Clients are created once and shared by all requests
+        client_config = Config(max_pool_connections=max_workers)
+        self.bedrock_client = boto3.client('bedrock-runtime', region_name=region, config=client_config)
+        self.s3vectors_client = boto3.client('s3vectors', region_name=region, config=client_config)
+        self.vector_bucket = vector_bucket
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.cache = TTLCache(cache_ttl, cache_size)
+
+        # In-flight futures, keyed like the work they stand for
+        self._embedding_flights = {}
+        self._search_flights = {}
+
+        self.stats = {
+            'requests': 0,
+            'cache_hits': 0,
+            'coalesced': 0,
+            'bedrock_calls': 0,
+            'vector_queries': 0,
+            'errors': 0
+        }
+
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking call on the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def _single_flight(self, flights: Dict, key, factory):
+        """Share one execution of factory() among all callers with the same key"""
+        future = flights.get(key)
+        if future is not None:
+            self.stats['coalesced'] += 1
+        else:
+            future = asyncio.ensure_future(factory())
+            flights[key] = future
+            future.add_done_callback(lambda _: flights.pop(key, None))
+        # Shield so one caller disconnecting does not cancel the shared work
+        return await asyncio.shield(future)
+
+    async def embed(self, model_id: str, text: str, dimension: int) -> List[float]:
+        """Text embedding, coalesced across identical in-flight requests"""
+        async def call():
+            self.stats['bedrock_calls'] += 1
+            return await self._run(
+                get_limiter('bedrock').call, generate_text_embedding, self.bedrock_client, model_id, text, dimension
+            )
+
+        return await self._single_flight(self._embedding_flights, (model_id, text, dimension), call)
+
+    def query_vectors(
+        self,
+        index_name: str,
+        embedding: List[float],
+        top_k: int,
+        metadata_filter: Dict[str, Any] = None
+    ) -> List[Dict[str, Any]]:
+        """Query S3 Vectors (blocking)"""
+        params = {
+            'vectorBucketName': self.vector_bucket,
+            'indexName': index_name,
+            'queryVector': {'float32': embedding},
+            'topK': top_k,
+            'returnDistance': True,
+            'returnMetadata': True
+        }
+        if metadata_filter:
+            params['filter'] = metadata_filter
+        return get_limiter('s3vectors').call(self.s3vectors_client.query_vectors, **params).get('vectors', [])
+
+    async def search(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle one search request, as validated by parse_search_request"""
+        index = request['index']
+        text = request['query']
+        model_id = request['model_id']
+        top_k = request['top_k']
+        metadata_filter = request['filter']
+
+        # The physical index is part of the cache key
+        key = (model_id, index['index'], index['dimension'], text, top_k,
+               json.dumps(metadata_filter, sort_keys=True))
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.stats['cache_hits'] += 1
+            return {**cached, 'cached': True}
+
+        async def run():
+            start_time = time.perf_counter()
+            embedding = await self.embed(model_id, text, index['dimension'])
+            embed_time = time.perf_counter()
+            self.stats['vector_queries'] += 1
+            results = await self._run(self.query_vectors, index['index'], embedding, top_k, metadata_filter)
+            end_time = time.perf_counter()
+
+            response = {
+                'index': index['index'],
+                'results': results,
+                'timings': {
+                    'embed_seconds': embed_time - start_time,
+                    'query_seconds': end_time - embed_time,
+                    'total_seconds': end_time - start_time
+                }
+            }
+            self.cache.put(key, response)
+            return response
+
+        response = await self._single_flight(self._search_flights, key, run)
+        return {**response, 'cached': False}
+
+    async def dispatch(self, method: str, path: str, body: bytes):
+        """Route a request, returning (status, payload)"""
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/stats':
+            return 200, {
+                **self.stats,
+                'cache_entries': len(self.cache),
+                'in_flight': len(self._search_flights),
+                'concurrency': limiter_metrics()
+            }
+        if method == 'POST' and path == '/search':
+            self.stats['requests'] += 1
+            try:
+                request = parse_search_request(body)
+            except InvalidRequest as e:
+                self.stats['errors'] += 1
+                return 400, {'error': f"Invalid request: {e}"}
+            try:
+                return 200, await self.search(request)
+            except Exception as e:
+                self.stats['errors'] += 1
+                return 502, {'error': str(e)}
+        return 404, {'error': f"No route for {method} {path}"}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Minimal HTTP/1.1 with keep-alive and JSON bodies"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, payload = await self.dispatch(method, path, body)
+                data = json.dumps(payload).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data
+                )
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT):
+        """Serve until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def search_via_service(
+    service_url: str,
+    index: str,
+    query: str,
+    top_k: int = 5,
+    model_id: str = NOVA_MME_MODEL_ID,
+    dimension: int = None,
+    metadata_filter: Dict[str, Any] = None,
+    timeout: float = 30
+) -> Dict[str, Any]:
+    """Run a search through a running QueryService, returning {'index', 'results', 'timings', 'cached'}"""
+    payload = {'index': index, 'query': query, 'top_k': top_k, 'model_id': model_id}
+    if dimension:
+        payload['dimension'] = dimension
+    if metadata_filter:
+        payload['filter'] = metadata_filter
+
+    request = urllib.request.Request(
+        f"{service_url.rstrip('/')}/search",
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(f"Query service error {e.code}: {json.loads(e.read()).get('error')}")
@@ -0,0 +1,138 @@
+"""
+Over-fetch and local re-rank of query results
+Fetches k x N candidates, then reranks them locally with vectorised cosine
+similarity and MMR (maximal marginal relevance) diversification, collapsing
+near-duplicate images (burst shots, re-uploads) into the first one kept
+"""
+
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+
+from stored_vectors import get_vectors_by_keys
+
+MAX_TOP_K = 100  # query_vectors topK upper limit
+MMR_LAMBDA = 0.7  # 1.0 = pure relevance, 0.0 = pure diversity
+DUPLICATE_DISTANCE = 0.05  # Cosine distance below which two results are near-duplicates
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalise each row of a matrix"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_rerank(
+    query_embedding: List[float],
+    candidates: List[Dict[str, Any]],
+    candidate_vectors: np.ndarray,
+    top_k: int,
+    mmr_lambda: float = MMR_LAMBDA,
+    duplicate_distance: float = DUPLICATE_DISTANCE
+) -> List[Dict[str, Any]]:
+    """
+    Select top_k candidates with MMR, dropping near-duplicates of already selected items
+    Each returned result gets 'mmr_score' and 'duplicates' (keys collapsed into it)
+    """
+    if not candidates:
+        return []
+
+    vectors = normalize_rows(np.asarray(candidate_vectors, dtype=np.float32))
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+
+    # All similarities computed up front as two matrix products
+    relevance = vectors @ query
+    pairwise = vectors @ vectors.T
+
+    remaining = np.ones(len(candidates), dtype=bool)
+    max_similarity_to_selected = np.full(len(candidates), -np.inf, dtype=np.float32)
+    selected = []
+
+    while len(selected) < top_k and remaining.any():
+        if selected:
+            scores = mmr_lambda * relevance - (1.0 - mmr_lambda) * max_similarity_to_selected
+        else:
+            scores = relevance.copy()
+        scores[~remaining] = -np.inf
+
+        best = int(np.argmax(scores))
+        remaining[best] = False
+
+        result = dict(candidates[best])
+        result['mmr_score'] = float(scores[best])
+        result['duplicates'] = []
+
+        # Collapse everything within duplicate_distance of the chosen item
+        duplicates = np.flatnonzero(remaining & (1.0 - pairwise[best] < duplicate_distance))
+        for dup in duplicates:
+            result['duplicates'].append(candidates[dup].get('key'))
+        remaining[duplicates] = False
+
+        max_similarity_to_selected = np.maximum(max_similarity_to_selected, pairwise[best])
+        selected.append(result)
+
+    return selected
+
+
+def query_with_rerank(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    query_embedding: List[float],
+    top_k: int,
+    overfetch: int = 4,
+    mmr_lambda: float = MMR_LAMBDA,
+    duplicate_distance: float = DUPLICATE_DISTANCE,
+    metadata_filter: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    Query top_k x overfetch candidates, fetch their vectors and rerank locally
+    Returns {'results': [...], 'timings': {...}} with timings in seconds
+    """
+    candidate_k = min(top_k * overfetch, MAX_TOP_K)
+
+    start_time = time.time()
+    params = {
+        'vectorBucketName': vector_bucket,
+        'indexName': index_name,
+        'queryVector': {'float32': query_embedding},
+        'topK': candidate_k,
+        'returnDistance': True,
+        'returnMetadata': True
+    }
+    if metadata_filter:
+        params['filter'] = metadata_filter
+    candidates = s3vectors_client.query_vectors(**params).get('vectors', [])
+    query_time = time.time()
+
+    # query_vectors does not return vector data, fetch it by key
+    stored = get_vectors_by_keys(
+        s3vectors_client, vector_bucket, index_name,
+        [c['key'] for c in candidates], return_metadata=False
+    )
+    candidates = [c for c in candidates if c['key'] in stored]
+    candidate_vectors = np.asarray(
+        [stored[c['key']]['data']['float32'] for c in candidates], dtype=np.float32
+    )
+    fetch_time = time.time()
+
+    results = mmr_rerank(
+        query_embedding, candidates, candidate_vectors, top_k,
+        mmr_lambda, duplicate_distance
+    )
+    rerank_time = time.time()
+
+    return {
+        'results': results,
+        'candidates': len(candidates),
+        'timings': {
+            'query_seconds': query_time - start_time,
+            'fetch_seconds': fetch_time - query_time,
+            'rerank_seconds': rerank_time - fetch_time,
+            # Cost of the re-rank stage on top of a plain top_k query
+            'extra_seconds': rerank_time - query_time
+        }
+    }
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for SupportedModel payload builders and response extractors.
+Verifies, for every model in the enum and every content type it supports, that
+the compiled builder produces exactly the payload of the reference schema walk
+and that the compiled accessor returns the same embedding as the reference path
+extraction, then reports the per-call time of both. For models that accept
+several inputs per request it also checks that a batched payload carries every
+input in order and that all embeddings come back in order.
+
+    python s3vectors-embed-cli/benchmark_models.py
+"""
+
+import timeit
+
+from models import SupportedModel, _parse_response_path
+
+ITERATIONS = 20000
+DIMENSION = 1024
+SAMPLE_EMBEDDING = [0.1] * DIMENSION
+
+
+def sample_context(model: SupportedModel, content_type: str) -> dict:
+    """Substitution context like build_payload creates, with representative content"""
+    content = {
+        "text": "Wind turbine on a hill",
+        "image_base64": "aGVsbG8=",
+        "image": "data:image/jpeg;base64,aGVsbG8=",
+        "file_path": "s3://nova-mme-demo-source-image/01/b-01.jpg",
+        "format": "mp4",
+        "segment_seconds": 15,
+        "media_source": {"s3Location": {"uri": "s3://nova-mme-demo-source-image/01/b-01.jpg"}},
+        "index": {"dimensions": DIMENSION}
+    }
+    return {
+        "model_id": model.model_id,
+        "content_type": content_type,
+        "content": content,
+        "index": content["index"],
+        "user": {},
+        "async_config": {},
+        "media_source": {"s3Location": {"uri": content["file_path"]}}
+    }
+
+
+def sample_response(path: str) -> dict:
+    """Smallest response that satisfies the first alternative of a response path"""
+    value = SAMPLE_EMBEDDING
+    for kind, arg in reversed(_parse_response_path(path.split("|")[0].strip())):
+        if kind == "key":
+            value = {arg: value}
+        elif kind == "index":
+            value = [value] * (arg + 1)
+        else:
+            value = {"float": value}
+    return value
+
+
+def check_batching(model: SupportedModel, content_type: str) -> int:
+    """Compare a batched payload and response against per-input ones, returning mismatches"""
+    batch_size = model.max_batch_size(content_type)
+    texts = [f"Wind turbine {i}" for i in range(batch_size + 1)]
+    contents = [{"text": text, "index": {"dimensions": DIMENSION}} for text in texts]
+
+    singles = [model.build_payload(content_type, content) for content in contents]
+    payloads = model.build_batch_payloads(content_type, contents)
+    packed = [text for payload in payloads for text in payload["texts"]]
+    identical = (
+        len(payloads) == 2 and packed == texts and
+        all({**payload, "texts": None} == {**singles[0], "texts": None} for payload in payloads)
+    )
+
+    embeddings = [[float(i)] * 4 for i in range(batch_size)]
+    identical = identical and all(
+        model.extract_embeddings(response) == embeddings
+        for response in ({"embeddings": embeddings}, {"embeddings": {"float": embeddings}})
+    )
+
+    batch = contents[:batch_size]
+    single_time = timeit.timeit(
+        lambda: [model.build_payload(content_type, content) for content in batch], number=ITERATIONS // 100
+    )
+    batch_time = timeit.timeit(lambda: model.build_batch_payloads(content_type, batch), number=ITERATIONS // 100)
+    print(f"  batch    {content_type:<30} {'identical' if identical else 'MISMATCH':<9}  "
+          f"{batch_size} inputs in 1 request instead of {batch_size}  "
+          f"build {single_time / batch_time:.1f}x faster")
+    return not identical
+
+
+def content_types(model: SupportedModel) -> list:
+    types = list(model.capabilities.supported_modalities)
+    types += [t for t in model.capabilities.async_modalities or [] if t not in types]
+    if model.supports_multimodal_input():
+        types.append("multimodal")
+    return types
+
+
+def main():
+    """Main function"""
+    print("=" * 60)
+    print("SupportedModel Payload/Response Micro-benchmark")
+    print("=" * 60)
+
+    mismatches = 0
+    for model in SupportedModel:
+        print(f"\n{model.name} ({model.model_id})")
+
+        for content_type in content_types(model):
+            context = sample_context(model, content_type)
+            schema = model._schema_for(content_type)
+            builder = model.payload_builder(content_type)
+
+            reference = model._apply_schema(schema, context)
+            compiled = builder(context)
+            identical = reference == compiled
+            mismatches += not identical
+
+            reference_time = timeit.timeit(lambda: model._apply_schema(schema, context), number=ITERATIONS)
+            compiled_time = timeit.timeit(lambda: builder(context), number=ITERATIONS)
+            print(f"  payload  {content_type:<30} {'identical' if identical else 'MISMATCH':<9}  "
+                  f"reference {reference_time / ITERATIONS * 1e6:6.2f} us  "
+                  f"compiled {compiled_time / ITERATIONS * 1e6:6.2f} us  "
+                  f"({reference_time / compiled_time:.1f}x)")
+
+        path = model.capabilities.response_embedding_path
+        response = sample_response(path)
+        reference = model._extract_by_path(response, path)
+        compiled = model.extract_embedding(response)
+        identical = reference == compiled
+        mismatches += not identical
+
+        reference_time = timeit.timeit(lambda: model._extract_by_path(response, path), number=ITERATIONS)
+        compiled_time = timeit.timeit(lambda: model.extract_embedding(response), number=ITERATIONS)
+        print(f"  response {path:<30} {'identical' if identical else 'MISMATCH':<9}  "
+              f"reference {reference_time / ITERATIONS * 1e6:6.2f} us  "
+              f"compiled {compiled_time / ITERATIONS * 1e6:6.2f} us  "
+              f"({reference_time / compiled_time:.1f}x)")
+
+        for content_type in content_types(model):
+            if model.max_batch_size(content_type) > 1:
+                mismatches += check_batching(model, content_type)
+
+    print("\n" + "=" * 60)
+    if mismatches:
+        print(f"✗ {mismatches} mismatches between compiled and reference implementations")
+        raise SystemExit(1)
+    print("✓ All compiled payloads and extractions are identical")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
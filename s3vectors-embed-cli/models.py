@@ -4,9 +4,18 @@ import uuid
 from pathlib import Path
 from enum import Enum
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
-import click
-from s3vectors.utils.multimodal_helpers import build_media_source
+from typing import List, Optional, Dict, Any, Callable
+
+# Optional so model definitions can be imported without the CLI installed
+# (e.g. by scripts and benchmarks in this repository)
+try:
+    import click
+except ImportError:
+    click = None
+try:
+    from s3vectors.utils.multimodal_helpers import build_media_source
+except ImportError:
+    build_media_source = None
 
 
 @dataclass
@@ -101,6 +110,8 @@ def prepare_processing_input(text_value, text, image, video, audio, is_multimoda
             key_prefix=key_prefix
         )
     else:
+        if click is None:
+            raise ValueError("No valid input provided")
         raise click.ClickException("No valid input provided")
 
 
@@ -111,11 +122,165 @@ class ModelCapabilities:
     supported_modalities: List[str]  # text, image, video, audio
     description: str
     supports_multimodal_input: bool = False  # Can accept multiple modalities simultaneously
-    max_local_file_size: int = None  # Maximum local file size in bytes for async models (None = no limit)
+    max_local_file_size: int = None  # Maximum local file size in bytes for media sources (None = no limit)
+    async_modalities: List[str] = None  # Modalities that need async invocation on an otherwise sync model
     
     # Schema-based payload and response definitions
     payload_schema: Dict[str, Any] = None
     response_embedding_path: str = None  # Path to extract embedding from response
+    
+    # Multi-input batching for APIs that accept arrays: maximum inputs per request
+    # by content type (absent = one input per request), and the path to the list of
+    # all embeddings in a batched response
+    max_batch_size: Dict[str, int] = None
+    batch_response_path: str = None
+
+
+def _compile_template(schema: Any) -> Callable[[dict], Any]:
+    """
+    Compile a payload schema into a builder function, equivalent to
+    SupportedModel._apply_schema but without re-walking the schema and
+    re-splitting template paths for every input.
+    """
+    if isinstance(schema, dict):
+        items = [(key, _compile_template(value)) for key, value in schema.items()]
+
+        def build_dict(context: dict) -> dict:
+            result = {}
+            for key, build in items:
+                value = build(context)
+                if value is not None:  # Skip None values
+                    result[key] = value
+            return result
+        return build_dict
+
+    if isinstance(schema, list):
+        builders = [_compile_template(item) for item in schema]
+        return lambda context: [build(context) for build in builders]
+
+    if isinstance(schema, str) and schema.startswith("{") and schema.endswith("}"):
+        parts = tuple(schema[1:-1].split("."))
+
+        def lookup(context: dict) -> Any:
+            current = context
+            for part in parts:
+                if isinstance(current, dict) and part in current:
+                    current = current[part]
+                else:
+                    return None  # Skip optional parameters
+            return current
+        return lookup
+
+    return lambda context: schema
+
+
+def _parse_response_path(path: str) -> tuple:
+    """Parse a path like 'embeddings[0].embedding' or 'embeddingsByType.*' into access steps."""
+    steps = []
+    for part in path.split("."):
+        if part == "*":
+            steps.append(("first", None))
+            continue
+        key, _, indexes = part.partition("[")
+        if key:
+            steps.append(("key", key))
+        for index in filter(None, indexes.replace("]", "").split("[")):
+            steps.append(("index", int(index)))
+    return tuple(steps)
+
+
+def _compile_response_path(path: str) -> Callable[[dict], Any]:
+    """
+    Compile a response_embedding_path (with '|' fallbacks) into an accessor,
+    equivalent to SupportedModel._extract_by_path but parsed once and using
+    type checks instead of exceptions to fall through to the next path.
+    """
+    alternatives = [_parse_response_path(p.strip()) for p in path.split("|")]
+
+    def error(obj: Any) -> ValueError:
+        return ValueError(
+            f"Failed to extract embedding from response using path '{path}'. "
+            f"Response keys: {list(obj.keys()) if isinstance(obj, dict) else type(obj)}"
+        )
+
+    if len(alternatives) == 1 and len(alternatives[0]) == 1 and alternatives[0][0][0] == "key":
+        # Single top-level key (e.g. 'embedding')
+        key = alternatives[0][0][1]
+
+        def extract_key(obj: Any) -> Any:
+            if isinstance(obj, dict) and key in obj:
+                return obj[key]
+            raise error(obj)
+        return extract_key
+
+    def extract(obj: Any) -> Any:
+        for steps in alternatives:
+            current = obj
+            for kind, arg in steps:
+                if kind == "key":
+                    if not isinstance(current, dict) or arg not in current:
+                        break
+                    current = current[arg]
+                elif kind == "index":
+                    if not isinstance(current, (list, tuple)) or not -len(current) <= arg < len(current):
+                        break
+                    current = current[arg]
+                else:
+                    # Dynamic object access: first value of a dictionary
+                    if not isinstance(current, dict):
+                        break
+                    current = next(iter(current.values()), [])
+            else:
+                return current
+        raise error(obj)
+    return extract
+
+
+def _references_content(schema: Any) -> bool:
+    """Whether a schema node substitutes per-input content."""
+    if isinstance(schema, dict):
+        return any(_references_content(value) for value in schema.values())
+    if isinstance(schema, list):
+        return any(_references_content(item) for item in schema)
+    return isinstance(schema, str) and schema.startswith("{content.") and schema.endswith("}")
+
+
+def _references_media_source(schema: Any) -> bool:
+    """Whether a schema node substitutes the {media_source} built from the input file."""
+    if isinstance(schema, dict):
+        return any(_references_media_source(value) for value in schema.values())
+    if isinstance(schema, list):
+        return any(_references_media_source(item) for item in schema)
+    return schema == "{media_source}"
+
+
+def _compile_batch_template(schema: Any) -> Callable[[List[dict]], Any]:
+    """
+    Compile a payload schema into a builder over a list of contexts (one per input).
+    Single-item lists over content (e.g. "texts": ["{content.text}"]) are expanded
+    to one item per input, in order; every other field comes from the first input.
+    """
+    if isinstance(schema, dict):
+        items = [(key, _compile_batch_template(value)) for key, value in schema.items()]
+
+        def build_dict(contexts: List[dict]) -> dict:
+            result = {}
+            for key, build in items:
+                value = build(contexts)
+                if value is not None:
+                    result[key] = value
+            return result
+        return build_dict
+
+    if isinstance(schema, list):
+        if len(schema) == 1 and _references_content(schema[0]):
+            build_item = _compile_template(schema[0])
+            return lambda contexts: [build_item(context) for context in contexts]
+        builders = [_compile_batch_template(item) for item in schema]
+        return lambda contexts: [build(contexts) for build in builders]
+
+    build = _compile_template(schema)
+    return lambda contexts: build(contexts[0])
 
 
 class SupportedModel(Enum):
@@ -172,6 +337,11 @@ class SupportedModel(Enum):
         supported_modalities=["text", "image"],
         description="Amazon Nova MME",
         supports_multimodal_input=True,
+        # Video and audio use the segmented task (start_async_invoke, one embedding
+        # per segment); content needs file_path (S3 URI), format and segment_seconds.
+        # They stay out of supported_modalities because the CLI invokes this model
+        # synchronously; media_embedding.py drives the async jobs instead.
+        async_modalities=["video", "audio"],
         payload_schema={
             "text": {
                 "taskType": "SINGLE_EMBEDDING",
@@ -209,6 +379,31 @@ class SupportedModel(Enum):
                         "source": {"bytes": "{content.image_base64}"}
                     }
                 }
+            },
+            "video": {
+                "taskType": "SEGMENTED_EMBEDDING",
+                "segmentedEmbeddingParams": {
+                    "embeddingPurpose": "GENERIC_INDEX",
+                    "embeddingDimension": "{index.dimensions}",
+                    "video": {
+                        "format": "{content.format}",
+                        "embeddingMode": "AUDIO_VIDEO_COMBINED",
+                        "source": {"s3Location": {"uri": "{content.file_path}"}},
+                        "segmentationConfig": {"durationSeconds": "{content.segment_seconds}"}
+                    }
+                }
+            },
+            "audio": {
+                "taskType": "SEGMENTED_EMBEDDING",
+                "segmentedEmbeddingParams": {
+                    "embeddingPurpose": "GENERIC_INDEX",
+                    "embeddingDimension": "{index.dimensions}",
+                    "audio": {
+                        "format": "{content.format}",
+                        "source": {"s3Location": {"uri": "{content.file_path}"}},
+                        "segmentationConfig": {"durationSeconds": "{content.segment_seconds}"}
+                    }
+                }
             }
         },
         response_embedding_path="embeddings[0].embedding"
@@ -229,7 +424,9 @@ class SupportedModel(Enum):
                 "input_type": "image"
             }
         },
-        response_embedding_path="embeddings[0]"
+        response_embedding_path="embeddings[0]",
+        max_batch_size={"text": 96},  # Cohere accepts up to 96 texts (one image) per request
+        batch_response_path="embeddings.float|embeddings"
     ))
     
     COHERE_MULTILINGUAL_V3 = ("cohere.embed-multilingual-v3", ModelCapabilities(
@@ -246,7 +443,9 @@ class SupportedModel(Enum):
                 "input_type": "image"
             }
         },
-        response_embedding_path="embeddings[0]"
+        response_embedding_path="embeddings[0]",
+        max_batch_size={"text": 96},  # Cohere accepts up to 96 texts (one image) per request
+        batch_response_path="embeddings.float|embeddings"
     ))
     
     # TwelveLabs Models
@@ -277,9 +476,41 @@ class SupportedModel(Enum):
         response_embedding_path="embedding"
     ))
     
+    TWELVELABS_MARENGO_V3 = ("twelvelabs.marengo-embed-3-0-v1:0", ModelCapabilities(
+        is_async=False,
+        supported_modalities=["text", "image"],
+        description="TwelveLabs Marengo Embed 3.0 v1 (512 dimensions)",
+        payload_schema={
+            "text": {
+                "inputType": "text",
+                "text": {"inputText": "{content.text}"}
+            },
+            "image": {
+                # {"s3Location": {"uri", "bucketOwner"}} or {"base64String": ...}, built
+                # from file_path like Marengo 2.7; an S3 location lets the model read the
+                # object without download and re-encode
+                "inputType": "image",
+                "image": {"mediaSource": "{media_source}"}
+            }
+        },
+        response_embedding_path="data[0].embedding"
+    ))
+    
     def __init__(self, model_id: str, capabilities: ModelCapabilities):
         self.model_id = model_id
         self.capabilities = capabilities
+        # Compiled once per model: payload builders per content type (filled lazily)
+        # and the embedding accessor for responses
+        self._payload_builders = {}
+        self._embedding_accessor = (
+            _compile_response_path(capabilities.response_embedding_path)
+            if capabilities.response_embedding_path else None
+        )
+        self._batch_payload_builders = {}
+        self._batch_accessor = (
+            _compile_response_path(capabilities.batch_response_path)
+            if capabilities.batch_response_path else None
+        )
     
     @classmethod
     def from_model_id(cls, model_id: str) -> Optional['SupportedModel']:
@@ -293,6 +524,10 @@ class SupportedModel(Enum):
         """Check if model requires async processing."""
         return self.capabilities.is_async
     
+    def is_async_content(self, content_type: str) -> bool:
+        """Check if a content type requires async processing with this model."""
+        return self.capabilities.is_async or content_type in (self.capabilities.async_modalities or [])
+    
     def get_system_keys(self, content_type: str) -> List[str]:
         """Extract top-level keys from payload schema without building payload."""
         schema = self.capabilities.payload_schema
@@ -308,13 +543,59 @@ class SupportedModel(Enum):
         """Check if model supports multiple modalities simultaneously."""
         return self.capabilities.supports_multimodal_input
     
-    def build_payload(self, content_type: str, content: dict, user_params: dict = None, 
-                     async_config: dict = None) -> dict:
-        """Build model-specific payload using schema."""
-        user_params = user_params or {}
+    def _schema_for(self, content_type: str) -> Any:
+        """Payload schema for a content type (conditional schemas like Cohere are keyed by type)."""
+        schema = self.capabilities.payload_schema
+        if isinstance(schema, dict) and content_type in schema:
+            return schema[content_type]
+        return schema
+    
+    def payload_builder(self, content_type: str) -> Callable[[dict], Any]:
+        """Compiled builder for a content type's payload schema."""
+        builder = self._payload_builders.get(content_type)
+        if builder is None:
+            builder = _compile_template(self._schema_for(content_type))
+            self._payload_builders[content_type] = builder
+        return builder
+    
+    def max_batch_size(self, content_type: str) -> int:
+        """Maximum number of inputs of a content type per request."""
+        return (self.capabilities.max_batch_size or {}).get(content_type, 1)
+    
+    def build_batch_payloads(self, content_type: str, contents: List[dict], user_params: dict = None) -> List[dict]:
+        """
+        Pack inputs into as few payloads as the model allows (one payload per input
+        for models without batching). Embeddings of each payload's response are
+        returned in input order by extract_embeddings.
+        """
+        batch_size = self.max_batch_size(content_type)
+        if batch_size <= 1:
+            return [self.build_payload(content_type, content, user_params) for content in contents]
         
-        # Create context for schema substitution
-        context = {
+        builder = self._batch_payload_builders.get(content_type)
+        if builder is None:
+            builder = _compile_batch_template(self._schema_for(content_type))
+            self._batch_payload_builders[content_type] = builder
+        
+        user_params = user_params or {}
+        payloads = []
+        for start in range(0, len(contents), batch_size):
+            contexts = [
+                self._build_context(content_type, content, user_params, None)
+                for content in contents[start:start + batch_size]
+            ]
+            payloads.append(self._deep_merge(builder(contexts), user_params))
+        return payloads
+    
+    def extract_embeddings(self, response: dict) -> List[list]:
+        """Extract all embeddings, in input order, from a (possibly batched) response."""
+        if self._batch_accessor is None:
+            return [self.extract_embedding(response)]
+        return self._batch_accessor(response)
+    
+    def _build_context(self, content_type: str, content: dict, user_params: dict, async_config: dict) -> dict:
+        """Create context for schema substitution."""
+        return {
             "model_id": self.model_id,
             "content_type": content_type,
             "content": content,
@@ -322,34 +603,42 @@ class SupportedModel(Enum):
             "user": user_params,
             "async_config": async_config or {}
         }
+    
+    def build_payload(self, content_type: str, content: dict, user_params: dict = None, 
+                     async_config: dict = None) -> dict:
+        """Build model-specific payload using schema."""
+        user_params = user_params or {}
         
-        # Handle dynamic mediaSource for async multimodal models (video/audio/image)
-        if (self.capabilities.is_async and 
-            content_type in ["video", "audio", "image"] and 
-            content_type in self.capabilities.supported_modalities):
-            file_path = content.get("file_path", "")
-            src_bucket_owner = async_config.get("src_bucket_owner") if async_config else None
-            max_file_size = self.capabilities.max_local_file_size
-            context["media_source"] = build_media_source(file_path, src_bucket_owner, max_file_size)
-        
-        # Handle conditional schemas (like Cohere)
-        schema = self.capabilities.payload_schema
-        if isinstance(schema, dict) and content_type in schema:
-            # Use content_type-specific schema
-            schema = schema[content_type]
+        # Create context for schema substitution
+        context = self._build_context(content_type, content, user_params, async_config)
+
+        # Handle dynamic mediaSource for media models, sync (Marengo 3) or async (Marengo 2.7)
+        if (content_type in ["video", "audio", "image"] and 
+            content_type in self.capabilities.supported_modalities and
+            _references_media_source(self._schema_for(content_type))):
+            if "media_source" in content:
+                # Prebuilt by the caller, e.g. an S3 location with a known bucket owner
+                context["media_source"] = content["media_source"]
+            else:
+                if build_media_source is None:
+                    raise RuntimeError("Media input requires the s3vectors-embed-cli package")
+                file_path = content.get("file_path", "")
+                src_bucket_owner = async_config.get("src_bucket_owner") if async_config else None
+                max_file_size = self.capabilities.max_local_file_size
+                context["media_source"] = build_media_source(file_path, src_bucket_owner, max_file_size)
         
-        # Apply schema to get system payload
-        system_payload = self._apply_schema(schema, context)
+        # Apply compiled schema (content_type-specific for conditional schemas) to get system payload
+        system_payload = self.payload_builder(content_type)(context)
         
         # Deep merge user parameters into system payload
         return self._deep_merge(system_payload, user_params)
     
     def extract_embedding(self, response: dict) -> list:
-        """Extract embedding from model response using schema."""
-        return self._extract_by_path(response, self.capabilities.response_embedding_path)
+        """Extract embedding from model response using the compiled response path."""
+        return self._embedding_accessor(response)
     
     def _apply_schema(self, schema: Any, context: dict) -> Any:
-        """Recursively apply context to schema template."""
+        """Recursively apply context to schema template (reference for the compiled builders)."""
 
         if isinstance(schema, dict):
             result = {}
@@ -394,7 +683,10 @@ class SupportedModel(Enum):
         return current
     
     def _extract_by_path(self, obj: dict, path: str) -> Any:
-        """Extract value from response using path like 'embeddings[0]' or 'embeddingsByType.*|embedding'."""
+        """
+        Extract value from response using path like 'embeddings[0]' or 'embeddingsByType.*|embedding'
+        (reference for the compiled accessor).
+        """
         try:
             # Handle fallback paths with | separator
             if "|" in path:
@@ -0,0 +1,102 @@
+"""
+Read stored vectors back from an S3 Vectors index by key
+Includes a small in-process LRU cache so repeated "more like this" lookups
+reuse the stored embedding instead of calling get_vectors (or Bedrock) again
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+GET_BATCH_SIZE = 100  # get_vectors keys per request limit
+CACHE_SIZE = 1024  # Stored vectors kept in memory (3072-d ~ 12KB each as floats)
+
+
+def get_vectors_by_keys(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    keys: List[str],
+    return_metadata: bool = True
+) -> Dict[str, Dict[str, Any]]:
+    """Fetch vectors (with data) for a list of keys, returning {key: vector}"""
+    vectors = {}
+    for start in range(0, len(keys), GET_BATCH_SIZE):
+        response = s3vectors_client.get_vectors(
+            vectorBucketName=vector_bucket,
+            indexName=index_name,
+            keys=keys[start:start + GET_BATCH_SIZE],
+            returnData=True,
+            returnMetadata=return_metadata
+        )
+        for vector in response.get('vectors', []):
+            vectors[vector['key']] = vector
+    return vectors
+
+
+class StoredVectorCache:
+    """Thread-safe LRU cache of stored vectors keyed by (bucket, index, key)"""
+
+    def __init__(self, max_size: int = CACHE_SIZE):
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get_vector(
+        self,
+        s3vectors_client,
+        vector_bucket: str,
+        index_name: str,
+        key: str
+    ) -> Optional[Dict[str, Any]]:
+        """Get a stored vector, calling get_vectors only on a cache miss"""
+        cache_key = (vector_bucket, index_name, key)
+        with self.lock:
+            if cache_key in self.entries:
+                self.entries.move_to_end(cache_key)
+                return self.entries[cache_key]
+
+        vector = get_vectors_by_keys(s3vectors_client, vector_bucket, index_name, [key]).get(key)
+        if vector is None:
+            return None
+
+        with self.lock:
+            self.entries[cache_key] = vector
+            self.entries.move_to_end(cache_key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return vector
+
+
+# Shared cache for scripts and GUI
+vector_cache = StoredVectorCache()
+
+
+def query_by_key(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    key: str,
+    top_k: int = 5,
+    metadata_filter: Dict[str, Any] = None,
+    cache: StoredVectorCache = vector_cache
+) -> List[Dict[str, Any]]:
+    """Find vectors similar to a stored vector, using its stored embedding as the query"""
+    vector = cache.get_vector(s3vectors_client, vector_bucket, index_name, key)
+    if vector is None:
+        raise KeyError(f"Vector key not found in {index_name}: {key}")
+
+    params = {
+        'vectorBucketName': vector_bucket,
+        'indexName': index_name,
+        'queryVector': {'float32': vector['data']['float32']},
+        # One extra result because the stored vector matches itself
+        'topK': top_k + 1,
+        'returnDistance': True,
+        'returnMetadata': True
+    }
+    if metadata_filter:
+        params['filter'] = metadata_filter
+
+    results = s3vectors_client.query_vectors(**params).get('vectors', [])
+    return [r for r in results if r.get('key') != key][:top_k]
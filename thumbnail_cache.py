@@ -0,0 +1,157 @@
+"""
+Thumbnail and full-image caches for the GUI
+Stores already-resized thumbnails on local disk, keyed by S3 URI and
+thumbnail size. Each entry records the ETag of the object it was made from,
+so the caller revalidates it with a conditional GET (If-None-Match) and a
+changed object never serves a stale tile.
+The cache is bounded by total bytes and evicts least recently used files
+(file modification time is refreshed on every hit). Writes go through a
+temporary file and a rename, so several GUI sessions can share one directory.
+Full-resolution images are kept only in a small in-memory LRU bounded by
+decoded size.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image
+
+# Cache location (override with THUMBNAIL_CACHE_DIR environment variable)
+CACHE_DIR = os.environ.get(
+    'THUMBNAIL_CACHE_DIR',
+    str(Path.home() / '.cache' / 'nova-mme-demo' / 'thumbnails')
+)
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+MAX_MEMORY_BYTES = 512 * 1024 * 1024  # Decoded full-resolution images held in memory
+THUMBNAIL_SUFFIX = '.thumb'
+
+
+class ThumbnailCache:
+    """On-disk LRU cache of thumbnails bounded by total size"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = sum(path.stat().st_size for path in self._files())
+
+    def _files(self):
+        return self.cache_dir.glob(f"*{THUMBNAIL_SUFFIX}")
+
+    def _path(self, s3_uri: str, variant: str) -> Path:
+        digest = hashlib.sha256(f"{s3_uri}\0{variant}".encode('utf-8')).hexdigest()
+        return self.cache_dir / f"{digest}{THUMBNAIL_SUFFIX}"
+
+    def get(self, s3_uri: str, variant: str) -> Optional[Tuple[str, Image.Image]]:
+        """(ETag, thumbnail) cached for this object and size, or None; the caller revalidates the ETag"""
+        path = self._path(s3_uri, variant)
+        try:
+            with open(path, 'rb') as f:
+                etag, _, data = f.read().partition(b'\n')
+            with Image.open(BytesIO(data)) as image:
+                image.load()
+        except (OSError, ValueError):
+            # Missing, evicted by another session or unreadable
+            return None
+        return etag.decode('utf-8'), image
+
+    def touch(self, s3_uri: str, variant: str):
+        """Count a validated entry as a hit and mark it as recently used"""
+        self.hits += 1
+        try:
+            os.utime(self._path(s3_uri, variant))
+        except OSError:
+            pass
+
+    def put(self, s3_uri: str, variant: str, etag: str, thumbnail: Image.Image):
+        """Store a thumbnail, evicting least recently used entries beyond the size limit"""
+        self.misses += 1
+        buffer = BytesIO()
+        buffer.write(etag.encode('utf-8') + b'\n')
+        if thumbnail.mode in ('RGBA', 'LA', 'P'):
+            thumbnail.save(buffer, format='PNG')
+        else:
+            thumbnail.convert('RGB').save(buffer, format='JPEG', quality=85)
+        data = buffer.getvalue()
+
+        path = self._path(s3_uri, variant)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+
+        with self._lock:
+            # An entry for a changed object is replaced in place; drop its old size
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Delete oldest files until the cache fits (re-scans, as other sessions share the directory)"""
+        entries = []
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+
+class MemoryImageCache:
+    """Thread-safe in-memory LRU of decoded images bounded by total pixel bytes"""
+
+    def __init__(self, max_bytes: int = MAX_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def image_bytes(image: Image.Image) -> int:
+        return image.width * image.height * len(image.getbands())
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key: str, image: Image.Image):
+        """Cache an image; images larger than the whole budget are not kept"""
+        size = self.image_bytes(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= self.image_bytes(previous)
+            self._images[key] = image
+            self._total_bytes += size
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._total_bytes -= self.image_bytes(evicted)
@@ -0,0 +1,114 @@
+"""
+Two-stage Matryoshka retrieval
+Runs a cheap coarse search against a low-dimension index holding truncated,
+renormalised copies of the full vectors (same keys), then reranks the
+shortlist exactly with the full-dimension vectors
+"""
+
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+
+from index_migration import truncate_and_normalize
+from rerank import MAX_TOP_K, normalize_rows
+from stored_vectors import get_vectors_by_keys
+
+SHORTLIST_SIZE = 50  # Coarse candidates reranked with full vectors
+
+
+def two_stage_query(
+    s3vectors_client,
+    vector_bucket: str,
+    coarse_index: str,
+    full_index: str,
+    query_embedding: List[float],
+    coarse_dimension: int,
+    top_k: int = 5,
+    shortlist: int = SHORTLIST_SIZE,
+    metadata_filter: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """Coarse search on the low-dimension index, then exact rerank with full vectors"""
+    start_time = time.time()
+
+    params = {
+        'vectorBucketName': vector_bucket,
+        'indexName': coarse_index,
+        'queryVector': {'float32': truncate_and_normalize(query_embedding, coarse_dimension)},
+        'topK': min(max(shortlist, top_k), MAX_TOP_K),
+        'returnDistance': True,
+        'returnMetadata': True
+    }
+    if metadata_filter:
+        params['filter'] = metadata_filter
+    candidates = s3vectors_client.query_vectors(**params).get('vectors', [])
+    coarse_time = time.time()
+
+    stored = get_vectors_by_keys(
+        s3vectors_client, vector_bucket, full_index,
+        [c['key'] for c in candidates], return_metadata=False
+    )
+    candidates = [c for c in candidates if c['key'] in stored]
+    fetch_time = time.time()
+
+    results = []
+    if candidates:
+        vectors = normalize_rows(np.asarray(
+            [stored[c['key']]['data']['float32'] for c in candidates], dtype=np.float32
+        ))
+        query = np.asarray(query_embedding, dtype=np.float32)
+        similarities = vectors @ (query / (np.linalg.norm(query) or 1.0))
+        for idx in np.argsort(-similarities)[:top_k]:
+            result = dict(candidates[idx])
+            result['coarse_distance'] = result.get('distance')
+            result['distance'] = float(1.0 - similarities[idx])
+            results.append(result)
+    rerank_time = time.time()
+
+    return {
+        'results': results,
+        'candidates': len(candidates),
+        'timings': {
+            'coarse_seconds': coarse_time - start_time,
+            'fetch_seconds': fetch_time - coarse_time,
+            'rerank_seconds': rerank_time - fetch_time,
+            'total_seconds': rerank_time - start_time
+        }
+    }
+
+
+def compare_with_single_stage(
+    s3vectors_client,
+    vector_bucket: str,
+    coarse_index: str,
+    full_index: str,
+    query_embedding: List[float],
+    coarse_dimension: int,
+    top_k: int = 5,
+    shortlist: int = SHORTLIST_SIZE
+) -> Dict[str, Any]:
+    """Run both strategies for one query and report recall@k of two-stage against single-stage"""
+    start_time = time.time()
+    single = s3vectors_client.query_vectors(
+        vectorBucketName=vector_bucket,
+        indexName=full_index,
+        queryVector={'float32': query_embedding},
+        topK=top_k,
+        returnDistance=True,
+        returnMetadata=True
+    ).get('vectors', [])
+    single_seconds = time.time() - start_time
+
+    two_stage = two_stage_query(
+        s3vectors_client, vector_bucket, coarse_index, full_index,
+        query_embedding, coarse_dimension, top_k, shortlist
+    )
+
+    truth = {r['key'] for r in single}
+    found = {r['key'] for r in two_stage['results']}
+    return {
+        'recall_at_k': len(truth & found) / len(truth) if truth else 1.0,
+        'single_stage_seconds': single_seconds,
+        'two_stage_seconds': two_stage['timings']['total_seconds'],
+        'two_stage_timings': two_stage['timings']
+    }
@@ -0,0 +1,328 @@
+"""
+Parallel segmented snapshot of an S3 Vectors index
+Exports every vector of an index with list_vectors segmentation into sharded
+numpy vector blocks plus a metadata table, and restores them with batched
+put_vectors calls. An export is written to a staging directory and swapped
+in when complete, so re-exporting never mixes shards of two snapshots and a
+failed export leaves the previous snapshot intact.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Iterator, Optional, Tuple
+
+import numpy as np
+
+# Snapshot layout
+MANIFEST_FILE = 'manifest.json'
+SNAPSHOT_FORMAT_VERSION = 1
+SUPPORTED_DTYPES = ('float32', 'float16')
+
+# S3 Vectors API limits
+MAX_SEGMENTS = 16       # list_vectors segmentCount upper limit
+LIST_PAGE_SIZE = 1000   # list_vectors maxResults upper limit
+PUT_BATCH_SIZE = 500    # put_vectors vectors per request limit
+
+# Vectors per shard file (3072-d float32 = ~120MB per shard)
+SHARD_SIZE = 10000
+
+# Sibling directories used while an export is replacing a snapshot
+STAGING_SUFFIX = '.partial'
+PREVIOUS_SUFFIX = '.previous'
+
+
+def sha256_file(path: Path) -> str:
+    """Calculate SHA-256 checksum of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_snapshot_file(name: str) -> bool:
+    """Whether a file name belongs to the snapshot layout (manifest, vector blocks, metadata tables)"""
+    return name in (MANIFEST_FILE, f"{MANIFEST_FILE}.tmp") or name.endswith(('.npy', '.meta.json'))
+
+
+def check_snapshot_dir(path: Path):
+    """Raise ValueError if a directory holds anything but snapshot files, so it is never replaced"""
+    foreign = [entry.name for entry in path.iterdir() if not (entry.is_file() and is_snapshot_file(entry.name))]
+    if foreign:
+        raise ValueError(f"{path} is not a snapshot directory (contains {', '.join(sorted(foreign)[:5])})")
+
+
+def write_shard(
+    output_dir: Path,
+    shard_name: str,
+    keys: List[str],
+    vectors: List[List[float]],
+    metadata: List[Dict[str, Any]],
+    dtype: str = 'float32'
+) -> Dict[str, Any]:
+    """Write one shard (vector block + metadata table) and return its manifest entry"""
+    vector_file = output_dir / f"{shard_name}.npy"
+    metadata_file = output_dir / f"{shard_name}.meta.json"
+
+    block = np.asarray(vectors, dtype=np.float32).astype(dtype, copy=False)
+    np.save(vector_file, block)
+
+    # Column-oriented metadata table, row i belongs to vector i
+    with open(metadata_file, 'w') as f:
+        json.dump({'key': keys, 'metadata': metadata}, f, separators=(',', ':'))
+
+    return {
+        'name': shard_name,
+        'count': len(keys),
+        'vector_file': vector_file.name,
+        'metadata_file': metadata_file.name,
+        'vector_sha256': sha256_file(vector_file),
+        'metadata_sha256': sha256_file(metadata_file)
+    }
+
+
+def export_segment(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    output_dir: Path,
+    segment_index: int,
+    segment_count: int,
+    dtype: str = 'float32',
+    shard_size: int = SHARD_SIZE
+) -> List[Dict[str, Any]]:
+    """Page through one list_vectors segment and write it out as shards"""
+    shards = []
+    keys, vectors, metadata = [], [], []
+    next_token = None
+
+    def flush():
+        shard_name = f"seg{segment_index:02d}-{len(shards):05d}"
+        shards.append(write_shard(output_dir, shard_name, keys, vectors, metadata, dtype))
+        keys.clear()
+        vectors.clear()
+        metadata.clear()
+
+    while True:
+        params = {
+            'vectorBucketName': vector_bucket,
+            'indexName': index_name,
+            'maxResults': LIST_PAGE_SIZE,
+            'segmentCount': segment_count,
+            'segmentIndex': segment_index,
+            'returnData': True,
+            'returnMetadata': True
+        }
+        if next_token:
+            params['nextToken'] = next_token
+
+        response = s3vectors_client.list_vectors(**params)
+
+        for vector in response.get('vectors', []):
+            keys.append(vector['key'])
+            vectors.append(vector['data']['float32'])
+            metadata.append(vector.get('metadata', {}))
+            if len(keys) >= shard_size:
+                flush()
+
+        next_token = response.get('nextToken')
+        if not next_token:
+            break
+
+    if keys:
+        flush()
+
+    return shards
+
+
+def export_index(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    output_dir: str,
+    segment_count: int = MAX_SEGMENTS,
+    dtype: str = 'float32',
+    shard_size: int = SHARD_SIZE
+) -> Dict[str, Any]:
+    """Export an entire index by reading all list_vectors segments in parallel"""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported dtype: {dtype} (expected one of {SUPPORTED_DTYPES})")
+    if not 1 <= segment_count <= MAX_SEGMENTS:
+        raise ValueError(f"segment_count must be between 1 and {MAX_SEGMENTS}")
+
+    # Export into a fresh staging directory next to the snapshot
+    output_path = Path(output_dir)
+    staging_path = output_path.with_name(output_path.name + STAGING_SUFFIX)
+    previous_path = output_path.with_name(output_path.name + PREVIOUS_SUFFIX)
+    for path in (output_path, staging_path, previous_path):
+        if path.exists():
+            check_snapshot_dir(path)
+    # Left over by an interrupted export
+    for path in (staging_path, previous_path):
+        if path.exists():
+            shutil.rmtree(path)
+    staging_path.mkdir(parents=True)
+
+    start_time = time.time()
+
+    try:
+        # One worker per segment, each paging independently
+        with ThreadPoolExecutor(max_workers=segment_count) as executor:
+            futures = [
+                executor.submit(
+                    export_segment, s3vectors_client, vector_bucket, index_name,
+                    staging_path, segment_index, segment_count, dtype, shard_size
+                )
+                for segment_index in range(segment_count)
+            ]
+            shards = [shard for future in futures for shard in future.result()]
+    except BaseException:
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+
+    dimension = None
+    if shards:
+        dimension = int(np.load(staging_path / shards[0]['vector_file'], mmap_mode='r').shape[1])
+
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'vector_bucket': vector_bucket,
+        'index_name': index_name,
+        'dtype': dtype,
+        'dimension': dimension,
+        'segment_count': segment_count,
+        'total_vectors': sum(shard['count'] for shard in shards),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'shards': shards
+    }
+
+    # The manifest marks the staged snapshot complete
+    with open(staging_path / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the complete snapshot in; the old one is removed only afterwards
+    if output_path.exists():
+        os.replace(output_path, previous_path)
+    os.replace(staging_path, output_path)
+    if previous_path.exists():
+        shutil.rmtree(previous_path)
+
+    manifest['elapsed_seconds'] = time.time() - start_time
+    return manifest
+
+
+def load_manifest(snapshot_dir: str) -> Dict[str, Any]:
+    """Load snapshot manifest"""
+    manifest_path = Path(snapshot_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Snapshot manifest not found (incomplete snapshot?): {manifest_path}")
+
+    with open(manifest_path, 'r') as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {manifest.get('format_version')}")
+
+    return manifest
+
+
+def verify_shard(snapshot_dir: str, shard: Dict[str, Any]):
+    """Verify shard files against manifest checksums"""
+    for file_field, checksum_field in (('vector_file', 'vector_sha256'), ('metadata_file', 'metadata_sha256')):
+        path = Path(snapshot_dir) / shard[file_field]
+        if sha256_file(path) != shard[checksum_field]:
+            raise ValueError(f"Checksum mismatch for {path}")
+
+
+def read_shard(
+    snapshot_dir: str,
+    shard: Dict[str, Any],
+    verify: bool = True,
+    mmap_mode: Optional[str] = None
+) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+    """Read one shard, returning (keys, vectors, metadata)"""
+    if verify:
+        verify_shard(snapshot_dir, shard)
+
+    vectors = np.load(Path(snapshot_dir) / shard['vector_file'], mmap_mode=mmap_mode)
+    with open(Path(snapshot_dir) / shard['metadata_file'], 'r') as f:
+        table = json.load(f)
+
+    return table['key'], vectors, table['metadata']
+
+
+def iter_snapshot(
+    snapshot_dir: str,
+    verify: bool = True,
+    mmap_mode: Optional[str] = None
+) -> Iterator[Tuple[List[str], np.ndarray, List[Dict[str, Any]]]]:
+    """Iterate over all shards of a snapshot"""
+    manifest = load_manifest(snapshot_dir)
+    for shard in manifest['shards']:
+        yield read_shard(snapshot_dir, shard, verify, mmap_mode)
+
+
+def restore_shard(
+    s3vectors_client,
+    snapshot_dir: str,
+    shard: Dict[str, Any],
+    vector_bucket: str,
+    index_name: str,
+    batch_size: int = PUT_BATCH_SIZE
+) -> int:
+    """Write one shard back to an index with batched put_vectors"""
+    keys, vectors, metadata = read_shard(snapshot_dir, shard)
+    vectors = vectors.astype(np.float32, copy=False)
+
+    for start in range(0, len(keys), batch_size):
+        end = start + batch_size
+        s3vectors_client.put_vectors(
+            vectorBucketName=vector_bucket,
+            indexName=index_name,
+            vectors=[
+                {
+                    'key': key,
+                    'data': {'float32': vector.tolist()},
+                    'metadata': meta
+                }
+                for key, vector, meta in zip(keys[start:end], vectors[start:end], metadata[start:end])
+            ]
+        )
+
+    return len(keys)
+
+
+def restore_snapshot(
+    s3vectors_client,
+    snapshot_dir: str,
+    vector_bucket: str,
+    index_name: str,
+    max_workers: int = 8,
+    batch_size: int = PUT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """Restore a snapshot into an index, writing shards in parallel"""
+    manifest = load_manifest(snapshot_dir)
+    start_time = time.time()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(
+                restore_shard, s3vectors_client, snapshot_dir, shard,
+                vector_bucket, index_name, batch_size
+            )
+            for shard in manifest['shards']
+        ]
+        restored = sum(future.result() for future in futures)
+
+    return {
+        'vector_bucket': vector_bucket,
+        'index_name': index_name,
+        'restored_vectors': restored,
+        'shards': len(manifest['shards']),
+        'elapsed_seconds': time.time() - start_time
+    }
@@ -0,0 +1,342 @@
+"""
+Coalescing put_vectors writer
+Buffers vectors from any number of producer threads and writes them in
+batched put_vectors calls. A batch is flushed when it reaches the vector
+count limit, the request size limit, or when its oldest vector has waited
+max_latency seconds. Throttled or failing writes are retried with jittered
+exponential backoff; vectors that still cannot be written (or are unwritten
+when the writer is closed) are spilled as JSON Lines to a local or S3 spool,
+one directory per index (<spool>/<index_name>/<time>-<id>.jsonl), so
+embeddings that Bedrock already produced are never lost. replay_spool
+writes an index's spooled vectors later.
+
+Only the standard library is used, so the module can be packaged with the
+Lambda function as-is.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+PUT_BATCH_SIZE = 500  # put_vectors accepts at most 500 vectors per call
+MAX_REQUEST_BYTES = 16 * 1024 * 1024  # Stay well below the put_vectors request size limit
+MAX_LATENCY_SECONDS = 1.0  # Longest a buffered vector waits before its batch is flushed
+MAX_PENDING_BATCHES = 4  # Producers block when this many full batches wait to be written
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 0.2
+BACKOFF_MAX_SECONDS = 20.0
+
+# Error codes (and HTTP statuses) worth retrying: throttling and transient server errors
+THROTTLING_ERROR_CODES = {
+    'ThrottlingException', 'TooManyRequestsException', 'SlowDown', 'RequestLimitExceeded',
+    'ServiceQuotaExceededException', 'ProvisionedThroughputExceededException'
+}
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def error_code(e: Exception) -> str:
+    """AWS error code of a botocore ClientError ('' for other exceptions)"""
+    return getattr(e, 'response', {}).get('Error', {}).get('Code', '')
+
+
+def is_throttling_error(e: Exception) -> bool:
+    """Whether an AWS call failed because of throttling"""
+    status = getattr(e, 'response', {}).get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return error_code(e) in THROTTLING_ERROR_CODES or status == 429
+
+
+def is_retryable_error(e: Exception) -> bool:
+    """Whether an AWS call failed with throttling or a transient server error"""
+    status = getattr(e, 'response', {}).get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return is_throttling_error(e) or status in RETRYABLE_STATUS_CODES or isinstance(e, ConnectionError)
+
+
+def estimate_request_bytes(vector: Dict[str, Any]) -> int:
+    """Approximate JSON size of a vector in a put_vectors request (about 12 bytes per float)"""
+    data = vector.get('data', {}).get('float32', [])
+    return 12 * len(data) + len(json.dumps(vector.get('metadata', {}))) + len(vector.get('key', '')) + 64
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class VectorWriter:
+    """
+    Thread-safe coalescing writer for one index
+    Use as a context manager, or call close() to flush and spill what remains.
+    on_flush(vectors) is called after each successful put_vectors.
+    """
+
+    def __init__(
+        self,
+        s3vectors_client,
+        vector_bucket: str,
+        index_name: str,
+        spool: str = None,
+        s3_client=None,
+        max_vectors: int = PUT_BATCH_SIZE,
+        max_bytes: int = MAX_REQUEST_BYTES,
+        max_latency: float = MAX_LATENCY_SECONDS,
+        max_retries: int = MAX_RETRIES,
+        on_flush: Callable[[List[Dict[str, Any]]], None] = None,
+        limiter=None
+    ):
+        """
+        spool: local directory or s3://bucket/prefix/ for unwritable vectors (None = keep in memory only)
+        limiter: optional adaptive_concurrency.AdaptiveLimiter shared with other S3 Vectors callers
+        """
+        self.s3vectors_client = s3vectors_client
+        self.vector_bucket = vector_bucket
+        self.index_name = index_name
+        self.spool = spool
+        self.s3_client = s3_client
+        self.max_vectors = max_vectors
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.max_retries = max_retries
+        self.on_flush = on_flush or (lambda vectors: None)
+        self.limiter = limiter
+
+        self.condition = threading.Condition()
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.buffer_started = None
+        self.ready = []  # Full batches waiting for the flusher
+        self.writing = None  # Batch currently being written
+        self.closed = False
+        self.unwritten = []  # Batches that exhausted their retries
+        self.spool_files = []
+        self.stats = {'added': 0, 'written': 0, 'requests': 0, 'retries': 0, 'throttled': 0, 'spilled': 0}
+
+        self.flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self.flusher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _cut_batch(self):
+        """Move the buffer to the ready list (caller holds the condition)"""
+        if self.buffer:
+            self.ready.append(self.buffer)
+            self.buffer = []
+            self.buffer_bytes = 0
+            self.buffer_started = None
+            self.condition.notify_all()
+
+    def add(self, vector: Dict[str, Any]):
+        """Buffer one vector ({'key', 'data', 'metadata'}), blocking while too many batches are pending"""
+        size = estimate_request_bytes(vector)
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("VectorWriter is closed")
+            while len(self.ready) >= MAX_PENDING_BATCHES:
+                self.condition.wait()
+            if self.buffer and self.buffer_bytes + size > self.max_bytes:
+                self._cut_batch()
+            if not self.buffer:
+                self.buffer_started = time.monotonic()
+                self.condition.notify_all()  # Start the latency deadline
+            self.buffer.append(vector)
+            self.buffer_bytes += size
+            self.stats['added'] += 1
+            if len(self.buffer) >= self.max_vectors:
+                self._cut_batch()
+
+    def add_many(self, vectors: List[Dict[str, Any]]):
+        for vector in vectors:
+            self.add(vector)
+
+    def flush(self):
+        """Write everything buffered so far and wait for it"""
+        with self.condition:
+            self._cut_batch()
+            while self.ready or self.writing is not None:
+                self.condition.wait()
+
+    def _flush_loop(self):
+        while True:
+            with self.condition:
+                while not self.ready:
+                    if self.closed and not self.buffer:
+                        return
+                    if self.buffer:
+                        remaining = self.buffer_started + self.max_latency - time.monotonic()
+                        if remaining <= 0 or self.closed:
+                            self._cut_batch()
+                            break
+                        self.condition.wait(remaining)
+                    else:
+                        self.condition.wait()
+                batch = self.ready.pop(0)
+                self.writing = batch
+                self.condition.notify_all()  # Unblock producers waiting on pending batches
+
+            written = self._write(batch)
+            with self.condition:
+                if not written:
+                    self.unwritten.append(batch)
+                self.writing = None
+                self.condition.notify_all()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        """put_vectors with jittered backoff; False if the batch could not be written"""
+        for attempt in range(self.max_retries + 1):
+            token = self.limiter.acquire() if self.limiter else None
+            try:
+                self.s3vectors_client.put_vectors(
+                    vectorBucketName=self.vector_bucket,
+                    indexName=self.index_name,
+                    vectors=batch
+                )
+            except Exception as e:
+                throttled = is_throttling_error(e)
+                if self.limiter:
+                    self.limiter.release(token, throttled)
+                if throttled:
+                    self.stats['throttled'] += 1
+                if not is_retryable_error(e) or attempt == self.max_retries:
+                    print(f"  ✗ put_vectors failed for {len(batch)} vectors: {e}")
+                    return False
+                self.stats['retries'] += 1
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            if self.limiter:
+                self.limiter.release(token)
+            self.stats['requests'] += 1
+            self.stats['written'] += len(batch)
+            try:
+                self.on_flush(batch)
+            except Exception as e:
+                print(f"  ✗ on_flush callback failed: {e}")
+            return True
+        return False
+
+    def close(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Flush buffered vectors, waiting up to timeout seconds, then spill
+        everything not written (failed batches and, on timeout, pending ones)
+        Returns the writer stats including 'spool_files'
+        """
+        with self.condition:
+            self.closed = True
+            self._cut_batch()
+            self.condition.notify_all()
+        self.flusher.join(timeout)
+
+        with self.condition:
+            leftover = self.unwritten + self.ready + ([self.buffer] if self.buffer else [])
+            if self.flusher.is_alive() and self.writing is not None:
+                # Timed out mid-write: spill it too (put_vectors overwrites by key, so a late
+                # success only duplicates the spool entry, never the vector)
+                leftover.append(self.writing)
+            self.unwritten, self.ready, self.buffer = [], [], []
+        vectors = [vector for batch in leftover for vector in batch]
+        if vectors:
+            self._spill(vectors)
+        return {**self.stats, 'spool_files': list(self.spool_files)}
+
+    def _spill(self, vectors: List[Dict[str, Any]]):
+        """Write vectors to the spool as JSON Lines"""
+        self.stats['spilled'] += len(vectors)
+        if not self.spool:
+            print(f"  ✗ {len(vectors)} vectors not written and no spool configured")
+            return
+
+        # Every line names its index, so a file can never be replayed into another one
+        body = ''.join(json.dumps({'index_name': self.index_name, 'vector': vector}) + '\n' for vector in vectors)
+        name = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}.jsonl"
+        if self.spool.startswith('s3://'):
+            bucket, key_prefix = spool_prefix(self.spool, self.index_name)
+            key = f"{key_prefix}{name}"
+            self.s3_client.put_object(Bucket=bucket, Key=key, Body=body.encode('utf-8'))
+            location = f"s3://{bucket}/{key}"
+        else:
+            directory = spool_directory(self.spool, self.index_name)
+            directory.mkdir(parents=True, exist_ok=True)
+            location = str(directory / name)
+            tmp_file = f"{location}.tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(body)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, location)
+        self.spool_files.append(location)
+        print(f"  Spilled {len(vectors)} vectors to {location}")
+
+
+def spool_prefix(spool: str, index_name: str) -> Tuple[str, str]:
+    """(bucket, key prefix) of an index's spool files under s3://bucket/prefix/"""
+    bucket, _, prefix = spool[len('s3://'):].partition('/')
+    prefix = f"{prefix.rstrip('/')}/" if prefix.strip('/') else ''
+    return bucket, f"{prefix}{index_name}/"
+
+
+def spool_directory(spool: str, index_name: str) -> Path:
+    """Local directory holding an index's spool files"""
+    return Path(spool) / index_name
+
+
+def replay_spool(
+    s3vectors_client,
+    vector_bucket: str,
+    index_name: str,
+    spool: str,
+    s3_client=None
+) -> Dict[str, int]:
+    """
+    Write spooled vectors of an index again, deleting each spool file once written
+    Only <spool>/<index_name>/*.jsonl is read, and files whose lines name another
+    index are skipped (and kept)
+    """
+    if spool.startswith('s3://'):
+        bucket, key_prefix = spool_prefix(spool, index_name)
+        paginator = s3_client.get_paginator('list_objects_v2')
+        files = [
+            f"s3://{bucket}/{obj['Key']}"
+            for page in paginator.paginate(Bucket=bucket, Prefix=key_prefix)
+            for obj in page.get('Contents', [])
+            # Exactly this directory: no deeper keys
+            if obj['Key'].endswith('.jsonl') and '/' not in obj['Key'][len(key_prefix):]
+        ]
+    else:
+        files = sorted(str(path) for path in spool_directory(spool, index_name).glob('*.jsonl'))
+
+    counts = {'files': 0, 'vectors': 0, 'skipped': 0}
+    for location in files:
+        if location.startswith('s3://'):
+            bucket, _, key = location[len('s3://'):].partition('/')
+            lines = s3_client.get_object(Bucket=bucket, Key=key)['Body'].read().decode('utf-8').splitlines()
+        else:
+            with open(location, 'r') as f:
+                lines = f.read().splitlines()
+        records = [json.loads(line) for line in lines if line.strip()]
+        if any(record.get('index_name') != index_name for record in records):
+            print(f"  ✗ {location}: not spilled from index {index_name}, skipped")
+            counts['skipped'] += 1
+            continue
+        vectors = [record['vector'] for record in records]
+
+        # Spills from this writer go to a fresh spool file, so the replayed one can be removed
+        writer = VectorWriter(s3vectors_client, vector_bucket, index_name, spool=spool, s3_client=s3_client)
+        writer.add_many(vectors)
+        stats = writer.close()
+        if stats['spilled']:
+            print(f"  ✗ {location}: {stats['spilled']} vectors still not written, respooled")
+        if location.startswith('s3://'):
+            s3_client.delete_object(Bucket=bucket, Key=key)
+        else:
+            os.remove(location)
+        counts['files'] += 1
+        counts['vectors'] += stats['written']
+    return counts